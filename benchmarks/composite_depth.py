@@ -0,0 +1,48 @@
+"""
+Measure how the cost of finding and loading plugins through a
+`CompositeGrappler` scales with the number of wrappers.
+
+Run with `python -m benchmarks.composite_depth` from the project root.
+"""
+
+import sys
+import timeit
+
+from grappler.grapplers import BouncerGrappler, CompositeGrappler, StaticGrappler
+
+PLUGIN_COUNT = 1000
+DEPTHS = [0, 1, 2, 4, 8, 16]
+
+
+def make_grappler(depth: int) -> CompositeGrappler:
+    grappler = CompositeGrappler(
+        StaticGrappler(*[(["numbers"], i) for i in range(PLUGIN_COUNT)])
+    )
+
+    for _ in range(depth):
+        grappler.wrap(BouncerGrappler())
+
+    return grappler
+
+
+def find_and_load(grappler: CompositeGrappler) -> None:
+    with grappler.find("numbers") as plugins:
+        for plugin in plugins:
+            grappler.load(plugin)
+
+
+def main() -> None:
+    sys.stdout.write(f"{'depth':>5}  {'usec/plugin':>11}\n")
+
+    for depth in DEPTHS:
+        grappler = make_grappler(depth)
+        number = 5
+        best = min(
+            timeit.repeat(lambda: find_and_load(grappler), number=number, repeat=5)
+        )
+        usec = best / number / PLUGIN_COUNT * 1e6
+        sys.stdout.write(f"{depth:>5}  {usec:>11.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
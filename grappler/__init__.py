@@ -5,13 +5,24 @@ started using grappler. The main entry point is the
 
 """
 
-from ._types import Grappler, Package, Plugin, UnknownPluginError  # isort: skip
-from ._hook import Hook
+from ._types import (  # isort: skip
+    Grappler,
+    Package,
+    Plugin,
+    PluginTimeoutError,
+    UnknownPluginError,
+)
+from ._failure import FailurePolicy, SuspendedPluginError  # isort: skip
+from ._hook import Hook, preload
 
 __all__ = [
+    "FailurePolicy",
     "Hook",
     "Plugin",
     "Grappler",
     "Package",
+    "PluginTimeoutError",
+    "SuspendedPluginError",
     "UnknownPluginError",
+    "preload",
 ]
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from logging import getLogger
+from typing import Dict, Optional, TypedDict, Union
+
+from ._types import Plugin
+
+LOG = getLogger(__name__)
+
+
+class FailureRecord(TypedDict):
+    failures: int
+    """The number of consecutive times the plugin failed to load."""
+
+    until: float
+    """Time (seconds since the epoch) until which the plugin is skipped."""
+
+    error: str
+    """A description of the most recent error."""
+
+
+class SuspendedPluginError(RuntimeError):
+    """Raised when a plugin is skipped because it recently failed to load."""
+
+    def __init__(self, plugin: Plugin, record: FailureRecord) -> None:
+        super().__init__(
+            f"Plugin failed to load {record['failures']} time(s) and is "
+            f"suspended for {max(record['until'] - time.time(), 0):.0f}s "
+            f"(last error: {record['error']}): {plugin}"
+        )
+        self.plugin = plugin
+        self.record = record
+
+
+class FailurePolicy:
+    """
+    Remember plugins which fail to load, so that they can be skipped for
+    a while instead of paying for the failed import every time.
+
+    A failing plugin is suspended for `backoff` seconds after its first
+    failure. Every consecutive failure doubles this period, up to
+    `max_backoff` seconds. A successful load clears the plugin's record.
+
+    Records are keyed by the plugin's id together with the id and
+    version of its package, so upgrading a package lifts the suspension
+    of its plugins.
+
+    The policy can be given to a [`Hook`][grappler.Hook], which will then
+    skip failing plugins instead of raising their errors, or it can be
+    used to filter plugins from any grappler with
+    [`CircuitBreakerGrappler`][grappler.grapplers.CircuitBreakerGrappler].
+
+    Args:
+        backoff: Number of seconds to skip a plugin after it first fails.
+        max_backoff: The longest period (in seconds) that a plugin can
+                     be skipped for.
+        path: When given, failure records are persisted to (and read
+              from) a JSON file at this path, allowing them to be shared
+              across processes and restarts.
+
+    Usage:
+    ```python
+    from grappler import FailurePolicy, Hook
+
+    policy = FailurePolicy(backoff=60, path="/var/cache/app/plugin-failures.json")
+    hook = Hook("app.formatters", failure_policy=policy)
+    ```
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        *,
+        backoff: float = 300.0,
+        max_backoff: float = 86400.0,
+        path: Optional[Union[str, "os.PathLike[str]"]] = None,
+    ) -> None:
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.path = None if path is None else os.fspath(path)
+        self._records: Dict[str, FailureRecord] = {}
+        self._records_mtime: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def check(self, plugin: Plugin) -> None:
+        """Raise a [`SuspendedPluginError`][grappler.SuspendedPluginError]
+        if the plugin is currently suspended."""
+        record = self.get_record(plugin)
+
+        if record is not None and record["until"] > time.time():
+            raise SuspendedPluginError(plugin, record)
+
+    def is_suspended(self, plugin: Plugin) -> bool:
+        """Return whether the plugin should currently be skipped."""
+        record = self.get_record(plugin)
+        return record is not None and record["until"] > time.time()
+
+    def get_record(self, plugin: Plugin) -> Optional[FailureRecord]:
+        """Return the failure record of a plugin, if there is one."""
+        with self._lock:
+            self._read()
+            return self._records.get(self._key(plugin))
+
+    def record_failure(self, plugin: Plugin, error: BaseException) -> None:
+        """Record that loading a plugin failed, and suspend it."""
+        with self._lock:
+            self._read()
+            key = self._key(plugin)
+            failures = self._records[key]["failures"] + 1 if key in self._records else 1
+            backoff = min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+            self._records[key] = FailureRecord(
+                failures=failures,
+                until=time.time() + backoff,
+                error=f"{type(error).__name__}: {error}",
+            )
+            self._write()
+
+    def record_success(self, plugin: Plugin) -> None:
+        """Record that a plugin was loaded, clearing its failure record."""
+        with self._lock:
+            self._read()
+            if self._records.pop(self._key(plugin), None) is not None:
+                self._write()
+
+    def reset(self) -> None:
+        """Forget all failure records."""
+        with self._lock:
+            self._records = {}
+            self._write()
+
+    @staticmethod
+    def _key(plugin: Plugin) -> str:
+        package = plugin.package
+        return f"{package.id}=={package.version}:{plugin.plugin_id}"
+
+    def _read(self) -> None:
+        if self.path is None:
+            return
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._records, self._records_mtime = {}, None
+            return
+
+        if mtime != self._records_mtime:
+            with open(self.path, encoding="utf-8") as f:
+                try:
+                    self._records = json.load(f)
+                except ValueError:
+                    LOG.warning(f"Ignoring unreadable failure records: {self.path}")
+                    self._records = {}
+            self._records_mtime = mtime
+
+    def _write(self) -> None:
+        if self.path is None:
+            return
+
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._records, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._records_mtime = os.stat(self.path).st_mtime_ns
@@ -1,22 +1,39 @@
+import gc
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from functools import cached_property
+from logging import getLogger
 from typing import (
     Any,
+    Callable,
     Collection,
+    Dict,
     Generator,
     Generic,
+    Iterable,
     Iterator,
+    List,
+    Mapping,
     Optional,
     Set,
+    Tuple,
     TypeVar,
+    cast,
     get_args,
 )
 
 from typing_extensions import TypeGuard
 
-from ._types import Grappler, Plugin
+from ._failure import FailurePolicy, SuspendedPluginError
+from ._types import Grappler, Plugin, PluginTimeoutError, UnknownPluginError
 from .grapplers import EntryPointGrappler
+from .grapplers._bouncer import ForbiddenPluginError, InvalidConfigurationError
 
 T = TypeVar("T")
+R = TypeVar("R")
+LOG = getLogger(__name__)
 
 
 class Hook(Generic[T]):
@@ -52,6 +69,37 @@ class Hook(Generic[T]):
                   [Customising Loading](../user-guide.md#customising-loading-with-grapplers)
                   section of the user guide, which gives an explanation of how
                   to setup a grappler for more complex loading behavior.
+        load_timeout: When given, the maximum number of seconds to wait for
+                      each plugin to load. Plugins which take longer are
+                      skipped.
+        deadline: When given, the maximum number of seconds that loading
+                  plugins may take in total, per iteration. Once the
+                  deadline has passed, all remaining plugins are skipped.
+        capabilities: When given, the hook only loads plugins which declare
+                      all of these
+                      [capabilities][grappler.Plugin.capabilities].
+                      Plugins without them are skipped before they are
+                      loaded (unlike the filtering done by the hook's type
+                      argument, which happens after loading).
+        failure_policy: When given, a
+                        [`FailurePolicy`][grappler.FailurePolicy] which
+                        records plugins that raise an exception while
+                        loading. Instead of propagating the exception,
+                        the hook skips the plugin, and it will continue
+                        to skip the plugin (without attempting to load
+                        it) until the policy's backoff period has passed.
+                        Errors which don't come from the plugin (e.g. a
+                        bouncer forbidding it from loading) are not
+                        recorded, and are still propagated.
+
+    Important: Skipped plugins are not interrupted
+        When either `load_timeout` or `deadline` is given, each plugin
+        is loaded on a separate (daemon) thread. A plugin which exceeds
+        its time budget is skipped, but Python cannot interrupt it, so it
+        will continue loading in the background. Skipped plugins are
+        logged, and reported by
+        [`skipped_plugins`][grappler.Hook.skipped_plugins].
+        The time taken to find plugins is not limited.
 
     Usage:
     ```python
@@ -76,20 +124,93 @@ class Hook(Generic[T]):
 
     ```
 
+    ```python
+    # start loading plugins in the background while the application
+    # finishes starting up; iterating later reuses the loaded objects.
+    hook = Hook("topic.counter-functions")
+    hook.prefetch()
+    ...
+    objs = list(hook)
+    ```
+
     """  # noqa
 
-    def __init__(self, topic: str, *, grappler: Optional[Grappler] = None) -> None:
+    def __init__(
+        self,
+        topic: str,
+        *,
+        grappler: Optional[Grappler] = None,
+        load_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        capabilities: Collection[str] = (),
+        failure_policy: Optional[FailurePolicy] = None,
+    ) -> None:
         self.topic = topic
         self.grappler = grappler or EntryPointGrappler()
+        self.load_timeout = load_timeout
+        self.deadline = deadline
+        self.capabilities = frozenset(capabilities)
+        self.failure_policy = failure_policy
         self._loaded: Set[Plugin] = set()
+        self._skipped: Dict[Plugin, Exception] = {}
+        self._prefetched: Optional[_Prefetch] = None
+        self._prefetch_lock = threading.Lock()
 
     def __iter__(self) -> Iterator[T]:
         """Return an iterator to loaded plugin objects from the hook's topic.
 
         If the hook was instantiated with a type argument, then only objects
         which pass `isinstance(obj, T)` are included in the iterator.
+
+        If [`prefetch()`][grappler.Hook.prefetch] was called, then the
+        prefetched objects are iterated instead of finding plugins again,
+        waiting on the background load where it has not yet finished.
+        """
+        prefetched = self._prefetched
+
+        if prefetched is not None:
+            return self._iter_pairs(prefetched)
+        else:
+            return self._iter_grappler(self.grappler)
+
+    def prefetch(self, *, wait: bool = False) -> None:
+        """Start finding and loading the hook's plugins on a background thread.
+
+        Every later iteration of the hook reuses the objects loaded by
+        the background thread, instead of finding plugins again. An
+        iteration that starts before the background load is finished
+        yields objects as soon as they are loaded. If loading raised an
+        exception, it is re-raised by the iteration once the objects
+        loaded before the failure have been yielded.
+
+        Calling this again while objects are prefetched does nothing; use
+        [`discard_prefetched()`][grappler.Hook.discard_prefetched] in
+        order to find plugins afresh.
+
+        Args:
+            wait: When `True`, block until the background load is finished.
+                  An exception raised while loading is then re-raised here.
+        """
+        with self._prefetch_lock:
+            if self._prefetched is None:
+                self._prefetched = _Prefetch(
+                    self._load_plugins(self.grappler),
+                    name=f"grappler-prefetch({self.topic})",
+                )
+            prefetched = self._prefetched
+
+        if wait:
+            prefetched.wait()
+
+    def discard_prefetched(self) -> None:
+        """Forget prefetched objects, so that the next iteration finds
+        plugins again.
+
+        A background load which is still in progress runs to completion,
+        but its results are not used by the hook.
         """
-        return self._iter_grappler(self.grappler)
+        with self._prefetch_lock:
+            self._prefetched = None
 
     @property
     def loaded_plugins(self) -> Collection[Plugin]:
@@ -99,20 +220,108 @@ class Hook(Generic[T]):
         """
         return list(self._loaded)
 
+    @property
+    def skipped_plugins(self) -> Mapping[Plugin, Exception]:
+        """
+        Return a mapping of plugins which the hook has skipped, to the
+        error explaining why each was skipped.
+
+        A plugin is removed from this mapping once it is loaded successfully.
+        """
+        return dict(self._skipped)
+
     def can_support(self, plugin: Plugin) -> bool:
-        return self.topic in plugin.topics
+        return self.topic in plugin.topics and self.capabilities.issubset(
+            plugin.capabilities
+        )
 
     def _iter_grappler(self, grappler: Grappler) -> Generator[T, None, None]:
+        return self._iter_pairs(self._load_plugins(grappler))
+
+    def _iter_pairs(
+        self, pairs: Iterable[Tuple[Plugin, Any]]
+    ) -> Generator[T, None, None]:
+        for _, loaded_obj in pairs:
+            if self.__is_valid_instance(loaded_obj):
+                yield loaded_obj
+
+    def _load_plugins(
+        self, grappler: Grappler
+    ) -> Generator[Tuple[Plugin, Any], None, None]:
+        deadline = None if self.deadline is None else time.monotonic() + self.deadline
+        policy = self.failure_policy
+
         with grappler.find(self.topic) as plugins:
             for plugin in plugins:
                 if not self.can_support(plugin):
                     continue
 
-                loaded_obj = grappler.load(plugin)
+                try:
+                    if policy is not None:
+                        policy.check(plugin)
+                    loaded_obj = self._load_plugin(grappler, plugin, deadline)
+                except (PluginTimeoutError, SuspendedPluginError) as e:
+                    self._skip(plugin, e)
+                    continue
+                except (
+                    ForbiddenPluginError,
+                    InvalidConfigurationError,
+                    UnknownPluginError,
+                ):
+                    # not failures of the plugin, so they aren't recorded
+                    raise
+                except Exception as e:
+                    if policy is None:
+                        raise
+                    policy.record_failure(plugin, e)
+                    self._skip(plugin, e)
+                    continue
+
+                if policy is not None:
+                    policy.record_success(plugin)
+
+                self._skipped.pop(plugin, None)
                 self._loaded.add(plugin)
+                yield plugin, loaded_obj
+
+    def _skip(self, plugin: Plugin, error: Exception) -> None:
+        LOG.warning(f"Skipping plugin {repr(plugin.plugin_id)}: {error!r}")
+        self._skipped[plugin] = error
+
+    def _load_plugin(
+        self, grappler: Grappler, plugin: Plugin, deadline: Optional[float]
+    ) -> Any:
+        wait = self.load_timeout
+        timeout = self.load_timeout
+        reason = "Plugin took too long to load"
+
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            timeout = self.deadline
+
+            if remaining <= 0:
+                raise PluginTimeoutError(
+                    plugin,
+                    cast(float, timeout),
+                    "Hook deadline passed before the plugin could be loaded",
+                )
+            elif wait is None or remaining <= wait:
+                wait = remaining
+                reason = "Hook deadline passed while the plugin was loading"
+            else:
+                timeout = self.load_timeout
 
-                if self.__is_valid_instance(loaded_obj):
-                    yield loaded_obj
+        if wait is None:
+            return grappler.load(plugin)
+
+        future = _call_in_thread(
+            grappler.load, plugin, name=f"grappler-load({plugin.plugin_id})"
+        )
+
+        try:
+            return future.result(wait)
+        except FutureTimeoutError:
+            raise PluginTimeoutError(plugin, cast(float, timeout), reason) from None
 
     def __is_valid_instance(self, value: Any) -> TypeGuard[T]:
         return True if self._type_arg is None else isinstance(value, self._type_arg)
@@ -127,3 +336,114 @@ class Hook(Generic[T]):
 
         else:
             return args[0]
+
+
+def preload(*hooks: Hook[Any], freeze: bool = True) -> None:
+    """Find and load plugins for several hooks, ahead of forking.
+
+    This is intended to be called in the parent process of a pre-forking
+    server (e.g. gunicorn with `preload_app`, or uwsgi without `lazy-apps`),
+    before worker processes are forked. Each hook is
+    [prefetched][grappler.Hook.prefetch] (concurrently), and this function
+    blocks until all of them are fully loaded. The hooks can then be
+    iterated in forked child processes without finding or importing
+    plugins again, and the imported plugin code is shared between the
+    processes.
+
+    Args:
+        hooks: The hooks to load plugins for.
+        freeze: When `True` (and supported by the interpreter), call
+                `gc.freeze()` once loading is finished. This moves every
+                object tracked by the garbage collector into a permanent
+                generation, so that collections in child processes will
+                not write to (and so copy) memory pages shared with the
+                parent.
+
+    Any exception raised while loading one of the hooks is re-raised.
+
+    Usage:
+    ```python
+    from grappler import Hook, preload
+
+    formatters = Hook("app.formatters")
+    exporters = Hook("app.exporters")
+
+    # e.g. in a gunicorn config module, with preload_app = True
+    preload(formatters, exporters)
+    ```
+    """
+    for hook in hooks:
+        hook.prefetch()
+
+    for hook in hooks:
+        hook.prefetch(wait=True)
+
+    if freeze and hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+def _call_in_thread(
+    func: Callable[[Plugin], R], plugin: Plugin, *, name: str
+) -> "Future[R]":
+    future: "Future[R]" = Future()
+
+    def run() -> None:
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(func(plugin))
+            except Exception as e:
+                future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+class _Prefetch:
+    """(plugin, object) pairs which are loaded on a background thread."""
+
+    def __init__(self, pairs: Iterator[Tuple[Plugin, Any]], *, name: str) -> None:
+        self._items: List[Tuple[Plugin, Any]] = []
+        self._error: Optional[Exception] = None
+        self._done = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, args=(pairs,), name=name, daemon=True
+        )
+        self._thread.start()
+
+    def __iter__(self) -> Iterator[Tuple[Plugin, Any]]:
+        index = 0
+
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self._items) or self._done)
+
+                if index >= len(self._items):
+                    if self._error is not None:
+                        raise self._error
+                    return
+
+                item = self._items[index]
+
+            index += 1
+            yield item
+
+    def wait(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._done)
+
+        if self._error is not None:
+            raise self._error
+
+    def _run(self, pairs: Iterator[Tuple[Plugin, Any]]) -> None:
+        try:
+            for pair in pairs:
+                with self._condition:
+                    self._items.append(pair)
+                    self._condition.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
@@ -54,6 +54,12 @@ class Plugin:
     name: Optional[str]
     """A name for the plugin which may be displayed to a human."""
 
+    capabilities: Tuple[str, ...] = ()
+    """A tuple of capabilities that the plugin declares in its metadata
+    (e.g. the protocols implemented by the plugin object), which can be
+    used to filter plugins without loading them. See
+    [Declaring Capabilities](../user-guide.md#declaring-capabilities)."""
+
 
 class Grappler(Protocol):
     """General protocol for an object that can find and load plugins."""
@@ -94,3 +100,12 @@ class UnknownPluginError(LookupError):
         )
         self.plugin = plugin
         self.grappler = grappler
+
+
+class PluginTimeoutError(TimeoutError):
+    """Raised when a plugin could not be loaded within the allowed time."""
+
+    def __init__(self, plugin: Plugin, timeout: float, reason: str) -> None:
+        super().__init__(f"{reason} (timeout={timeout}s): {plugin}")
+        self.plugin = plugin
+        self.timeout = timeout
@@ -5,18 +5,55 @@ that are provided with the package.
 """
 
 from ._bouncer import BouncerGrappler
+from ._circuit_breaker import CircuitBreakerGrappler
 from ._composite import CompositeGrappler
+from ._directory import DirectoryGrappler
 from ._entry_point import EntryPointGrappler
-from ._list import BlacklistingGrappler, PackageSpec, PluginSpec, WhitelistingGrappler
+from ._handle import PluginHandle
+from ._id_table import IdTable, InvalidIdTableError, write_id_table
+from ._instrument import LayerReport
+from ._list import (
+    BlacklistingGrappler,
+    PackageSpec,
+    PluginSpec,
+    WhitelistingGrappler,
+    glob_pattern,
+)
+from ._manifest import (
+    InvalidManifestError,
+    ManifestGrappler,
+    StaleManifestError,
+    write_manifest,
+)
+from ._query import Query
+from ._registry import InvalidRegistryError, RegistryGrappler, write_registry
 from ._static import StaticGrappler
+from ._wheel import WheelGrappler
 
 __all__ = [
     "BlacklistingGrappler",
     "BouncerGrappler",
+    "CircuitBreakerGrappler",
     "CompositeGrappler",
+    "DirectoryGrappler",
     "EntryPointGrappler",
+    "IdTable",
+    "InvalidIdTableError",
+    "InvalidManifestError",
+    "InvalidRegistryError",
+    "LayerReport",
+    "ManifestGrappler",
     "PackageSpec",
+    "PluginHandle",
     "PluginSpec",
+    "Query",
+    "RegistryGrappler",
+    "StaleManifestError",
     "StaticGrappler",
+    "WheelGrappler",
     "WhitelistingGrappler",
+    "glob_pattern",
+    "write_id_table",
+    "write_manifest",
+    "write_registry",
 ]
@@ -1,27 +1,44 @@
+import itertools
+import threading
 from contextlib import ExitStack
+from dataclasses import dataclass
 from enum import Enum
 from logging import getLogger
+from time import perf_counter
 from typing import (
     Any,
     Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
     Iterator,
     List,
     Literal,
     Optional,
     Protocol,
+    Sequence,
+    Set,
     Tuple,
     TypedDict,
     TypeVar,
     Union,
+    cast,
     overload,
 )
 
 from grappler import Grappler, Plugin
 
+from ._query import Query
 from .bases import PluginPairGrapplerBase
+from .bases._basic import BasicPlugin
 
 LOG = getLogger(__name__)
+# number of times that checks are run between each reordering
+_REORDER_INTERVAL = 100
 F_Checker = TypeVar("F_Checker", bound="BounceCheck")
+F_BatchChecker = TypeVar("F_BatchChecker", bound="BatchBounceCheck")
+F_Bouncer = TypeVar("F_Bouncer", bound="BouncerGrappler")
 
 
 class InvalidConfigurationError(TypeError):
@@ -54,7 +71,120 @@ class BounceCheck(Protocol):
         """Return whether this plugin should be bounced."""
 
 
+class BatchBounceCheck(Protocol):
+    """A callable that is used to determine which of several plugins should
+    be bounced at once.
+
+    It receives a sequence of plugins, and must return a sequence of the same
+    length, which is `True` for every plugin that is allowed.
+    """
+
+    def __call__(self, plugins: Sequence[Plugin], /) -> Sequence[bool]:
+        """Return whether each of the plugins is allowed."""
+
+
 Checks = TypedDict("Checks", {"find": List[BounceCheck], "load": List[BounceCheck]})
+BatchChecks = TypedDict(
+    "BatchChecks", {"find": List[BatchBounceCheck], "load": List[BatchBounceCheck]}
+)
+
+
+class _Batching:
+    # the batch checks, and the size of the batches of plugins that they
+    # are given; shared between a bouncer and its rewrapped copies.
+    def __init__(self) -> None:
+        self.checks = BatchChecks(find=[], load=[])
+        self.size = 64
+
+
+class _Decisions:
+    # remembered results of the bounce checks, shared between a bouncer and
+    # its rewrapped copies. Decisions are only valid for the configuration
+    # (identified by `version`) that they were made with.
+    def __init__(self) -> None:
+        self.enabled = False
+        self.version = 0
+        self._cache: Dict[Tuple[str, Plugin], bool] = {}
+        self._cached_version: Hashable = None
+        self._lock = threading.Lock()
+
+    def get(self, version: Hashable, key: Tuple[str, Plugin]) -> Optional[bool]:
+        if version != self._cached_version:
+            with self._lock:
+                self._cache = {}
+                self._cached_version = version
+            return None
+
+        return self._cache.get(key)
+
+    def set(self, version: Hashable, key: Tuple[str, Plugin], allowed: bool) -> None:
+        with self._lock:
+            if version == self._cached_version:
+                self._cache[key] = allowed
+
+
+class _CheckStats:
+    # measurements of the bounce checks, used to run them in the order that
+    # is expected to be cheapest; shared between a bouncer and its
+    # rewrapped copies.
+    def __init__(self) -> None:
+        self.enabled = False
+        self.fixed: Set[int] = set()
+        self.calls: Dict[int, int] = {}
+        self.rejections: Dict[int, int] = {}
+        self.time: Dict[int, float] = {}
+        self._orders: Dict[str, Tuple[int, Sequence[BounceCheck]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, check: BounceCheck, allowed: bool, elapsed: float) -> None:
+        key = id(check)
+
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.rejections[key] = self.rejections.get(key, 0) + (not allowed)
+            self.time[key] = self.time.get(key, 0.0) + elapsed
+
+    def order(self, mode: str, checks: List[BounceCheck]) -> Sequence[BounceCheck]:
+        countdown, ordered = self._orders.get(mode, (0, ()))
+
+        if countdown <= 0 or len(ordered) != len(checks):
+            ordered = self._reorder(checks)
+            countdown = _REORDER_INTERVAL
+
+        self._orders[mode] = (countdown - 1, ordered)
+        return ordered
+
+    def discard_orders(self) -> None:
+        self._orders = {}
+
+    def _reorder(self, checks: List[BounceCheck]) -> List[BounceCheck]:
+        # Checks are sorted (between fixed checks) by their cost divided by
+        # their rejection rate, which minimises the expected cost of
+        # rejecting a plugin. Checks that haven't run yet go first, so that
+        # they get measured.
+        ordered: List[BounceCheck] = []
+        movable: List[BounceCheck] = []
+
+        for check in checks:
+            if id(check) in self.fixed:
+                ordered.extend(sorted(movable, key=self._rank))
+                ordered.append(check)
+                movable = []
+            else:
+                movable.append(check)
+
+        ordered.extend(sorted(movable, key=self._rank))
+        return ordered
+
+    def _rank(self, check: BounceCheck) -> float:
+        key = id(check)
+        calls = self.calls.get(key, 0)
+
+        if not calls:
+            return 0.0
+
+        rejection_rate = (self.rejections.get(key, 0) + 1) / (calls + 2)
+        return self.time.get(key, 0.0) / calls / rejection_rate
 
 
 class BouncerGrappler(PluginPairGrapplerBase[None]):
@@ -82,16 +212,189 @@ class BouncerGrappler(PluginPairGrapplerBase[None]):
 
         BOTH = "both"
 
+    @dataclass(frozen=True)
+    class CheckStats:
+        """Measurements of a checker function, gathered while the bouncer
+        [orders its checks adaptively][grappler.grapplers.BouncerGrappler.adapt_check_order].
+        """  # noqa: E501
+
+        check: "BounceCheck"
+        """The checker function."""
+
+        mode: Literal["find", "load"]
+        """The operation that the checker function is used for."""
+
+        fixed: bool
+        """Whether the checker function keeps its place in the order."""
+
+        calls: int
+        """The number of times that the checker function was called."""
+
+        rejections: int
+        """The number of plugins that the checker function blocked."""
+
+        time: float
+        """The total time (in seconds) spent in the checker function."""
+
     def __init__(self, inner: Optional[Grappler] = None) -> None:
         self.wrapped = inner
         self._checks = Checks(find=[], load=[])
+        self._decisions = _Decisions()
+        self._stats = _CheckStats()
+        self._batching = _Batching()
+        self._queries: List[Query] = []
+        self._loading_many = threading.local()
 
     def rewrap(self, grappler: Grappler, /) -> "BouncerGrappler":
-        bouncer = BouncerGrappler(grappler)
-        bouncer._checks = Checks(find=self._checks["find"], load=self._checks["load"])
-        return bouncer
+        return self._share_config(BouncerGrappler(grappler))
+
+    def _share_config(self, other: F_Bouncer) -> F_Bouncer:
+        # the checks (and their decisions) are shared, so that checks added
+        # later also apply to rewrapped copies.
+        other._checks = Checks(find=self._checks["find"], load=self._checks["load"])
+        other._decisions = self._decisions
+        other._stats = self._stats
+        other._batching = self._batching
+        other._queries = self._queries
+        return other
+
+    def cache_decisions(self, enabled: bool = True, /) -> None:
+        """Remember which plugins were allowed or blocked by the checks.
+
+        When enabled, the checks are only run the first time that a plugin
+        is found (or loaded), and their decision is reused for every later
+        find (or load), including through rewrapped copies of the bouncer,
+        e.g. when the bouncer is a wrapper of a
+        [`CompositeGrappler`][grappler.grapplers.CompositeGrappler].
+        Remembered decisions are discarded whenever a checker is added.
+
+        Only enable this when the checks depend on nothing but the plugin
+        that they are given.
+        """
+        self._decisions.enabled = enabled
+        self._decisions.version += 1
+
+    def adapt_check_order(self, enabled: bool = True, /) -> None:
+        """Run the checks in the order which is expected to be the cheapest.
+
+        Checks are normally run in the order they were added in, until one
+        of them blocks the plugin. When enabled, the time spent in every
+        check and the number of plugins it blocks are measured instead, and
+        the checks are periodically reordered, so that cheap checks which
+        block many plugins are run before expensive checks which block few.
+
+        Checks which must run in the order they were added in (e.g. because
+        they rely on an earlier check having allowed the plugin) should be
+        added with `fixed=True`; other checks are never moved past them.
+
+        The measurements are available from
+        [`check_stats()`][grappler.grapplers.BouncerGrappler.check_stats].
+        """
+        self._stats.enabled = enabled
+        self._stats.discard_orders()
+
+    def check_stats(self) -> List["BouncerGrappler.CheckStats"]:
+        """Return the measurements of every checker function, in the
+        order that they were added in (checks for finding first)."""
+        stats = self._stats
+        modes: Tuple[Literal["find", "load"], ...] = ("find", "load")
+        return [
+            self.CheckStats(
+                check=check,
+                mode=mode,
+                fixed=id(check) in stats.fixed,
+                calls=stats.calls.get(id(check), 0),
+                rejections=stats.rejections.get(id(check), 0),
+                time=stats.time.get(id(check), 0.0),
+            )
+            for mode in modes
+            for check in self._checks[mode]
+        ]
+
+    def _decision_version(self) -> Hashable:
+        # identifies the configuration that the checks' decisions depend on
+        return self._decisions.version
 
     def _is_allowed(self, plugin: Plugin, *, mode: Literal["find", "load"]) -> bool:
+        if self._batching.checks[mode]:
+            return self._allowed_mask([plugin], mode=mode)[0]
+
+        decisions = self._decisions
+
+        if not decisions.enabled:
+            return self._run_checks(plugin, mode=mode)
+
+        version = self._decision_version()
+        key = self._decision_key(plugin, mode)
+        allowed = decisions.get(version, key)
+
+        if allowed is None:
+            allowed = self._run_checks(plugin, mode=mode)
+            decisions.set(version, key, allowed)
+
+        return allowed
+
+    def _allowed_mask(
+        self, plugins: Sequence[Plugin], *, mode: Literal["find", "load"]
+    ) -> List[bool]:
+        # Plugins are checked individually first, and then those that
+        # are still allowed are passed to each batch check in turn.
+        decisions = self._decisions
+        version = self._decision_version() if decisions.enabled else None
+        mask: List[Optional[bool]] = [None] * len(plugins)
+        computed: List[int] = []
+        pending: List[int] = []
+
+        for i, plugin in enumerate(plugins):
+            if decisions.enabled:
+                mask[i] = decisions.get(version, self._decision_key(plugin, mode))
+
+            if mask[i] is None:
+                computed.append(i)
+
+                if self._run_checks(plugin, mode=mode):
+                    pending.append(i)
+                else:
+                    mask[i] = False
+
+        for batch_check in self._batching.checks[mode]:
+            if not pending:
+                break
+
+            results = batch_check([plugins[i] for i in pending])
+
+            if len(results) != len(pending):
+                raise ValueError(
+                    f"Batch check returned {len(results)} results for "
+                    f"{len(pending)} plugins: {batch_check}"
+                )
+
+            for i, allowed in zip(pending, results):
+                if not allowed:
+                    LOG.debug(f"{plugins[i]} rejected by batch check: {batch_check}")
+                    mask[i] = False
+
+            pending = [i for i in pending if mask[i] is None]
+
+        for i in pending:
+            mask[i] = True
+
+        if decisions.enabled:
+            for i in computed:
+                decisions.set(
+                    version, self._decision_key(plugins[i], mode), bool(mask[i])
+                )
+
+        return cast(List[bool], mask)
+
+    @staticmethod
+    def _decision_key(plugin: Plugin, mode: str) -> Tuple[str, Plugin]:
+        return (mode, plugin.as_plugin() if isinstance(plugin, BasicPlugin) else plugin)
+
+    def _run_checks(self, plugin: Plugin, *, mode: Literal["find", "load"]) -> bool:
+        if self._stats.enabled:
+            return self._run_measured_checks(plugin, mode=mode)
+
         for bounce_check in self._checks[mode]:
             if not bounce_check(plugin):
                 LOG.debug(f"{plugin} rejected by bounce check: {bounce_check}")
@@ -99,6 +402,22 @@ class BouncerGrappler(PluginPairGrapplerBase[None]):
         else:
             return True
 
+    def _run_measured_checks(
+        self, plugin: Plugin, *, mode: Literal["find", "load"]
+    ) -> bool:
+        stats = self._stats
+
+        for bounce_check in stats.order(mode, self._checks[mode]):
+            start = perf_counter()
+            allowed = bounce_check(plugin)
+            stats.record(bounce_check, allowed, perf_counter() - start)
+
+            if not allowed:
+                LOG.debug(f"{plugin} rejected by bounce check: {bounce_check}")
+                return False
+        else:
+            return True
+
     def iter_plugins(
         self, topic: Optional[str], exit_stack: ExitStack, /
     ) -> Iterator[Tuple[Plugin, None]]:
@@ -109,30 +428,150 @@ class BouncerGrappler(PluginPairGrapplerBase[None]):
             return iter([])
         else:
             plugins = exit_stack.enter_context(self.wrapped.find(topic))
+
+            if self._batching.checks["find"]:
+                return self._iter_batches(plugins)
+
             return (
                 (plugin, None)
                 for plugin in plugins
                 if self._is_allowed(plugin, mode="find")
             )
 
+    def _iter_batches(self, plugins: Iterator[Plugin]) -> Iterator[Tuple[Plugin, None]]:
+        while True:
+            batch = list(itertools.islice(plugins, self._batching.size))
+
+            if not batch:
+                return
+
+            for plugin, allowed in zip(batch, self._allowed_mask(batch, mode="find")):
+                if allowed:
+                    yield (plugin, None)
+
     def load_with_pair(self, plugin: Plugin, _: None, /) -> Any:
         if not self.wrapped:
             raise InvalidConfigurationError(self)
-        elif not self._is_allowed(plugin, mode="load"):
+        elif not (
+            getattr(self._loading_many, "checked", False)
+            or self._is_allowed(plugin, mode="load")
+        ):
             raise ForbiddenPluginError(plugin, self)
         else:
             return self.wrapped.load(plugin)
 
+    def load_many(self, plugins: Iterable[Plugin], /) -> List[Any]:
+        """Load several plugins found by the bouncer.
+
+        This is equivalent to loading each of the plugins in turn, except
+        that the checks for loading are run on all of the plugins before any
+        of them is loaded, so that every batch check is only called once.
+
+        This only applies to a bouncer which is used on its own. The
+        bouncers which wrap a
+        [`CompositeGrappler`][grappler.grapplers.CompositeGrappler] are
+        copies of the configured ones, and the plugins that it finds must
+        be loaded through it, one at a time (as a
+        [`Hook`][grappler.Hook] does), so their batch checks are given
+        a single plugin.
+
+        Raises:
+            ForbiddenPluginError: When any of the plugins is blocked from
+                                  loading. No plugin is loaded in that case.
+        """
+        plugins = list(plugins)
+        mask = self._allowed_mask(
+            [BasicPlugin.devolve(plugin) for plugin in plugins], mode="load"
+        )
+
+        for plugin, allowed in zip(plugins, mask):
+            if not allowed:
+                raise ForbiddenPluginError(plugin, self)
+
+        self._loading_many.checked = True
+
+        try:
+            return [self.load(plugin) for plugin in plugins]
+        finally:
+            self._loading_many.checked = False
+
+    def batch_checker(
+        self, checker: F_BatchChecker, /, *, mode: Mode = Mode.BOTH
+    ) -> F_BatchChecker:
+        """Register a checker function which checks several plugins at once.
+
+        Batch checker functions are given a sequence of plugins (which passed
+        every other checker function), and return a sequence of the same
+        length which is `True` for every plugin that is allowed. This allows
+        checks which have a cost for every call (e.g. a request to a
+        service) to be made once per batch instead of once per plugin.
+
+        While finding plugins, the plugins from the inner grappler are
+        buffered until a batch is complete (see
+        [`set_batch_size()`][grappler.grapplers.BouncerGrappler.set_batch_size]),
+        so plugins are iterated in bursts. While loading plugins, batch
+        checker functions are given a single plugin, unless the plugins are
+        loaded together with
+        [`load_many()`][grappler.grapplers.BouncerGrappler.load_many]
+        from a bouncer which is used on its own (not as a wrapper of a
+        [`CompositeGrappler`][grappler.grapplers.CompositeGrappler]).
+        """  # noqa: E501
+        if mode not in (self.Mode.FIND, self.Mode.LOAD, self.Mode.BOTH):
+            raise ValueError(f"Invalid check mode: {mode}")
+
+        self._decisions.version += 1
+
+        if mode in (self.Mode.FIND, self.Mode.BOTH):
+            self._batching.checks["find"].append(checker)
+        if mode in (self.Mode.LOAD, self.Mode.BOTH):
+            self._batching.checks["load"].append(checker)
+
+        return checker
+
+    def query(self, query: Query, /) -> None:
+        """Only find plugins which match a [query][grappler.grapplers.Query].
+
+        This has the same effect as a checker function for finding which
+        calls `query.matches()`, except that the query can be pushed down to
+        the sources of a
+        [`CompositeGrappler`][grappler.grapplers.CompositeGrappler] that
+        the bouncer wraps, so that the plugins it excludes are skipped
+        before they are built.
+        """
+        self._queries.append(query)
+        self.checker(query.matches, mode=self.Mode.FIND)
+
+    def queries(self) -> Collection[Query]:
+        """Return the queries which every plugin found by the bouncer
+        matches."""
+        return tuple(self._queries)
+
+    def set_batch_size(self, size: int, /) -> None:
+        """Set the number of plugins given to batch checker functions at
+        once while finding plugins (default: 64)."""
+        if size < 1:
+            raise ValueError("The batch size must be at least 1.")
+
+        self._batching.size = size
+
     @overload
-    def checker(self, checker: F_Checker, /, *, mode: Mode = Mode.BOTH) -> F_Checker:
+    def checker(
+        self, checker: F_Checker, /, *, mode: Mode = Mode.BOTH, fixed: bool = False
+    ) -> F_Checker:
         ...
 
     @overload
-    def checker(self, *, mode: Mode) -> Callable[[F_Checker], F_Checker]:
+    def checker(
+        self, *, mode: Mode, fixed: bool = False
+    ) -> Callable[[F_Checker], F_Checker]:
         ...
 
     def checker(
-        self, checker: Optional[F_Checker] = None, *, mode: Mode = Mode.BOTH
+        self,
+        checker: Optional[F_Checker] = None,
+        *,
+        mode: Mode = Mode.BOTH,
+        fixed: bool = False,
     ) -> Union[F_Checker, Callable[[F_Checker], F_Checker]]:
         """Register a checker function for the bouncer.
 
@@ -153,9 +592,18 @@ class BouncerGrappler(PluginPairGrapplerBase[None]):
             ...
         bouncer.checker(check_during_find_only, mode=bouncer.Mode.FIND)
         ```
-        """
+
+        `fixed` keeps the checker function in its place when the bouncer
+        [orders its checks adaptively][grappler.grapplers.BouncerGrappler.adapt_check_order].
+        """  # noqa: E501
 
         def decorate(f: F_Checker) -> F_Checker:
+            self._decisions.version += 1
+            self._stats.discard_orders()
+
+            if fixed:
+                self._stats.fixed.add(id(f))
+
             if mode in (self.Mode.FIND, self.Mode.BOTH):
                 self._checks["find"].append(f)
             elif mode in (self.Mode.LOAD, self.Mode.BOTH):
@@ -0,0 +1,72 @@
+from contextlib import ExitStack
+from typing import Any, Iterator, Optional, Tuple
+
+from grappler import FailurePolicy, Grappler, Plugin, UnknownPluginError
+
+from ._bouncer import (
+    BouncerGrappler,
+    ForbiddenPluginError,
+    InvalidConfigurationError,
+)
+
+
+class CircuitBreakerGrappler(BouncerGrappler):
+    """
+    A grappler which skips plugins that recently failed to load.
+
+    When loading a plugin from the inner grappler raises an exception,
+    the failure is recorded with a [`FailurePolicy`][grappler.FailurePolicy]
+    and the exception is re-raised. For as long as the policy suspends the
+    plugin, it is blocked from being iterated, and attempting to load it
+    raises a [`SuspendedPluginError`][grappler.SuspendedPluginError]
+    without calling the inner grappler.
+
+    Usage:
+
+    ```python
+    grappler = (
+        CompositeGrappler(EntryPointGrappler())
+            .wrap(CircuitBreakerGrappler(policy=FailurePolicy(backoff=60)))
+    )
+    ```
+    """
+
+    id = "grappler.grapplers.circuit-breaker"
+
+    def __init__(
+        self, inner: Optional[Grappler] = None, policy: Optional[FailurePolicy] = None
+    ) -> None:
+        super().__init__(inner)
+        self.policy = policy or FailurePolicy()
+
+    def rewrap(self, grappler: Grappler, /) -> "CircuitBreakerGrappler":
+        return self._share_config(CircuitBreakerGrappler(grappler, self.policy))
+
+    def iter_plugins(
+        self, topic: Optional[str], exit_stack: ExitStack, /
+    ) -> Iterator[Tuple[Plugin, None]]:
+        # suspensions change over time, so they are checked on every find
+        # rather than as a checker, whose decisions may be cached
+        return (
+            (plugin, pair)
+            for plugin, pair in super().iter_plugins(topic, exit_stack)
+            if not self.policy.is_suspended(plugin)
+        )
+
+    def load_with_pair(self, plugin: Plugin, pair: None, /) -> Any:
+        self.policy.check(plugin)
+
+        try:
+            obj = super().load_with_pair(plugin, pair)
+        except (
+            ForbiddenPluginError,
+            InvalidConfigurationError,
+            UnknownPluginError,
+        ):
+            raise
+        except Exception as e:
+            self.policy.record_failure(plugin, e)
+            raise
+
+        self.policy.record_success(plugin)
+        return obj
@@ -1,14 +1,21 @@
 import functools
+import operator
+import re
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import ExitStack
+from enum import Enum
 from logging import getLogger
 from typing import (
     Any,
     Callable,
     Collection,
     Dict,
+    Hashable,
     Iterable,
+    Iterator,
     List,
+    Literal,
     NamedTuple,
     Optional,
     Protocol,
@@ -23,12 +30,15 @@ from typing_extensions import Concatenate, ParamSpec
 
 from grappler import Grappler, Plugin, UnknownPluginError
 
+from ._instrument import LayerReport, _InstrumentedGrappler, _LayerStats
+from ._query import Query, QueryProvider, _QueryingGrappler, _RestrictableGrappler
 from .bases import BasicGrappler, PluginPairGrapplerBase
 
 G_Inner = TypeVar("G_Inner", bound=Grappler)
 G_Self = TypeVar("G_Self", bound=Grappler)
 P_Configure = ParamSpec("P_Configure")
 LOG = getLogger(__name__)
+PluginKey = Callable[[Plugin], Hashable]
 
 
 @runtime_checkable
@@ -45,27 +55,179 @@ class _MetaSourceGrappler(PluginPairGrapplerBase[Grappler]):
     id = "grappler.grapplers._internal.MetaSourceGrappler"
 
     # combine multiple sources into a single grappler
-    def __init__(self, sources: Collection[Grappler]) -> None:
+    def __init__(
+        self,
+        sources: Collection[Grappler],
+        *,
+        concurrent: bool = False,
+        max_workers: Optional[int] = None,
+        deduplication: Optional[
+            Tuple["CompositeGrappler.Deduplication", PluginKey]
+        ] = None,
+    ) -> None:
         self.sources = sources
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self.deduplication = deduplication
 
     def iter_plugins(
         self, topic: Optional[str], stack: ExitStack
     ) -> Iterable[Tuple[Plugin, Grappler]]:
+        pairs = self._iter_sources(topic, stack)
+
+        if self.deduplication is None:
+            return pairs
+
+        strategy, key = self.deduplication
+
+        if strategy is CompositeGrappler.Deduplication.FIRST:
+            return _first_of_each(pairs, key)
+        else:
+            return _highest_version_of_each(pairs, key)
+
+    def _iter_sources(
+        self, topic: Optional[str], stack: ExitStack
+    ) -> Iterable[Tuple[Plugin, Grappler]]:
+        if self.concurrent and len(self.sources) > 1:
+            yield from self._iter_concurrently(topic, stack)
+            return
+
         for grappler in self.sources:
             plugins = stack.enter_context(grappler.find(topic))
 
             for plugin in plugins:
                 yield (plugin, grappler)
 
+    def _iter_concurrently(
+        self, topic: Optional[str], stack: ExitStack
+    ) -> Iterable[Tuple[Plugin, Grappler]]:
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="grappler-source"
+        )
+        futures = [
+            executor.submit(_find_all, grappler, topic) for grappler in self.sources
+        ]
+        stack.callback(_close_sources, executor, futures)
+
+        for grappler, future in zip(self.sources, futures):
+            _, plugins = future.result()
+
+            for plugin in plugins:
+                yield (plugin, grappler)
+
     def load_with_pair(self, plugin: Plugin, grappler: Grappler, /) -> Any:
         return grappler.load(plugin)
 
 
+def _first_of_each(
+    pairs: Iterable[Tuple[Plugin, Grappler]], key: PluginKey
+) -> Iterator[Tuple[Plugin, Grappler]]:
+    seen = set()
+
+    for plugin, grappler in pairs:
+        plugin_key = key(plugin)
+
+        if plugin_key not in seen:
+            seen.add(plugin_key)
+            yield plugin, grappler
+
+
+def _highest_version_of_each(
+    pairs: Iterable[Tuple[Plugin, Grappler]], key: PluginKey
+) -> Iterator[Tuple[Plugin, Grappler]]:
+    chosen: Dict[Hashable, Tuple[Tuple[Any, ...], Plugin, Grappler]] = {}
+
+    for plugin, grappler in pairs:
+        plugin_key = key(plugin)
+        version = _version_key(plugin.package.version)
+
+        if plugin_key not in chosen or chosen[plugin_key][0] < version:
+            chosen[plugin_key] = (version, plugin, grappler)
+
+    for _, plugin, grappler in chosen.values():
+        yield plugin, grappler
+
+
+_PRE_RELEASE_ORDER = {"dev": -1, "a": 0, "alpha": 0, "b": 1, "beta": 1}
+_POST_RELEASES = {"post", "rev", "r"}
+
+
+def _version_key(version: str) -> Tuple[Any, ...]:
+    # An approximation of PEP 440 ordering, which does not need the
+    # `packaging` library: release numbers compare numerically (ignoring
+    # trailing zeros), pre-release markers sort before the release,
+    # post-release markers after it, and local versions after the version
+    # that they're local to.
+    public, _, local = version.lower().partition("+")
+    epoch, _, public = public.rpartition("!")
+    release, rest = re.findall(r"^v?((?:\d+\.)*\d+)?(.*)$", public)[0]
+    numbers = [int(n) for n in release.split(".")] if release else []
+
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+
+    parts: List[Tuple[int, Any]] = []
+
+    for part in re.findall(r"\d+|[a-z]+", rest):
+        if part.isdigit():
+            parts.append((3, int(part)))
+        elif part in _POST_RELEASES:
+            parts.append((2, part))
+        else:
+            parts.append((0, (_PRE_RELEASE_ORDER.get(part, 2), part)))
+
+    parts.append((1, ""))
+
+    # numeric segments of local versions sort after alphanumeric ones
+    local_parts = tuple(
+        (1, int(part)) if part.isdigit() else (0, part)
+        for part in re.findall(r"[a-z0-9]+", local)
+    )
+
+    return (
+        int(epoch) if epoch.isdigit() else 0,
+        tuple(numbers),
+        tuple(parts),
+        local_parts,
+    )
+
+
+def _find_all(
+    grappler: Grappler, topic: Optional[str]
+) -> Tuple[ExitStack, List[Plugin]]:
+    # find (and keep open) a source's plugins on a worker thread
+    with ExitStack() as stack:
+        plugins = list(stack.enter_context(grappler.find(topic)))
+        return stack.pop_all(), plugins
+
+
+def _close_sources(
+    executor: ThreadPoolExecutor,
+    futures: List["Future[Tuple[ExitStack, List[Plugin]]]"],
+) -> None:
+    for future in futures:
+        future.cancel()
+
+    with ExitStack() as stack:
+        stack.callback(executor.shutdown)
+
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                source_stack, _ = future.result()
+                stack.push(source_stack)
+
+
 class CompositeGrapplerIterationConfig(NamedTuple):
     source: _MetaSourceGrappler
     wrapped: Grappler
 
 
+class _Chain(NamedTuple):
+    version: int
+    source: _MetaSourceGrappler
+    wrapped: Grappler
+
+
 class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
     """
     Combine plugins and behaviors from multiple grapplers.
@@ -87,14 +249,46 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
       They are provided to
       [`wrap()`][grappler.grapplers.CompositeGrappler.wrap]
 
-    """
+    The [queries][grappler.grapplers.Query] of the wrappers (e.g. those
+    given to [`BouncerGrappler.query()`][grappler.grapplers.BouncerGrappler.query],
+    or implied by the ids listed by a
+    [`BlacklistingGrappler`][grappler.grapplers.BlacklistingGrappler]) are
+    pushed down to the sources which support them, so that the sources
+    can skip the plugins that the wrappers would block, before they are
+    built. This relies on wrappers not changing the fields of the plugins
+    passed through them, and isn't done while
+    [deduplicating][grappler.grapplers.CompositeGrappler.deduplicate]
+    plugins (since a blocked plugin may be chosen over a duplicate).
+
+    """  # noqa: E501
 
     id = "grappler.grapplers.composite-grappler"
 
+    class Deduplication(Enum):
+        """Strategy for choosing between duplicate plugins from several sources."""
+
+        FIRST = "first"
+        """Keep the plugin from the first source that provides it. Plugins are
+        still iterated as soon as their source is searched."""
+
+        HIGHEST_VERSION = "highest-version"
+        """Keep the plugin whose package has the highest version (the first
+        source wins between equal versions). Every source must be searched
+        before any plugin can be iterated."""
+
     def __init__(self, *sources: Grappler) -> None:
         self._sources = list(sources)
         self._wrappers: List[_WrappingGrappler] = []
         self._groups: Dict[str, List[Grappler]] = {}
+        self._concurrent = False
+        self._max_workers: Optional[int] = None
+        self._deduplication: Optional[
+            Tuple["CompositeGrappler.Deduplication", PluginKey]
+        ] = None
+        self._instrumented = False
+        self._layer_stats: Dict[Hashable, _LayerStats] = {}
+        self._version = 0
+        self._chain: Optional[_Chain] = None
 
     def source(
         self, source: Grappler, /, *, group: Optional[str] = None
@@ -105,6 +299,7 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
         for the meaning of `group`.
         """
         self._sources.append(source)
+        self._version += 1
 
         if group:
             self._groups.setdefault(group, []).append(source)
@@ -124,6 +319,7 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
         for the meaning of `group`.
         """
         self._wrappers.append(wrapper)
+        self._version += 1
 
         if group:
             self._groups.setdefault(group, []).append(wrapper)
@@ -132,6 +328,124 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
 
     map = wrap
 
+    def concurrent_sources(
+        self, enabled: bool = True, /, *, max_workers: Optional[int] = None
+    ) -> "CompositeGrappler":
+        """Find plugins from all sources concurrently, on a thread pool.
+
+        By default, each source is only searched once every plugin from the
+        previous source has been iterated, so the time taken to find
+        plugins is the sum of the time taken by every source. When enabled,
+        every source is searched at the same time instead. Plugins are still
+        iterated in the order that the sources were supplied in, and plugins
+        from a source are iterated as soon as that source (and every source
+        before it) has been searched.
+
+        This is only beneficial for sources that spend their time waiting
+        on I/O (e.g. scanning the filesystem). Sources must be safe to use
+        from a thread other than the one iterating the grappler.
+
+        Args:
+            enabled: Whether sources should be searched concurrently.
+            max_workers: The maximum number of sources to search at the
+                         same time (default: as chosen by
+                         `concurrent.futures.ThreadPoolExecutor`).
+        """
+        self._concurrent = enabled
+        self._max_workers = max_workers
+        self._version += 1
+        return self
+
+    def deduplicate(
+        self,
+        strategy: Optional[Deduplication] = Deduplication.FIRST,
+        /,
+        *,
+        key: PluginKey = operator.attrgetter("plugin_id"),
+    ) -> "CompositeGrappler":
+        """Drop duplicate plugins that are provided by more than one source.
+
+        Plugins are considered to be duplicates when `key` returns the same
+        value for them (by default, their `plugin_id`). Duplicates are
+        dropped as plugins are iterated from the sources, before they reach
+        any wrapper.
+
+        ```python
+        grappler = (
+            CompositeGrappler(EntryPointGrappler(), StaticGrappler(...))
+                .deduplicate(CompositeGrappler.Deduplication.HIGHEST_VERSION)
+        )
+        ```
+
+        Args:
+            strategy: How to choose which of the duplicate plugins is kept
+                      (see
+                      [`Deduplication`][grappler.grapplers.CompositeGrappler.Deduplication]),
+                      or `None` in order to stop deduplicating.
+            key: A function returning the value used to identify duplicate
+                 plugins, e.g. `lambda p: (p.package.id, p.name)`.
+        """  # noqa: E501
+        self._deduplication = None if strategy is None else (strategy, key)
+        self._version += 1
+        return self
+
+    def instrument(self, enabled: bool = True, /) -> "CompositeGrappler":
+        """Measure the time spent in, and the plugins passed through, every
+        source and wrapper.
+
+        While enabled, every find and load is timed layer by layer, and the
+        measurements are accumulated until they are collected with
+        [`report()`][grappler.grapplers.CompositeGrappler.report]. This
+        makes it possible to tell which layer of a slow grappler to optimise,
+        at the cost of some overhead for every plugin iterated.
+        """
+        self._instrumented = enabled
+        self._version += 1
+        return self
+
+    def report(self) -> List[LayerReport]:
+        """Return the measurements accumulated by every layer since
+        instrumentation was enabled (or
+        [`reset_report()`][grappler.grapplers.CompositeGrappler.reset_report]
+        was called).
+
+        Layers are listed from the bottom up: every source in the order they
+        were supplied in, the layer which combines the sources, and then
+        every wrapper in the order they are executed in. The time spent
+        in each layer excludes the time spent in the layers below it;
+        when sources are searched concurrently, their times overlap.
+        """
+        sources = [self._get_layer_stats(id(source)) for source in self._sources]
+        reports = [
+            _report_layer(source.id, "source", stats, stats.plugins, [])
+            for source, stats in zip(self._sources, sources)
+        ]
+
+        inner_plugins = sum(stats.plugins for stats in sources)
+        inner = sources
+        layers: List[Tuple[str, Literal["sources", "wrapper"], Hashable]] = [
+            (_MetaSourceGrappler.id, "sources", "sources"),
+            *((wrapper.id, "wrapper", id(wrapper)) for wrapper in self._wrappers),
+        ]
+
+        for grappler_id, kind, key in layers:
+            stats = self._get_layer_stats(key)
+            reports.append(
+                _report_layer(grappler_id, kind, stats, inner_plugins, inner)
+            )
+            inner_plugins, inner = stats.plugins, [stats]
+
+        return reports
+
+    def reset_report(self) -> None:
+        """Discard the measurements accumulated by every layer."""
+        for stats in self._layer_stats.values():
+            stats.reset()
+
+    def _get_layer_stats(self, key: Hashable) -> _LayerStats:
+        # measurements are kept across rebuilds of the chain
+        return self._layer_stats.setdefault(key, _LayerStats())
+
     def configure(
         self,
         target: Callable[Concatenate[Any, P_Configure], Any],
@@ -202,13 +516,40 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
             if isinstance(grappler, targeted_type):
                 target(grappler, *args, **kwargs)
 
+        self._version += 1
         return self
 
     def create_iteration_context(
         self, topic: Optional[str], stack: ExitStack
     ) -> Tuple[Iterable[Plugin], Any]:
-        source = _MetaSourceGrappler(self._sources)
-        wrapped: Grappler = source
+        chain = self._get_chain()
+        plugins = stack.enter_context(chain.wrapped.find(topic))
+        return (plugins, CompositeGrapplerIterationConfig(chain.source, chain.wrapped))
+
+    def _get_chain(self) -> _Chain:
+        # The chain of rewrapped grapplers is reused between finds, and
+        # only rebuilt once the configuration has changed.
+        chain = self._chain
+
+        if chain is None or chain.version != self._version:
+            chain = self._chain = self._build_chain()
+
+        return chain
+
+    def _build_chain(self) -> _Chain:
+        queries = functools.partial(_collect_queries, tuple(self._wrappers))
+        source = _MetaSourceGrappler(
+            [
+                self._instrument_layer(
+                    self._restrict_source(source, queries), id(source)
+                )
+                for source in self._sources
+            ],
+            concurrent=self._concurrent,
+            max_workers=self._max_workers,
+            deduplication=self._deduplication,
+        )
+        wrapped: Grappler = self._instrument_layer(source, "sources")
 
         for grappler in self._wrappers:
             if grappler.wrapped is not None:
@@ -217,10 +558,26 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
                     f"({repr(grappler.wrapped.id)}); currently wrapped grappler will "
                     "be discarded."
                 )
-            wrapped = grappler.rewrap(wrapped)
+            wrapped = self._instrument_layer(grappler.rewrap(wrapped), id(grappler))
+
+        return _Chain(self._version, source, wrapped)
+
+    def _restrict_source(self, source: Grappler, queries: QueryProvider) -> Grappler:
+        if self._deduplication is not None or not isinstance(
+            source, _RestrictableGrappler
+        ):
+            return source
+
+        if not any(isinstance(w, _QueryingGrappler) for w in self._wrappers):
+            return source
 
-        plugins = stack.enter_context(wrapped.find(topic))
-        return (plugins, CompositeGrapplerIterationConfig(source, wrapped))
+        return source.restricted(queries)
+
+    def _instrument_layer(self, grappler: Grappler, key: Hashable) -> Grappler:
+        if not self._instrumented:
+            return grappler
+
+        return _InstrumentedGrappler(grappler, self._get_layer_stats(key))
 
     def load_from_context(
         self, plugin: Plugin, context: CompositeGrapplerIterationConfig
@@ -240,6 +597,34 @@ class CompositeGrappler(BasicGrappler[CompositeGrapplerIterationConfig]):
             return context.source.load(plugin)
 
 
+def _collect_queries(wrappers: Tuple[Grappler, ...]) -> List[Query]:
+    return [
+        query
+        for wrapper in wrappers
+        if isinstance(wrapper, _QueryingGrappler)
+        for query in wrapper.queries()
+    ]
+
+
+def _report_layer(
+    grappler_id: str,
+    kind: Literal["source", "sources", "wrapper"],
+    stats: _LayerStats,
+    plugins_in: int,
+    inner: List[_LayerStats],
+) -> LayerReport:
+    return LayerReport(
+        grappler_id=grappler_id,
+        kind=kind,
+        finds=stats.finds,
+        plugins_in=plugins_in,
+        plugins_out=stats.plugins,
+        find_time=max(stats.find_time - sum(s.find_time for s in inner), 0.0),
+        loads=stats.loads,
+        load_time=max(stats.load_time - sum(s.load_time for s in inner), 0.0),
+    )
+
+
 def _get_function_host_type(func: Callable[..., Any]) -> Optional[Type[Any]]:
     if func.__module__ not in sys.modules:
         return None
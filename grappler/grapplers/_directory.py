@@ -0,0 +1,307 @@
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import ExitStack
+from logging import getLogger
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+from grappler import Package, Plugin
+
+from ._target import _TARGETS, _PluginTarget
+from .bases import PluginPairGrapplerBase
+
+LOG = getLogger(__name__)
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+class _Declaration(NamedTuple):
+    # a plugin declared by a module, as found in its __plugins__
+    object: str
+    topics: Tuple[str, ...]
+    name: Optional[str]
+    capabilities: Tuple[str, ...]
+
+
+class _CachedFile(NamedTuple):
+    mtime_ns: int
+    size: int
+    declarations: Tuple[_Declaration, ...]
+
+
+class _DeclarationError(ValueError):
+    pass
+
+
+def _parse_declarations(path: str) -> Tuple[_Declaration, ...]:
+    # Read the module's __plugins__ from its syntax tree, without running it.
+    # Only the last top level assignment counts, as it would when imported.
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    value: Optional[ast.expr] = None
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == DirectoryGrappler.declaration
+            for target in node.targets
+        ):
+            value = node.value
+        elif (
+            isinstance(node, ast.AnnAssign)
+            and isinstance(node.target, ast.Name)
+            and node.target.id == DirectoryGrappler.declaration
+        ):
+            value = node.value
+
+    if value is None:
+        return ()
+
+    try:
+        items = ast.literal_eval(value)
+    except (ValueError, TypeError) as e:
+        raise _DeclarationError(
+            f"{DirectoryGrappler.declaration} isn't a literal"
+        ) from e
+
+    return tuple(
+        _parse_declaration(item)
+        for item in ([items] if isinstance(items, dict) else items)
+    )
+
+
+def _parse_declaration(item: Any) -> _Declaration:
+    if not isinstance(item, dict):
+        raise _DeclarationError(f"Plugin declaration isn't a dictionary: {item!r}")
+
+    obj, topics = item.get("object"), item.get("topics")
+    name, capabilities = item.get("name"), item.get("capabilities", ())
+
+    if not isinstance(obj, str) or not obj:
+        raise _DeclarationError(f"Plugin declaration has no object: {item!r}")
+    elif not _is_strings(topics):
+        raise _DeclarationError(f"Plugin declaration has invalid topics: {item!r}")
+    elif name is not None and not isinstance(name, str):
+        raise _DeclarationError(f"Plugin declaration has an invalid name: {item!r}")
+    elif not _is_strings(capabilities):
+        raise _DeclarationError(
+            f"Plugin declaration has invalid capabilities: {item!r}"
+        )
+
+    return _Declaration(obj, tuple(cast(List[str], topics)), name, tuple(capabilities))
+
+
+def _is_strings(value: Any) -> bool:
+    return isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value)
+
+
+def _module_name(path: str) -> str:
+    # Modules are given a name which is unique to their path, so that they
+    # don't clash with other modules (or the modules of other directories).
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    return f"_grappler_directory_{digest}_{stem}"
+
+
+def _directory_target(plugin: Plugin) -> _PluginTarget:
+    path, _, attr = plugin.plugin_id.rpartition(":")
+    return _PluginTarget(_module_name(path), attr, path)
+
+
+class DirectoryGrappler(PluginPairGrapplerBase[_PluginTarget]):
+    """
+    A grappler for loading plugins from a directory of Python files.
+
+    Every `.py` file in the directory (except those whose name starts with
+    `_` or `.`) may declare the plugins that it provides, by assigning a
+    list of dictionaries to `__plugins__`:
+
+    ```python
+    # plugins/formatters.py
+    __plugins__ = [
+        {"object": "HtmlFormatter", "topics": ["app.formatters"]},
+        {
+            "object": "MarkdownFormatter",
+            "topics": ["app.formatters"],
+            "name": "markdown",
+            "capabilities": ["text"],
+        },
+    ]
+
+    class HtmlFormatter: ...
+    class MarkdownFormatter: ...
+    ```
+
+    `object` names the attribute of the module (possibly dotted) which is
+    the plugin, and `name` defaults to it. The declarations are read
+    from the syntax tree of each file, without running it, so they must be
+    literals; a module is only imported when one of its plugins is loaded.
+    Files are imported from their path, under a name which is unique to
+    it, so the directory doesn't need to be on `sys.path`.
+
+    The declarations of every file are remembered with the file's
+    modification time and size, so that only files which have changed are
+    parsed again when the directory is searched again. When a `cache_file`
+    is given, the declarations are also stored in it, so that they are
+    reused by later runs of the program.
+
+    Plugin ids are made from the path of the file and the object, and so
+    are stable as long as the directory isn't moved.
+
+    Usage:
+
+    ```python
+    grappler = DirectoryGrappler("/etc/app/plugins", cache_file="/var/cache/app/plugins.json")
+    ```
+
+    Args:
+        directory: The directory to search for plugins.
+        package: The package of every plugin (by default, a package named
+                 after the directory).
+        cache_file: A file to store the declarations of the files in.
+    """  # noqa: E501
+
+    id = "grappler.grapplers.directory"
+    declaration = "__plugins__"
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        package: Optional[Package] = None,
+        cache_file: Optional[Path] = None,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.package = package or Package(
+            os.path.basename(self.directory),
+            "0.0.0",
+            f"{self.id}:{self.directory}",
+            None,
+        )
+        self.cache_file = None if cache_file is None else os.fspath(cache_file)
+        self._files: Dict[str, _CachedFile] = {}
+        self._lock = threading.Lock()
+
+        if self.cache_file is not None:
+            self._files = self._read_cache_file(self.cache_file)
+
+    def iter_plugins(
+        self, topic: Optional[str], _: ExitStack, /
+    ) -> Iterable[Tuple[Plugin, _PluginTarget]]:
+        for path, declarations in self._scan():
+            for declaration in declarations:
+                if topic is not None and topic not in declaration.topics:
+                    continue
+
+                target = _PluginTarget(_module_name(path), declaration.object, path)
+                plugin = Plugin(
+                    grappler_id=self.id,
+                    plugin_id=f"{path}:{declaration.object}",
+                    package=self.package,
+                    topics=declaration.topics,
+                    name=declaration.name or declaration.object,
+                    capabilities=declaration.capabilities,
+                )
+                yield plugin, target
+
+    def load_with_pair(self, _: Plugin, target: _PluginTarget, /) -> Any:
+        return target.load()
+
+    def _scan(self) -> List[Tuple[str, Tuple[_Declaration, ...]]]:
+        with self._lock:
+            files: Dict[str, _CachedFile] = {}
+
+            with os.scandir(self.directory) as entries:
+                for entry in sorted(entries, key=lambda entry: entry.name):
+                    if (
+                        entry.name.startswith(("_", "."))
+                        or not entry.name.endswith(".py")
+                        or not entry.is_file()
+                    ):
+                        continue
+
+                    stat = entry.stat()
+                    cached = self._files.get(entry.path)
+
+                    if cached is None or (cached.mtime_ns, cached.size) != (
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                    ):
+                        cached = _CachedFile(
+                            stat.st_mtime_ns, stat.st_size, self._parse(entry.path)
+                        )
+
+                    files[entry.path] = cached
+
+            changed = files != self._files
+            self._files = files
+
+            if changed and self.cache_file is not None:
+                try:
+                    self._write_cache_file(self.cache_file, files)
+                except OSError as e:
+                    LOG.warning(f"Failed to write cache file {self.cache_file}: {e}")
+
+            return [(path, cached.declarations) for path, cached in files.items()]
+
+    @staticmethod
+    def _parse(path: str) -> Tuple[_Declaration, ...]:
+        try:
+            return _parse_declarations(path)
+        except (SyntaxError, ValueError, TypeError, OSError) as e:
+            # remembered as declaring nothing, until the file changes
+            LOG.warning(f"Ignoring plugins declared by {path}: {e}")
+            return ()
+
+    @staticmethod
+    def _read_cache_file(path: str) -> Dict[str, _CachedFile]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                content: Mapping[str, Any] = json.load(f)
+
+            return {
+                file: _CachedFile(
+                    mtime_ns,
+                    size,
+                    tuple(
+                        _Declaration(obj, tuple(topics), name, tuple(capabilities))
+                        for obj, topics, name, capabilities in declarations
+                    ),
+                )
+                for file, (mtime_ns, size, declarations) in content.items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (ValueError, TypeError, AttributeError) as e:
+            LOG.warning(f"Ignoring invalid cache file {path}: {e}")
+            return {}
+
+    @staticmethod
+    def _write_cache_file(path: str, files: Dict[str, _CachedFile]) -> None:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(files, f, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+_TARGETS[DirectoryGrappler.id] = _directory_target
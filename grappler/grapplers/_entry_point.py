@@ -1,15 +1,79 @@
+import copy
+import threading
 from contextlib import ExitStack
-from itertools import chain
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import importlib_metadata as metadata
 
 from grappler import Package, Plugin
 
+from ._query import Query, QueryProvider, _no_queries
+from ._target import _TARGETS, _PluginTarget
 from .bases import PluginPairGrapplerBase
 
 EntryPointCache = Dict[Plugin, metadata.EntryPoint]
 
+# the plugin fields which are known from an entry point alone, without
+# reading the metadata of its distribution
+_ENTRY_POINT_FIELDS: Dict[str, Callable[[metadata.EntryPoint], Any]] = {
+    "plugin_id": lambda entry_point: str(entry_point.value),
+    "topics": lambda entry_point: (entry_point.group,),
+    "name": lambda entry_point: str(entry_point.name),
+    "capabilities": lambda entry_point: tuple(entry_point.extras),
+}
+
+
+class _Distributions:
+    # the distributions installed in the environment; the entry points and
+    # package of each are only read once they are first needed. Shared
+    # between a grappler and its restricted copies.
+    def __init__(self) -> None:
+        self._distributions: Optional[List[metadata.Distribution]] = None
+        self._entry_points: Dict[str, Tuple[metadata.EntryPoint, ...]] = {}
+        self._packages: Dict[str, Package] = {}
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[metadata.Distribution]:
+        if self._distributions is None:
+            with self._lock:
+                if self._distributions is None:
+                    self._distributions = list(_unique(metadata.distributions()))
+
+        return iter(self._distributions)
+
+    def entry_points(
+        self, dist: metadata.Distribution
+    ) -> Tuple[metadata.EntryPoint, ...]:
+        name = dist._normalized_name
+
+        if name not in self._entry_points:
+            self._entry_points[name] = tuple(dist.entry_points)
+
+        return self._entry_points[name]
+
+    def package(self, dist: metadata.Distribution) -> Package:
+        name = dist._normalized_name
+
+        if name not in self._packages:
+            self._packages[name] = Package(
+                dist.name, version=dist.version, id=name, platform=None
+            )
+
+        return self._packages[name]
+
+
+def _unique(
+    distributions: Iterable[metadata.Distribution],
+) -> Iterator[metadata.Distribution]:
+    # only the first distribution of each name is importable, so the others
+    # are ignored (as with metadata.entry_points())
+    seen = set()
+
+    for dist in distributions:
+        if dist._normalized_name not in seen:
+            seen.add(dist._normalized_name)
+            yield dist
+
 
 class EntryPointGrappler(PluginPairGrapplerBase[metadata.EntryPoint]):
     """
@@ -24,6 +88,12 @@ class EntryPointGrappler(PluginPairGrapplerBase[metadata.EntryPoint]):
     grappler is `None`, even when this value is provided by underlying
     metadata.
 
+    The extras of an entry point definition are mapped to
+    `plugin.capabilities`; e.g. the entry point
+    `my-plugin = my_pkg.plugins:Formatter [html, markdown]` gives a plugin
+    with capabilities `("html", "markdown")`. (Capabilities declared like
+    this may only contain letters, digits and underscores.)
+
     Additionally, the returned plugin ids are stable
     across interpreter instances; this means that the `plugin_id`
     value for a given entry point definition will be the same each time
@@ -31,6 +101,9 @@ class EntryPointGrappler(PluginPairGrapplerBase[metadata.EntryPoint]):
     This makes the grappler suitable for use with
     [`BlacklistingGrappler`][grappler.grapplers.BlacklistingGrappler].
 
+    The entry points and metadata of each distribution are read the first
+    time that they are needed, and then reused.
+
 
     Usage:
 
@@ -50,21 +123,39 @@ class EntryPointGrappler(PluginPairGrapplerBase[metadata.EntryPoint]):
     )
 
     def __init__(self) -> None:
-        self._groups = metadata.entry_points()
+        self._distributions = _Distributions()
+        self._queries: QueryProvider = _no_queries
+
+    def restricted(self, queries: QueryProvider, /) -> "EntryPointGrappler":
+        """Return a copy of the grappler which only finds plugins matching
+        every [query][grappler.grapplers.Query] returned by `queries`.
+
+        `queries` is called every time that plugins are found. Queries on
+        `package.id` are checked before anything is read from a
+        distribution, so the entry points and metadata of the distributions
+        that they exclude are never read; queries on the fields of the
+        entry points themselves are checked before the metadata of their
+        distribution is read.
+        """
+        grappler = copy.copy(self)
+        grappler._queries = queries
+        return grappler
 
     def iter_plugins(
         self, topic: Optional[str], _: ExitStack
     ) -> Iterable[Tuple[Plugin, metadata.EntryPoint]]:
-        for entry_point in self._entry_points(topic=topic):
+        queries = list(self._queries())
+        plugin_queries = [
+            query
+            for query in queries
+            if query.field not in _ENTRY_POINT_FIELDS and query.field != "package.id"
+        ]
+
+        for entry_point in self._entry_points(topic=topic, queries=queries):
             if entry_point.dist is None:
                 package = self.unknown_package
             else:
-                package = Package(
-                    entry_point.dist.name,
-                    version=entry_point.dist.version,
-                    id=entry_point.dist._normalized_name,
-                    platform=None,
-                )
+                package = self._distributions.package(entry_point.dist)
 
             plugin = Plugin(
                 grappler_id=self.id,
@@ -72,19 +163,38 @@ class EntryPointGrappler(PluginPairGrapplerBase[metadata.EntryPoint]):
                 package=package,
                 topics=(entry_point.group,),  # type: ignore
                 name=str(entry_point.name),  # type: ignore
+                capabilities=tuple(entry_point.extras),
             )
-            yield plugin, entry_point
+
+            if all(query.matches(plugin) for query in plugin_queries):
+                yield plugin, entry_point
 
     def load_with_pair(self, _: Plugin, entry_point: metadata.EntryPoint, /) -> Any:
         return entry_point.load()  # type: ignore
 
-    def _entry_points(self, *, topic: Optional[str]) -> Iterable[metadata.EntryPoint]:
-        if topic is None:
-            return chain(
-                *(
-                    self._groups.select(group=group)  # type: ignore
-                    for group in self._groups.groups
-                )
-            )
-        else:
-            return self._groups.select(group=topic)  # type: ignore
+    def _entry_points(
+        self, *, topic: Optional[str], queries: List[Query]
+    ) -> Iterable[metadata.EntryPoint]:
+        package_queries = [query for query in queries if query.field == "package.id"]
+        entry_point_queries = [
+            (query, _ENTRY_POINT_FIELDS[query.field])
+            for query in queries
+            if query.field in _ENTRY_POINT_FIELDS
+        ]
+
+        for dist in self._distributions:
+            if not all(
+                query.matches_value(dist._normalized_name) for query in package_queries
+            ):
+                continue
+
+            for entry_point in self._distributions.entry_points(dist):
+                if (topic is None or entry_point.group == topic) and all(
+                    query.matches_value(get_value(entry_point))
+                    for query, get_value in entry_point_queries
+                ):
+                    yield entry_point
+
+
+# entry point plugin ids are the entry points' object references
+_TARGETS[EntryPointGrappler.id] = lambda plugin: _PluginTarget.parse(plugin.plugin_id)
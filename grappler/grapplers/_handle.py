@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from grappler import Plugin
+
+from ._target import _PluginTarget, _target_of
+
+
+class PluginHandle(NamedTuple):
+    """
+    A compact, picklable reference to a plugin, which can be loaded in
+    another process.
+
+    Plugins can only be loaded by the grappler that found them, while its
+    find context is open, so they can't be sent to other processes (e.g.
+    the workers of a `ProcessPoolExecutor`) to be loaded there. Instead,
+    a handle can be made of a plugin with
+    [`PluginHandle.of()`][grappler.grapplers.PluginHandle.of], sent to a
+    worker, and loaded there with
+    [`load()`][grappler.grapplers.PluginHandle.load], which imports the
+    plugin's object directly, without finding any plugins:
+
+    ```python
+    def run(handle: PluginHandle, data: bytes) -> bytes:
+        return handle.load()(data)
+
+    with grappler.find("app.formatters") as plugins:
+        handles = [PluginHandle.of(plugin) for plugin in plugins]
+
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(run, handles, repeat(data)))
+    ```
+
+    Handles can only be made of plugins whose object can be imported
+    without the grappler that found them, like the plugins which can be
+    written to a [manifest][grappler.grapplers.write_manifest] (e.g. those
+    of an [`EntryPointGrappler`][grappler.grapplers.EntryPointGrappler]).
+    Checks which are made when plugins are loaded (e.g. by a
+    [`BouncerGrappler`][grappler.grapplers.BouncerGrappler]) are not
+    repeated when a handle is loaded.
+    """  # noqa: E501
+
+    grappler_id: str
+    """The id of the grappler that the plugin came from."""
+
+    plugin_id: str
+    """The id of the plugin."""
+
+    target: str
+    """A reference to the plugin's object (`module:attr`, optionally
+    followed by `@path`)."""
+
+    @classmethod
+    def of(cls, plugin: Plugin, /) -> "PluginHandle":
+        """Return the handle of a plugin.
+
+        Raises:
+            ValueError: When the plugin's object can't be imported without
+                        the grappler that found it.
+        """
+        target = _target_of(plugin)
+
+        if target is None:
+            raise ValueError(
+                f"Can't make a handle of plugin (unknown target): {plugin}"
+            )
+
+        return cls(plugin.grappler_id, plugin.plugin_id, str(target))
+
+    def load(self) -> Any:
+        """Load the plugin's object. Each target is only resolved once per
+        process; later loads of it return the same object."""
+        return _load_target(self.target)
+
+
+@lru_cache(maxsize=None)
+def _load_target(target: str) -> Any:
+    return _PluginTarget.parse(target).load()
@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import IO, Iterable, List, Optional, Sequence, Tuple, Union
+
+_MAGIC = b"GRPLIDT1"
+# magic, bloom filter (bits, hashes, offset), then the (count, offset)
+# of the plugin id and package id tables
+_HEADER = struct.Struct("<8s7Q")
+_OFFSET = struct.Struct("<Q")
+_BOUNDS = struct.Struct("<2Q")
+
+_PLUGIN_PREFIX = b"plugin:"
+_PACKAGE_PREFIX = b"package:"
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+class InvalidIdTableError(ValueError):
+    """Raised when a file is not a valid id table."""
+
+
+def _bloom_positions(key: bytes, bits: int, hashes: int) -> Iterable[int]:
+    h1, h2 = _BOUNDS.unpack(hashlib.blake2b(key, digest_size=16).digest())
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def _bloom_size(count: int, false_positive_rate: float) -> Tuple[int, int]:
+    if count == 0:
+        return (0, 0)
+
+    bits = math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / count * math.log(2)))
+    return (bits, hashes)
+
+
+class _SortedIds:
+    # a memory mapped table of sorted ids: the offsets of every id in the
+    # data (and the end of the data), followed by the (utf-8 encoded) ids.
+    def __init__(self, buffer: mmap.mmap, count: int, offset: int) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.offsets = offset
+        self.data = offset + _OFFSET.size * (count + 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        start, end = _BOUNDS.unpack_from(self.buffer, self.offsets + index * 8)
+        return self.buffer[self.data + start : self.data + end]  # noqa: E203
+
+    def __contains__(self, value: bytes) -> bool:
+        return self.index(value) is not None
+
+    def index(self, value: bytes) -> Optional[int]:
+        low, high = 0, self.count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low if low < self.count and self[low] == value else None
+
+
+class IdTable:
+    """
+    A file-backed list of plugin and package ids, which can be used
+    to blacklist or whitelist very many plugins at once.
+
+    Id tables are built with [`write_id_table()`][grappler.grapplers.write_id_table]
+    (or with the `grappler-id-table` command), and then given to
+    [`BlacklistingGrappler.blacklist()`][grappler.grapplers.BlacklistingGrappler.blacklist]
+    or
+    [`WhitelistingGrappler.whitelist()`][grappler.grapplers.WhitelistingGrappler.whitelist]:
+
+    ```python
+    grappler = BlacklistingGrappler()
+    grappler.blacklist(IdTable("/usr/share/app/blocked-plugins.idt"))
+    ```
+
+    The file is memory mapped rather than read, so opening it is fast
+    regardless of its size. Ids are first looked up in a Bloom filter,
+    which rules out most ids that aren't listed without reading the
+    tables; an id which passes the filter is then confirmed with a binary
+    search of the sorted table.
+
+    Args:
+        path: The path of the id table file.
+    """  # noqa: E501
+
+    def __init__(self, path: Path) -> None:
+        self.path = os.fspath(path)
+
+        with open(self.path, "rb") as f:
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # an empty file
+                raise InvalidIdTableError(f"Not an id table: {self.path}") from e
+
+        if len(self._buffer) < _HEADER.size or self._buffer[: len(_MAGIC)] != _MAGIC:
+            self._buffer.close()
+            raise InvalidIdTableError(f"Not an id table: {self.path}")
+
+        (
+            _,
+            self._bloom_bits,
+            self._bloom_hashes,
+            self._bloom_offset,
+            plugin_count,
+            plugin_offset,
+            package_count,
+            package_offset,
+        ) = _HEADER.unpack_from(self._buffer)
+        self._plugin_ids = _SortedIds(self._buffer, plugin_count, plugin_offset)
+        self._package_ids = _SortedIds(self._buffer, package_count, package_offset)
+
+    def __enter__(self) -> "IdTable":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"IdTable({self.path!r})"
+
+    def close(self) -> None:
+        """Unmap the file. The table can't be used after it is closed."""
+        self._buffer.close()
+
+    @property
+    def plugin_count(self) -> int:
+        """The number of plugin ids in the table."""
+        return len(self._plugin_ids)
+
+    @property
+    def package_count(self) -> int:
+        """The number of package ids in the table."""
+        return len(self._package_ids)
+
+    def has_plugin_id(self, plugin_id: str) -> bool:
+        """Return whether a plugin id is in the table."""
+        value = plugin_id.encode("utf-8")
+        return self._in_bloom(_PLUGIN_PREFIX + value) and value in self._plugin_ids
+
+    def has_package_id(self, package_id: str) -> bool:
+        """Return whether a package id is in the table."""
+        value = package_id.encode("utf-8")
+        return self._in_bloom(_PACKAGE_PREFIX + value) and value in self._package_ids
+
+    def _in_bloom(self, key: bytes) -> bool:
+        if not self._bloom_bits:
+            return False
+
+        buffer, offset = self._buffer, self._bloom_offset
+        return all(
+            buffer[offset + position // 8] & (1 << position % 8)
+            for position in _bloom_positions(key, self._bloom_bits, self._bloom_hashes)
+        )
+
+
+def write_id_table(
+    path: Path,
+    *,
+    plugin_ids: Iterable[str] = (),
+    package_ids: Iterable[str] = (),
+    false_positive_rate: float = 0.01,
+) -> None:
+    """Write an [`IdTable`][grappler.grapplers.IdTable] file.
+
+    The file is replaced atomically, so that processes which have the
+    previous version of the table open can keep using it.
+
+    Args:
+        path: The path of the file to write.
+        plugin_ids: The plugin ids to put in the table.
+        package_ids: The package ids to put in the table.
+        false_positive_rate: The rate at which the table's Bloom filter
+                             lets through ids which aren't listed (each of
+                             which costs a binary search of the table).
+                             Lower rates make the file larger.
+    """
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("The false positive rate must be between 0 and 1.")
+
+    plugins = sorted({plugin_id.encode("utf-8") for plugin_id in plugin_ids})
+    packages = sorted({package_id.encode("utf-8") for package_id in package_ids})
+    bloom_bits, bloom_hashes = _bloom_size(
+        len(plugins) + len(packages), false_positive_rate
+    )
+    bloom = bytearray((bloom_bits + 7) // 8)
+
+    for prefix, values in ((_PLUGIN_PREFIX, plugins), (_PACKAGE_PREFIX, packages)):
+        for value in values:
+            for position in _bloom_positions(prefix + value, bloom_bits, bloom_hashes):
+                bloom[position // 8] |= 1 << position % 8
+
+    bloom_offset = _HEADER.size
+    plugin_offset = bloom_offset + len(bloom)
+    package_offset = plugin_offset + _table_size(plugins)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    bloom_bits,
+                    bloom_hashes,
+                    bloom_offset,
+                    len(plugins),
+                    plugin_offset,
+                    len(packages),
+                    package_offset,
+                )
+            )
+            f.write(bloom)
+            _write_table(f, plugins)
+            _write_table(f, packages)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _table_size(values: List[bytes]) -> int:
+    return _OFFSET.size * (len(values) + 1) + sum(map(len, values))
+
+
+def _write_table(f: IO[bytes], values: List[bytes]) -> None:
+    offset = 0
+
+    for value in values:
+        f.write(_OFFSET.pack(offset))
+        offset += len(value)
+
+    f.write(_OFFSET.pack(offset))
+    f.writelines(values)
+
+
+def _read_ids(path: str) -> Iterable[str]:
+    if path == "-":
+        lines: Iterable[str] = sys.stdin
+    else:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+
+    return (line.strip() for line in lines if line.strip())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Build an id table from text files listing one id per line."""
+    parser = argparse.ArgumentParser(
+        prog="grappler-id-table",
+        description="Build an id table for blacklisting or whitelisting plugins.",
+    )
+    parser.add_argument("output", help="path of the id table to write")
+    parser.add_argument(
+        "--plugins",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="file listing one plugin id per line ('-' for stdin)",
+    )
+    parser.add_argument(
+        "--packages",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="file listing one package id per line ('-' for stdin)",
+    )
+    parser.add_argument(
+        "--false-positive-rate",
+        type=float,
+        default=0.01,
+        help="rate of unlisted ids let through by the Bloom filter (default: 0.01)",
+    )
+    args = parser.parse_args(argv)
+
+    write_id_table(
+        args.output,
+        plugin_ids=[i for path in args.plugins for i in _read_ids(path)],
+        package_ids=[i for path in args.packages for i in _read_ids(path)],
+        false_positive_rate=args.false_positive_rate,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Iterator, Literal, Optional
+
+from grappler import Grappler, Plugin
+
+
+@dataclass(frozen=True)
+class LayerReport:
+    """Time spent, and plugins passed through, a layer of a
+    [`CompositeGrappler`][grappler.grapplers.CompositeGrappler].
+
+    Times are given in seconds, and exclude the time spent in the layers
+    below (i.e. a wrapper's times do not include its sources' times).
+    """
+
+    grappler_id: str
+    """The id of the grappler in this layer."""
+
+    kind: Literal["source", "sources", "wrapper"]
+    """The kind of layer: `"source"` for each source, `"sources"` for the
+    layer which combines (and deduplicates) the plugins from all sources,
+    and `"wrapper"` for each wrapper."""
+
+    finds: int
+    """The number of times that the layer was searched for plugins."""
+
+    plugins_in: int
+    """The number of plugins that the layer received from the layers below."""
+
+    plugins_out: int
+    """The number of plugins that the layer yielded."""
+
+    find_time: float
+    """The time spent finding (and iterating) plugins."""
+
+    loads: int
+    """The number of plugins loaded through the layer."""
+
+    load_time: float
+    """The time spent loading plugins."""
+
+
+class _LayerStats:
+    # inclusive of the time spent in the layers below
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.finds = 0
+            self.plugins = 0
+            self.find_time = 0.0
+            self.loads = 0
+            self.load_time = 0.0
+
+    def add_find(self, elapsed: float) -> None:
+        with self.lock:
+            self.finds += 1
+            self.find_time += elapsed
+
+    def add_find_time(self, elapsed: float, *, plugins: int = 0) -> None:
+        with self.lock:
+            self.find_time += elapsed
+            self.plugins += plugins
+
+    def add_load_time(self, elapsed: float) -> None:
+        with self.lock:
+            self.loads += 1
+            self.load_time += elapsed
+
+
+class _InstrumentedGrappler:
+    # measure the time spent in (and below) a grappler
+
+    def __init__(self, inner: Grappler, stats: _LayerStats) -> None:
+        self.inner = inner
+        self.stats = stats
+
+    @property
+    def id(self) -> str:
+        return self.inner.id
+
+    @property
+    def wrapped(self) -> Optional[Grappler]:
+        return getattr(self.inner, "wrapped", None)
+
+    def rewrap(self, grappler: Grappler, /) -> "_InstrumentedGrappler":
+        return _InstrumentedGrappler(
+            self.inner.rewrap(grappler), self.stats  # type: ignore[attr-defined]
+        )
+
+    @contextmanager
+    def find(self, topic: Optional[str] = None) -> Iterator[Iterator[Plugin]]:
+        start = perf_counter()
+
+        with self.inner.find(topic) as plugins:
+            self.stats.add_find(perf_counter() - start)
+            yield self._iter_timed(plugins)
+
+    def _iter_timed(self, plugins: Iterator[Plugin]) -> Iterator[Plugin]:
+        while True:
+            start = perf_counter()
+
+            try:
+                plugin = next(plugins)
+            except StopIteration:
+                self.stats.add_find_time(perf_counter() - start)
+                return
+
+            self.stats.add_find_time(perf_counter() - start, plugins=1)
+            yield plugin
+
+    def load(self, plugin: Plugin) -> Any:
+        start = perf_counter()
+
+        try:
+            return self.inner.load(plugin)
+        finally:
+            self.stats.add_load_time(perf_counter() - start)
@@ -1,9 +1,20 @@
+import re
+import threading
+import time
+from contextlib import ExitStack
+from logging import getLogger
 from typing import (
+    Any,
     Callable,
     Collection,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterator,
     List,
     Literal,
     Optional,
+    Pattern,
     Tuple,
     TypedDict,
     TypeVar,
@@ -15,42 +26,306 @@ from typing import (
 from grappler import Grappler, Package, Plugin
 
 from ._bouncer import BouncerGrappler
+from ._id_table import IdTable
+from ._query import Query
+from ._spec_index import _SpecIndex
 
+LOG = getLogger(__name__)
 G_Listing = TypeVar("G_Listing", bound="_ListGrapplerMixin")
 
 
 class PluginSpec(TypedDict, total=False):
     grappler_id: str
-    plugin_id: str
-    topics: Tuple[str, ...]
-    name: str
+    plugin_id: Union[str, Pattern[str]]
+    topics: Union[Tuple[str, ...], Pattern[str]]
+    name: Union[str, Pattern[str]]
+    capabilities: Tuple[str, ...]
 
 
 class PackageSpec(TypedDict, total=False):
-    name: str
+    name: Union[str, Pattern[str]]
     version: str
-    id: str
+    id: Union[str, Pattern[str]]
     platform: Optional[str]
 
 
+def glob_pattern(pattern: str, /) -> Pattern[str]:
+    """Compile a shell-style wildcard pattern, for use in a
+    [`PluginSpec`][grappler.grapplers.PluginSpec] or
+    [`PackageSpec`][grappler.grapplers.PackageSpec].
+
+    `*` matches any sequence of characters, `?` matches any single
+    character, and `[seq]` (or `[!seq]`) matches any character in (or not
+    in) `seq`, as with [fnmatch.fnmatchcase][]. Matching is case-sensitive.
+
+    ```python
+    grappler.blacklist({"plugin_id": glob_pattern("acme.*")}, type="plugin")
+    ```
+    """
+    # Unlike fnmatch.translate(), this doesn't use groups, so that the
+    # pattern can be combined with the other patterns of a list.
+    parts: List[str] = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        i += 1
+
+        if c == "*":
+            if not parts or parts[-1] != ".*":
+                parts.append(".*")
+        elif c == "?":
+            parts.append(".")
+        elif c == "[":
+            j = i
+
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+
+            if j >= n:
+                parts.append("\\[")
+            else:
+                stuff = re.sub(r"([&~|\\])", r"\\\1", pattern[i:j])
+                i = j + 1
+
+                if stuff[0] == "!":
+                    stuff = "^" + stuff[1:]
+                elif stuff[0] in ("^", "["):
+                    stuff = "\\" + stuff
+
+                parts.append(f"[{stuff}]")
+        else:
+            parts.append(re.escape(c))
+
+    return re.compile("".join(parts), re.DOTALL)
+
+
 PluginAndPackageListFactory = Callable[[], Collection[Union[Plugin, Package]]]
+T_Item = TypeVar("T_Item")
+
+
+class _ItemList(List[T_Item]):
+    # a list which counts the changes made to it, so that whatever is
+    # compiled from it (see _CompiledSpecs) is rebuilt once it changes,
+    # however it is changed
+    version = 0
+
+
+def _counting(name: str) -> Callable[..., Any]:
+    method = getattr(list, name)
+
+    def counting_method(self: _ItemList[Any], *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self.version += 1
+        return result
+
+    return counting_method
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(_ItemList, _name, _counting(_name))
+
+
+class _CompiledSpecs:
+    # the specification lists compiled into indexes; shared between a list
+    # grappler and its rewrapped copies, so that they are compiled only once
+    # every time the lists change.
+    def __init__(self) -> None:
+        self.key: Optional[Tuple[int, int]] = None
+        self._lists: Tuple[List[Any], ...] = ()
+        self.plugins = self.packages = _SpecIndex(())
+        self._queries: Dict[bool, Tuple[Query, ...]] = {}
+
+    def get(
+        self,
+        plugin_items: _ItemList[PluginSpec],
+        package_items: _ItemList[PackageSpec],
+    ) -> Tuple[_SpecIndex, _SpecIndex]:
+        # the lists count their changes, so the indexes are up to date while
+        # the same lists have the same versions
+        lists = (plugin_items, package_items)
+        key = (plugin_items.version, package_items.version)
+
+        if key != self.key or any(a is not b for a, b in zip(lists, self._lists)):
+            self.plugins = _SpecIndex(plugin_items)
+            self.packages = _SpecIndex(package_items)
+            self._queries = {}
+            self._lists = lists
+            self.key = key
+
+        return self.plugins, self.packages
+
+    def queries(self, *, exclude: bool) -> Tuple[Query, ...]:
+        # the queries implied by the listed ids, as of the last call to get()
+        if exclude not in self._queries:
+            self._queries[exclude] = _id_queries(
+                self.plugins, self.packages, exclude=exclude
+            )
+
+        return self._queries[exclude]
+
+
+def _id_queries(
+    plugins: _SpecIndex, packages: _SpecIndex, *, exclude: bool
+) -> Tuple[Query, ...]:
+    plugin_ids = plugins.values.get("plugin_id")
+    package_ids = packages.values.get("id")
+
+    if exclude:
+        # every listed id is excluded, whatever else is listed
+        return (
+            *([Query.not_in("plugin_id", plugin_ids)] if plugin_ids else []),
+            *([Query.not_in("package.id", package_ids)] if package_ids else []),
+        )
+
+    # plugins are included when they match *any* item, which can only be
+    # expressed as a query when the items are all ids of the same field
+    if not (plugins.only_values and packages.only_values):
+        return ()
+    elif plugin_ids and plugins.values.keys() == {"plugin_id"} and not packages.values:
+        return (Query.is_in("plugin_id", plugin_ids),)
+    elif package_ids and packages.values.keys() == {"id"} and not plugins.values:
+        return (Query.is_in("package.id", package_ids),)
+    else:
+        return ()
+
+
+class _DynamicItems:
+    # the ids listed by the dynamic item factories, cached between checks;
+    # shared between a list grappler and its rewrapped copies.
+    def __init__(self) -> None:
+        self.ttl: Optional[float] = None
+        self.background = False
+        self.plugin_ids: FrozenSet[str] = frozenset()
+        self.package_ids: FrozenSet[str] = frozenset()
+        self._factories: Optional[Tuple[PluginAndPackageListFactory, ...]] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def configure(self, ttl: Optional[float], background: bool) -> None:
+        with self._lock:
+            self.ttl = ttl
+            self.background = background
+            self._expires = 0.0
+
+    def start_find(self, factories: List[PluginAndPackageListFactory]) -> None:
+        if self.ttl is None and factories:
+            self._refresh(factories)
+        else:
+            self.get(factories)
+
+    def get(
+        self, factories: List[PluginAndPackageListFactory]
+    ) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        if self._factories != tuple(factories):
+            self._refresh(factories)
+        elif self.ttl is not None and time.monotonic() >= self._expires:
+            if not self.background:
+                self._refresh(factories)
+            else:
+                with self._lock:
+                    if self._refreshing:
+                        return (self.plugin_ids, self.package_ids)
+                    self._refreshing = True
+
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    args=(list(factories),),
+                    name="grappler-dynamic-items",
+                    daemon=True,
+                ).start()
+
+        return (self.plugin_ids, self.package_ids)
+
+    def _refresh(self, factories: List[PluginAndPackageListFactory]) -> None:
+        # the expiry is computed before calling the factories, so that the
+        # results are never older than the ttl
+        expires = time.monotonic() + (self.ttl or 0.0)
+        items = [item for factory in factories for item in factory()]
+
+        plugin_ids = frozenset(
+            item.plugin_id for item in items if isinstance(item, Plugin)
+        )
+        package_ids = frozenset(item.id for item in items if isinstance(item, Package))
+
+        with self._lock:
+            # unchanged ids are kept as the same objects, so that comparing
+            # them (see _ListGrapplerMixin._list_version) stays cheap
+            if plugin_ids != self.plugin_ids:
+                self.plugin_ids = plugin_ids
+            if package_ids != self.package_ids:
+                self.package_ids = package_ids
+            self._factories = tuple(factories)
+            self._expires = expires
+
+    def _refresh_in_background(
+        self, factories: List[PluginAndPackageListFactory]
+    ) -> None:
+        try:
+            self._refresh(factories)
+        except Exception:
+            LOG.exception("Failed to refresh dynamic list items; keeping old items.")
+        finally:
+            self._refreshing = False
 
 
 class _ListGrapplerMixin:
-    plugin_items: List[PluginSpec]
-    package_items: List[PackageSpec]
+    _plugin_items: _ItemList[PluginSpec]
+    _package_items: _ItemList[PackageSpec]
     dynamic_items: List[PluginAndPackageListFactory]
+    id_tables: List[IdTable]
 
     def __init__(self, items: Collection[Union[Plugin, Package]]) -> None:
         self.plugin_items = []
         self.package_items = []
         self.dynamic_items = []
+        self.id_tables = []
+        self._compiled = _CompiledSpecs()
+        self._dynamic = _DynamicItems()
 
         for item in items:
             self._add_item(item)
 
+    @property
+    def plugin_items(self) -> List[PluginSpec]:
+        """The plugin specifications of the list."""
+        return self._plugin_items
+
+    @plugin_items.setter
+    def plugin_items(self, items: List[PluginSpec]) -> None:
+        self._plugin_items = items if isinstance(items, _ItemList) else _ItemList(items)
+
+    @property
+    def package_items(self) -> List[PackageSpec]:
+        """The package specifications of the list."""
+        return self._package_items
+
+    @package_items.setter
+    def package_items(self, items: List[PackageSpec]) -> None:
+        self._package_items = (
+            items if isinstance(items, _ItemList) else _ItemList(items)
+        )
+
     @overload
-    def _add_item(self, item: Union[Plugin, Package], /) -> None:
+    def _add_item(self, item: Union[Plugin, Package, IdTable], /) -> None:
         ...
 
     @overload
@@ -72,6 +347,7 @@ class _ListGrapplerMixin:
         item: Union[
             Plugin,
             Package,
+            IdTable,
             PluginAndPackageListFactory,
             PluginSpec,
             PackageSpec,
@@ -85,6 +361,9 @@ class _ListGrapplerMixin:
             return self._add_item({"plugin_id": item.plugin_id}, type="plugin")
         elif isinstance(item, Package):
             return self._add_item({"id": item.id}, type="package")
+        elif isinstance(item, IdTable):
+            self.id_tables.append(item)
+            return None
         elif isinstance(item, dict):
             if type is None:
                 raise TypeError(
@@ -104,74 +383,81 @@ class _ListGrapplerMixin:
             return item
 
     def _is_listed(self, plugin: Plugin) -> bool:
-        dynamic_items = {
-            plugin_or_pkg
-            for factory in self.dynamic_items
-            for plugin_or_pkg in factory()
-        }
-        plugin_specs = [
-            *self.plugin_items,
-            *(
-                PluginSpec(plugin_id=item.plugin_id)
-                for item in dynamic_items
-                if isinstance(item, Plugin)
-            ),
-        ]
-        package_specs = [
-            *self.package_items,
-            *(
-                PackageSpec(id=item.id)
-                for item in dynamic_items
-                if isinstance(item, Package)
-            ),
-        ]
-
-        for plugin_spec in plugin_specs:
-            if self._matches_spec(plugin_spec, plugin):
-                return True
+        plugin_index, package_index = self._compiled.get(
+            self._plugin_items, self._package_items
+        )
+
+        if plugin_index.matches(plugin) or package_index.matches(plugin.package):
+            return True
 
-        for package_spec in package_specs:
-            if self._matches_spec(package_spec, plugin.package):
+        for table in self.id_tables:
+            if table.has_plugin_id(plugin.plugin_id) or table.has_package_id(
+                plugin.package.id
+            ):
                 return True
 
-        return False
+        if not self.dynamic_items:
+            return False
 
-    @overload
-    def _matches_spec(self, spec: PluginSpec, item: Plugin) -> bool:
-        ...
+        plugin_ids, package_ids = self._dynamic.get(self.dynamic_items)
+        return plugin.plugin_id in plugin_ids or plugin.package.id in package_ids
 
-    @overload
-    def _matches_spec(self, spec: PackageSpec, item: Package) -> bool:
-        ...
-
-    def _matches_spec(
-        self,
-        spec: Union[PluginSpec, PackageSpec],
-        item: Union[Plugin, Package],
-    ) -> bool:
-        for field, spec_val in spec.items():
-            if not hasattr(item, field):
-                return False
-
-            item_val = getattr(item, field)
-
-            if not isinstance(spec_val, str) and isinstance(spec_val, Collection):
-                if not isinstance(item_val, str) and isinstance(item_val, Collection):
-                    if not set(spec_val).issubset(item_val):
-                        return False
-                    else:
-                        continue
-                elif item_val not in spec_val:
-                    return False
-            elif spec_val != item_val:
-                return False
-        else:
-            return True
+    def cache_dynamic_items(
+        self, ttl: Optional[float] = None, /, *, background: bool = False
+    ) -> None:
+        """Choose how long the items returned by list functions are reused for.
+
+        By default, every function registered to provide items for the list
+        is called once at the start of every search for plugins, and the
+        items it returns are used to check every plugin found by the search.
+
+        Args:
+            ttl: When given, the items are instead reused for this many
+                 seconds, across searches, before the functions are called
+                 again.
+            background: Whether the functions should be called on a
+                        background thread once the `ttl` expires. Until they
+                        return, the expired items continue to be used, so
+                        that searches never wait on slow functions.
+        """
+        if background and ttl is None:
+            raise ValueError("A ttl must be given to refresh items in the background.")
+
+        self._dynamic.configure(ttl, background)
+
+    def _list_queries(self, *, exclude: bool) -> Tuple[Query, ...]:
+        # queries implied by the listed ids (see BouncerGrappler.queries); a
+        # list which includes plugins can't be expressed as queries when
+        # some of its items are only known while checking plugins
+        if not exclude and (self.id_tables or self.dynamic_items):
+            return ()
+
+        self._compiled.get(self._plugin_items, self._package_items)
+        return self._compiled.queries(exclude=exclude)
+
+    def _list_version(self) -> Hashable:
+        # identifies the listed items, so that decisions based on them are
+        # discarded when they change (see BouncerGrappler.cache_decisions)
+        return (
+            id(self._plugin_items),
+            self._plugin_items.version,
+            id(self._package_items),
+            self._package_items.version,
+            len(self.id_tables),
+            tuple(self.dynamic_items),
+            self._dynamic.plugin_ids,
+            self._dynamic.package_ids,
+        )
 
     def _copy_config(self, other: G_Listing) -> G_Listing:
-        other.dynamic_items[:] = self.dynamic_items
-        other.package_items[:] = self.package_items
-        other.plugin_items[:] = self.plugin_items
+        # the lists are shared (not copied), so that later changes to
+        # this grappler's list also apply to its rewrapped copies.
+        other.dynamic_items = self.dynamic_items
+        other._package_items = self._package_items
+        other._plugin_items = self._plugin_items
+        other.id_tables = self.id_tables
+        other._compiled = self._compiled
+        other._dynamic = self._dynamic
         return other
 
 
@@ -198,8 +484,20 @@ class BlacklistingGrappler(BouncerGrappler, _ListGrapplerMixin):
     def _is_not_listed(self, plugin: Plugin) -> bool:
         return not self._is_listed(plugin)
 
+    def iter_plugins(
+        self, topic: Optional[str], exit_stack: ExitStack, /
+    ) -> Iterator[Tuple[Plugin, None]]:
+        self._dynamic.start_find(self.dynamic_items)
+        return super().iter_plugins(topic, exit_stack)
+
     def rewrap(self, grappler: Grappler, /) -> "BlacklistingGrappler":
-        return self._copy_config(BlacklistingGrappler(grappler))
+        return self._copy_config(self._share_config(BlacklistingGrappler(grappler)))
+
+    def queries(self) -> Collection[Query]:
+        return (*super().queries(), *self._list_queries(exclude=True))
+
+    def _decision_version(self) -> Hashable:
+        return (super()._decision_version(), self._list_version())
 
     blacklist = _ListGrapplerMixin._add_item
     """Add an item to the blacklist.
@@ -213,6 +511,9 @@ class BlacklistingGrappler(BouncerGrappler, _ListGrapplerMixin):
     grappler.blacklist(plugin_or_package: Union[Plugin, Package]) -> None:
         ...
 
+    grappler.blacklist(id_table: IdTable) -> None:
+        ...
+
     @grappler.blacklist
     def get_blacklisted_plugins() -> List[Union[Plugin, Package]]:
         return [...]
@@ -220,7 +521,12 @@ class BlacklistingGrappler(BouncerGrappler, _ListGrapplerMixin):
 
     These forms will blacklist plugins or entire packages *by their ids*.
     This means that no attempts will be made to match names or any other
-    fields on the plugin on package before blocking it.
+    fields on the plugin on package before blocking it. An
+    [`IdTable`][grappler.grapplers.IdTable] lists the ids of many plugins
+    and packages at once, from a file. Functions are
+    called once per search for plugins rather than once per plugin (see
+    [`cache_dynamic_items()`][grappler.grapplers.BlacklistingGrappler.cache_dynamic_items]
+    to reuse their items for longer).
 
     ## Structural matching
 
@@ -262,7 +568,15 @@ class BlacklistingGrappler(BouncerGrappler, _ListGrapplerMixin):
             blacklist only packages that either have
             `package.platform == 'win32'` or `package.platform == 'mac'`.
 
-    3. In all other cases, a match only occurs when the attribute is
+    3. If the field in the specification is a compiled regular expression
+       (see also [`glob_pattern()`][grappler.grapplers.glob_pattern]), then
+       it matches when the pattern matches the whole attribute, or when the
+       attribute is a collection, the whole of any of its members. e.g.
+       `{"plugin_id": re.compile(r"acme\\..*")}` matches every plugin whose
+       id starts with `acme.`. All the patterns given for a field are
+       combined, so that they are tried at once.
+
+    4. In all other cases, a match only occurs when the attribute is
        equal to the field specification.
 
     All fields in the specification must match a plugin/package for it
@@ -286,8 +600,20 @@ class WhitelistingGrappler(BouncerGrappler, _ListGrapplerMixin):
         # Install BouncerGrappler.checker to reject non listed plugins
         self.checker(self._is_listed)
 
+    def iter_plugins(
+        self, topic: Optional[str], exit_stack: ExitStack, /
+    ) -> Iterator[Tuple[Plugin, None]]:
+        self._dynamic.start_find(self.dynamic_items)
+        return super().iter_plugins(topic, exit_stack)
+
     def rewrap(self, grappler: Grappler, /) -> "WhitelistingGrappler":
-        return self._copy_config(WhitelistingGrappler(grappler))
+        return self._copy_config(self._share_config(WhitelistingGrappler(grappler)))
+
+    def queries(self) -> Collection[Query]:
+        return (*super().queries(), *self._list_queries(exclude=False))
+
+    def _decision_version(self) -> Hashable:
+        return (super()._decision_version(), self._list_version())
 
     whitelist = _ListGrapplerMixin._add_item
     """
@@ -0,0 +1,217 @@
+import json
+import os
+import tempfile
+from contextlib import ExitStack
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import importlib_metadata as metadata
+
+from grappler import Grappler, Package, Plugin
+
+from ._entry_point import EntryPointGrappler
+from ._target import _find_targets, _PluginTarget
+from .bases import PluginPairGrapplerBase
+
+LOG = getLogger(__name__)
+_FORMAT = "grappler-manifest"
+_VERSION = 1
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+class InvalidManifestError(ValueError):
+    """Raised when a file is not a valid plugin manifest."""
+
+
+class StaleManifestError(InvalidManifestError):
+    """Raised when the packages listed by a manifest are not installed (at
+    the same versions) in the environment."""
+
+    def __init__(self, path: str, packages: Sequence[Package]) -> None:
+        super().__init__(
+            f"Manifest is out of date ({path}): "
+            + ", ".join(f"{package.name} {package.version}" for package in packages)
+        )
+        self.path = path
+        self.packages = packages
+
+
+def write_manifest(
+    path: Path, grappler: Grappler, /, *, topics: Optional[Iterable[str]] = None
+) -> int:
+    """Write the plugins found by a grappler to a manifest file, to be
+    served by a [`ManifestGrappler`][grappler.grapplers.ManifestGrappler].
+
+    The plugins are found exactly as they would be by a hook, so every
+    wrapper of the grappler (e.g. bouncers and lists) is applied to them
+    before they are written. Only plugins which can be imported without
+    the grappler that found them (e.g. those from an
+    [`EntryPointGrappler`][grappler.grapplers.EntryPointGrappler]) can be
+    written; other plugins are skipped, with a warning.
+
+    The file is replaced atomically.
+
+    Args:
+        path: The path of the file to write.
+        grappler: The grappler to find plugins from.
+        topics: When given, only the plugins of these topics are found
+                (each topic is found separately). By default, every plugin
+                is found at once.
+
+    Returns:
+        The number of plugins which were written.
+    """
+    packages: Dict[Package, int] = {}
+    plugins = [
+        [
+            plugin.grappler_id,
+            plugin.plugin_id,
+            packages.setdefault(plugin.package, len(packages)),
+            plugin.topics,
+            plugin.name,
+            plugin.capabilities,
+            str(target),
+        ]
+        for plugin, target in _find_targets(grappler, topics).items()
+    ]
+
+    content = {
+        "format": _FORMAT,
+        "version": _VERSION,
+        "packages": list(packages),
+        "plugins": plugins,
+    }
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(content, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return len(plugins)
+
+
+class ManifestGrappler(PluginPairGrapplerBase[_PluginTarget]):
+    """
+    A grappler which serves the plugins listed by a manifest file.
+
+    Manifests are written with
+    [`write_manifest()`][grappler.grapplers.write_manifest], from the
+    plugins found by any grappler. This is useful when the plugins are
+    fixed when an application is deployed: the manifest can be written
+    once (e.g. when building the deployment), so that the application
+    doesn't need to scan the environment for plugins, or to filter them,
+    every time that it starts:
+
+    ```python
+    # at build time
+    write_manifest("plugins.json", composite_grappler)
+
+    # at run time
+    grappler = ManifestGrappler("plugins.json", check=True)
+    ```
+
+    Plugins are found with the same fields as when the manifest was
+    written (including their `grappler_id`), and loaded by importing
+    their object directly. Checks which are only made when plugins are
+    loaded (e.g. those of a
+    [`BouncerGrappler`][grappler.grapplers.BouncerGrappler] with
+    `mode=Mode.LOAD`) are not part of the manifest.
+
+    Args:
+        path: The path of the manifest file.
+        check: Whether to raise a `StaleManifestError` when any package
+               of the manifest isn't installed at the version that it
+               was written with (see
+               [`stale_packages()`][grappler.grapplers.ManifestGrappler.stale_packages]).
+    """  # noqa: E501
+
+    id = "grappler.grapplers.manifest"
+
+    InvalidManifestError = InvalidManifestError
+    StaleManifestError = StaleManifestError
+
+    def __init__(self, path: Path, *, check: bool = False) -> None:
+        self.path = os.fspath(path)
+        self._plugins: List[Tuple[Plugin, _PluginTarget]] = []
+        self._topics: Dict[str, List[Tuple[Plugin, _PluginTarget]]] = {}
+        self.packages: Sequence[Package] = ()
+        # the packages of entry point plugins, which are installed
+        # distributions; other sources (e.g. directories or wheels) have
+        # packages which can't be checked against the environment
+        self._distributions: Dict[Package, None] = {}
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+
+            if content.get("format") != _FORMAT or content.get("version") != _VERSION:
+                raise ValueError("unknown format")
+
+            packages = [Package(*package) for package in content["packages"]]
+            self.packages = packages
+
+            for record in content["plugins"]:
+                grappler_id, plugin_id, package, topics, name, caps, target = record
+                plugin = Plugin(
+                    grappler_id,
+                    plugin_id,
+                    packages[package],
+                    tuple(topics),
+                    name,
+                    tuple(caps),
+                )
+                pair = (plugin, _PluginTarget.parse(target))
+                self._plugins.append(pair)
+
+                if (
+                    grappler_id == EntryPointGrappler.id
+                    and plugin.package != EntryPointGrappler.unknown_package
+                ):
+                    self._distributions[plugin.package] = None
+
+                for topic in dict.fromkeys(plugin.topics):
+                    self._topics.setdefault(topic, []).append(pair)
+        except (ValueError, TypeError, LookupError, AttributeError) as e:
+            raise InvalidManifestError(f"Not a plugin manifest: {self.path}") from e
+
+        if check:
+            stale = self.stale_packages()
+
+            if stale:
+                raise StaleManifestError(self.path, stale)
+
+    def stale_packages(self) -> List[Package]:
+        """Return the packages of the manifest which are not installed in the
+        environment at the version that the manifest was written with.
+
+        Only the packages of plugins which were found from installed
+        distributions (i.e. by an
+        [`EntryPointGrappler`][grappler.grapplers.EntryPointGrappler]) are
+        checked."""
+        stale = []
+
+        for package in self._distributions:
+            try:
+                installed = metadata.version(package.id)
+            except metadata.PackageNotFoundError:
+                installed = None
+
+            if installed != package.version:
+                stale.append(package)
+
+        return stale
+
+    def iter_plugins(
+        self, topic: Optional[str], _: ExitStack, /
+    ) -> Iterable[Tuple[Plugin, _PluginTarget]]:
+        return self._plugins if topic is None else self._topics.get(topic, ())
+
+    def load_with_pair(self, _: Plugin, target: _PluginTarget, /) -> Any:
+        return target.load()
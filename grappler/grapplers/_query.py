@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Protocol,
+    TypeVar,
+    runtime_checkable,
+)
+
+from grappler import Grappler, Plugin
+
+G_Self = TypeVar("G_Self", bound=Grappler)
+
+# the fields of a plugin (or its package) that queries can filter on
+_QUERY_FIELDS = (
+    "grappler_id",
+    "plugin_id",
+    "topics",
+    "name",
+    "capabilities",
+    "package.name",
+    "package.version",
+    "package.id",
+    "package.platform",
+)
+# fields whose values are collections; they match when any member does
+_COLLECTION_FIELDS = ("topics", "capabilities")
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    A declarative filter on plugins, which grapplers can apply at their
+    source.
+
+    A query matches plugins whose `field` has one of the given `values`
+    (or, when `exclude` is set, none of them). For fields which are
+    collections (`topics` and `capabilities`), a query matches when any
+    member of the collection is one of the values. The fields of the
+    plugin's package are given with a `package.` prefix, e.g.
+    `package.id`.
+
+    Unlike checker functions, queries say *what* they filter on; so sources
+    which support it (see
+    [`EntryPointGrappler.restricted()`][grappler.grapplers.EntryPointGrappler.restricted])
+    can skip the plugins that a query excludes before building them, e.g.
+    without reading the metadata of a package which is blacklisted:
+
+    ```python
+    bouncer = BouncerGrappler()
+    bouncer.query(Query.not_in("package.id", {"unwanted-package"}))
+    bouncer.query(Query.equals("topics", "app.formatters"))
+    ```
+
+    [`CompositeGrappler`][grappler.grapplers.CompositeGrappler] pushes the
+    queries of its wrappers down to its sources in this way.
+    """  # noqa: E501
+
+    field: str
+    values: FrozenSet[Hashable]
+    exclude: bool = False
+
+    def __post_init__(self) -> None:
+        if self.field not in _QUERY_FIELDS:
+            raise ValueError(f"Can't query plugins by field: {self.field!r}")
+
+    @classmethod
+    def equals(cls, field: str, value: Hashable, /) -> "Query":
+        """Return a query for plugins whose `field` is `value`."""
+        return cls(field, frozenset((value,)))
+
+    @classmethod
+    def is_in(cls, field: str, values: Iterable[Hashable], /) -> "Query":
+        """Return a query for plugins whose `field` is one of `values`."""
+        return cls(field, frozenset(values))
+
+    @classmethod
+    def not_in(cls, field: str, values: Iterable[Hashable], /) -> "Query":
+        """Return a query for plugins whose `field` is none of `values`."""
+        return cls(field, frozenset(values), exclude=True)
+
+    def matches(self, plugin: Plugin, /) -> bool:
+        """Return whether the plugin matches the query."""
+        if self.field.startswith("package."):
+            value = getattr(plugin.package, self.field[len("package.") :])  # noqa: E203
+        else:
+            value = getattr(plugin, self.field)
+
+        return self.matches_value(value)
+
+    def matches_value(self, value: Any, /) -> bool:
+        """Return whether a value of the query's field matches the query."""
+        if self.field in _COLLECTION_FIELDS:
+            found = any(member in self.values for member in value)
+        else:
+            try:
+                found = value in self.values
+            except TypeError:  # unhashable
+                found = False
+
+        return found != self.exclude
+
+
+QueryProvider = Callable[[], Iterable[Query]]
+"""Returns the queries that plugins must match, each time plugins are found."""
+
+
+def _no_queries() -> Collection[Query]:
+    return ()
+
+
+@runtime_checkable
+class _RestrictableGrappler(Grappler, Protocol):
+    def restricted(self: G_Self, queries: QueryProvider, /) -> G_Self:
+        """Return a copy of the grappler which only finds matching plugins."""
+
+
+@runtime_checkable
+class _QueryingGrappler(Grappler, Protocol):
+    def queries(self) -> Collection[Query]:
+        """Return queries which every plugin found by the grappler matches."""
@@ -0,0 +1,321 @@
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import ExitStack
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from grappler import Grappler, Package, Plugin
+
+from ._id_table import _SortedIds, _table_size, _write_table
+from ._target import _find_targets, _PluginTarget
+from .bases import PluginPairGrapplerBase
+
+_MAGIC = b"GRPLREG1"
+# magic, then the (count, offset) of the string, list, package, plugin and
+# topic tables
+_HEADER = struct.Struct("<8s10Q")
+# the strings of packages and plugins are indexes into the (sorted) string
+# table, and their topics and capabilities are (start, count) slices of the
+# list table, which is an array of indexes
+_INDEX = struct.Struct("<I")
+_PACKAGE = struct.Struct("<4I")
+_PLUGIN = struct.Struct("<9I")
+# topic (string index), and a slice of the list table holding its plugins
+_TOPIC = struct.Struct("<3I")
+_NONE = 0xFFFFFFFF
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+class InvalidRegistryError(ValueError):
+    """Raised when a file is not a valid plugin registry."""
+
+
+def write_registry(
+    path: Path, grappler: Grappler, /, *, topics: Optional[Iterable[str]] = None
+) -> int:
+    """Write the plugins found by a grappler to a registry file, to be
+    shared by the processes of a host with a
+    [`RegistryGrappler`][grappler.grapplers.RegistryGrappler].
+
+    Plugins are found and written like those of a manifest (see
+    [`write_manifest()`][grappler.grapplers.write_manifest]). The file is
+    replaced atomically, so that processes which have the previous
+    version of the registry open can keep using it.
+
+    Args:
+        path: The path of the file to write.
+        grappler: The grappler to find plugins from.
+        topics: When given, only the plugins of these topics are found
+                (each topic is found separately). By default, every plugin
+                is found at once.
+
+    Returns:
+        The number of plugins which were written.
+    """
+    plugins = _find_targets(grappler, topics)
+    packages = list(dict.fromkeys(plugin.package for plugin in plugins))
+
+    strings = sorted(
+        {
+            value.encode("utf-8")
+            for package in packages
+            for value in package
+            if value is not None
+        }
+        | {
+            value.encode("utf-8")
+            for plugin, target in plugins.items()
+            for value in (
+                plugin.grappler_id,
+                plugin.plugin_id,
+                plugin.name,
+                str(target),
+                *plugin.topics,
+                *plugin.capabilities,
+            )
+            if value is not None
+        }
+    )
+    string_indexes = {value: index for index, value in enumerate(strings)}
+
+    def index_of(value: Optional[str]) -> int:
+        return _NONE if value is None else string_indexes[value.encode("utf-8")]
+
+    lists: List[int] = []
+    plugin_records = []
+    topic_plugins: Dict[int, List[int]] = {}
+
+    def add_list(values: Iterable[int]) -> Tuple[int, int]:
+        start = len(lists)
+        lists.extend(values)
+        return start, len(lists) - start
+
+    package_indexes = {package: index for index, package in enumerate(packages)}
+
+    for plugin_index, (plugin, target) in enumerate(plugins.items()):
+        topic_indexes = [index_of(topic) for topic in plugin.topics]
+        plugin_records.append(
+            _PLUGIN.pack(
+                index_of(plugin.grappler_id),
+                index_of(plugin.plugin_id),
+                package_indexes[plugin.package],
+                index_of(plugin.name),
+                index_of(str(target)),
+                *add_list(topic_indexes),
+                *add_list(index_of(value) for value in plugin.capabilities),
+            )
+        )
+
+        for topic_index in dict.fromkeys(topic_indexes):
+            topic_plugins.setdefault(topic_index, []).append(plugin_index)
+
+    topic_records = [
+        _TOPIC.pack(topic_index, *add_list(topic_plugins[topic_index]))
+        for topic_index in sorted(topic_plugins)
+    ]
+    package_records = [
+        _PACKAGE.pack(*(index_of(value) for value in package)) for package in packages
+    ]
+
+    string_offset = _HEADER.size
+    list_offset = string_offset + _table_size(strings)
+    package_offset = list_offset + _INDEX.size * len(lists)
+    plugin_offset = package_offset + _PACKAGE.size * len(package_records)
+    topic_offset = plugin_offset + _PLUGIN.size * len(plugin_records)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    len(strings),
+                    string_offset,
+                    len(lists),
+                    list_offset,
+                    len(package_records),
+                    package_offset,
+                    len(plugin_records),
+                    plugin_offset,
+                    len(topic_records),
+                    topic_offset,
+                )
+            )
+            _write_table(f, strings)
+            f.write(struct.pack(f"<{len(lists)}I", *lists))
+            f.writelines(package_records)
+            f.writelines(plugin_records)
+            f.writelines(topic_records)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return len(plugin_records)
+
+
+class RegistryGrappler(PluginPairGrapplerBase[int]):
+    """
+    A grappler which serves the plugins of a registry file, which is shared
+    by every process that uses it.
+
+    Registries are written with
+    [`write_registry()`][grappler.grapplers.write_registry], from the
+    plugins found by any grappler. This is useful when many processes on
+    a host (e.g. the workers of a server) need the same plugins: one
+    process finds the plugins and writes the registry, and every other
+    process attaches to it, instead of finding the plugins itself:
+
+    ```python
+    # in the parent process, before starting the workers
+    write_registry("/run/app/plugins.reg", composite_grappler)
+
+    # in each worker
+    grappler = RegistryGrappler("/run/app/plugins.reg")
+    ```
+
+    The registry is a compact binary file, which is memory mapped (read
+    only) rather than read, so attaching to it is fast regardless of its
+    size, and its pages are shared between the processes. Finding plugins
+    reads their records directly from it (the plugins of a topic are
+    indexed), and plugins are loaded by importing their object directly,
+    like those of a [`ManifestGrappler`][grappler.grapplers.ManifestGrappler].
+
+    Args:
+        path: The path of the registry file.
+    """  # noqa: E501
+
+    id = "grappler.grapplers.registry"
+
+    InvalidRegistryError = InvalidRegistryError
+
+    def __init__(self, path: Path) -> None:
+        self.path = os.fspath(path)
+
+        with open(self.path, "rb") as f:
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # an empty file
+                raise InvalidRegistryError(f"Not a plugin registry: {self.path}") from e
+
+        if len(self._buffer) < _HEADER.size or self._buffer[: len(_MAGIC)] != _MAGIC:
+            self._buffer.close()
+            raise InvalidRegistryError(f"Not a plugin registry: {self.path}")
+
+        (
+            _,
+            string_count,
+            string_offset,
+            self._list_count,
+            self._list_offset,
+            self._package_count,
+            self._package_offset,
+            self._plugin_count,
+            self._plugin_offset,
+            self._topic_count,
+            self._topic_offset,
+        ) = _HEADER.unpack_from(self._buffer)
+        self._strings = _SortedIds(self._buffer, string_count, string_offset)
+
+    def __enter__(self) -> "RegistryGrappler":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file. Plugins can't be found or loaded after the
+        registry is closed."""
+        self._buffer.close()
+
+    def iter_plugins(
+        self, topic: Optional[str], _: ExitStack, /
+    ) -> Iterable[Tuple[Plugin, int]]:
+        indexes: Iterable[int] = (
+            range(self._plugin_count) if topic is None else self._topic_plugins(topic)
+        )
+        packages: Dict[int, Package] = {}
+
+        for index in indexes:
+            yield self._plugin(index, packages), index
+
+    def load_with_pair(self, _: Plugin, index: int, /) -> Any:
+        target = _PLUGIN.unpack_from(
+            self._buffer, self._plugin_offset + index * _PLUGIN.size
+        )[4]
+        return _PluginTarget.parse(self._string(target)).load()
+
+    def _topic_plugins(self, topic: str) -> Iterator[int]:
+        string_index = self._strings.index(topic.encode("utf-8"))
+
+        if string_index is None:
+            return
+
+        # topics are sorted by their string index, so they can be searched
+        low, high = 0, self._topic_count
+
+        while low < high:
+            middle = (low + high) // 2
+            record = _TOPIC.unpack_from(
+                self._buffer, self._topic_offset + middle * _TOPIC.size
+            )
+
+            if record[0] < string_index:
+                low = middle + 1
+            elif record[0] > string_index:
+                high = middle
+            else:
+                yield from self._list(record[1], record[2])
+                return
+
+    def _plugin(self, index: int, packages: Dict[int, Package]) -> Plugin:
+        (
+            grappler_id,
+            plugin_id,
+            package,
+            name,
+            _,
+            topics_start,
+            topics_count,
+            capabilities_start,
+            capabilities_count,
+        ) = _PLUGIN.unpack_from(
+            self._buffer, self._plugin_offset + index * _PLUGIN.size
+        )
+
+        if package not in packages:
+            packages[package] = self._package(package)
+
+        return Plugin(
+            grappler_id=self._string(grappler_id),
+            plugin_id=self._string(plugin_id),
+            package=packages[package],
+            topics=tuple(map(self._string, self._list(topics_start, topics_count))),
+            name=None if name == _NONE else self._string(name),
+            capabilities=tuple(
+                map(self._string, self._list(capabilities_start, capabilities_count))
+            ),
+        )
+
+    def _package(self, index: int) -> Package:
+        name, version, id, platform = _PACKAGE.unpack_from(
+            self._buffer, self._package_offset + index * _PACKAGE.size
+        )
+        return Package(
+            self._string(name),
+            self._string(version),
+            self._string(id),
+            None if platform == _NONE else self._string(platform),
+        )
+
+    def _list(self, start: int, count: int) -> Tuple[int, ...]:
+        return struct.unpack_from(
+            f"<{count}I", self._buffer, self._list_offset + start * _INDEX.size
+        )
+
+    def _string(self, index: int) -> str:
+        return self._strings[index].decode("utf-8")
@@ -0,0 +1,283 @@
+import re
+from collections.abc import Collection
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Set, Tuple
+
+_MISSING: Any = object()
+
+# (field, kind of specified value, specified value)
+_Kind = Literal["value", "collection", "pattern"]
+_Field = Tuple[str, _Kind, Any]
+_Spec = Tuple[_Field, ...]
+
+# fields which are most likely to identify an item, and so should be used to
+# look up a specification before any others
+_ID_FIELDS = ("plugin_id", "id", "name")
+
+# flags which can be applied to part of a pattern, with their inline letter
+_SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+# inline flags which apply to a whole pattern (e.g. `(?i)`), and so can't be
+# part of an alternation
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _is_collection(value: Any) -> bool:
+    return not isinstance(value, str) and isinstance(value, Collection)
+
+
+def _compile_field(field: str, spec_val: Any) -> _Field:
+    if isinstance(spec_val, re.Pattern):
+        return (field, "pattern", spec_val)
+    elif not _is_collection(spec_val):
+        return (field, "value", spec_val)
+
+    try:
+        return (field, "collection", frozenset(spec_val))
+    except TypeError:  # unhashable members
+        return (field, "collection", tuple(spec_val))
+
+
+def _pattern_matches(pattern: "re.Pattern[str]", item_val: Any) -> bool:
+    if isinstance(item_val, str):
+        return pattern.fullmatch(item_val) is not None
+    elif _is_collection(item_val):
+        return any(
+            isinstance(member, str) and pattern.fullmatch(member) is not None
+            for member in item_val
+        )
+    else:
+        return False
+
+
+def _field_matches(field: _Field, item: Any) -> bool:
+    name, kind, spec_val = field
+    item_val = getattr(item, name, _MISSING)
+
+    if item_val is _MISSING:
+        return False
+    elif kind == "value":
+        return bool(spec_val == item_val)
+    elif kind == "pattern":
+        return _pattern_matches(spec_val, item_val)
+    elif _is_collection(item_val):
+        return all(member in item_val for member in spec_val)
+
+    try:
+        return item_val in spec_val
+    except TypeError:  # an unhashable item value can't be in a frozenset
+        return any(member == item_val for member in spec_val)
+
+
+def _spec_matches(spec: _Spec, item: Any) -> bool:
+    return all(_field_matches(field, item) for field in spec)
+
+
+def _combine_patterns(
+    patterns: Iterable["re.Pattern[str]"],
+) -> List["re.Pattern[str]"]:
+    # Combine patterns into a single alternation, so that they can all be
+    # tried with one call. Patterns which can't be safely combined (e.g.
+    # because their groups would be renumbered, or they have inline global
+    # flags) are kept separate.
+    patterns = list(patterns)
+    alternatives: List[str] = []
+    separate: List["re.Pattern[str]"] = []
+
+    for pattern in patterns:
+        flags = pattern.flags & ~re.UNICODE
+
+        if (
+            not isinstance(pattern.pattern, str)
+            or pattern.groups
+            or flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL)
+            or _GLOBAL_FLAGS.search(pattern.pattern)
+        ):
+            separate.append(pattern)
+        else:
+            letters = "".join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
+            alternatives.append(
+                f"(?{letters}:{pattern.pattern})" if letters else pattern.pattern
+            )
+
+    if not alternatives:
+        return separate
+
+    try:
+        combined = re.compile("|".join(f"(?:{a})" for a in alternatives))
+    except re.error:
+        return patterns
+
+    return [combined, *separate]
+
+
+class _Patterns:
+    # the patterns specified for a field, combined on first use
+    def __init__(self) -> None:
+        self.patterns: List["re.Pattern[str]"] = []
+        self._combined: Optional[List["re.Pattern[str]"]] = None
+
+    def add(self, pattern: "re.Pattern[str]") -> None:
+        self.patterns.append(pattern)
+        self._combined = None
+
+    def matches(self, item_val: Any) -> bool:
+        if self._combined is None:
+            self._combined = _combine_patterns(self.patterns)
+
+        return any(_pattern_matches(pattern, item_val) for pattern in self._combined)
+
+
+class _SpecIndex:
+    """Specifications of a blacklist/whitelist, compiled for fast matching.
+
+    Every specification is indexed by one of its fields, so that matching
+    an item only has to consider the specifications which can possibly
+    match it, instead of every specification:
+
+    - specifications of a single field with a plain value are kept in a
+      set of values per field, and match without further checks;
+    - other specifications with a plain value are looked up by the value
+      of one such field, and their remaining fields are checked;
+    - specifications whose fields are all collections are looked up by
+      every member of one of them (matching either a member or a subset
+      requires the item to share at least one member);
+    - the patterns of the remaining specifications are combined into a
+      single pattern per field; specifications of a single field match
+      when it does, and the other fields of the rest are only checked
+      when it does;
+    - anything else (e.g. unhashable values) is checked one by one.
+    """
+
+    def __init__(self, specs: Iterable[Mapping[str, Any]]) -> None:
+        self.values: Dict[str, Set[Any]] = {}
+        self.exact: Dict[str, Dict[Any, List[_Spec]]] = {}
+        self.members: Dict[str, Dict[Any, List[_Spec]]] = {}
+        self.patterns: Dict[str, _Patterns] = {}
+        self.pattern_specs: Dict[str, Tuple[_Patterns, List[_Spec]]] = {}
+        self.scan: List[_Spec] = []
+
+        for spec in specs:
+            self._add(tuple(_compile_field(f, v) for f, v in spec.items()))
+
+    def _add(self, spec: _Spec) -> None:
+        fields = sorted(
+            spec,
+            key=lambda f: (
+                _ID_FIELDS.index(f[0]) if f[0] in _ID_FIELDS else len(_ID_FIELDS)
+            ),
+        )
+
+        for name, kind, spec_val in fields:
+            if kind == "value":
+                try:
+                    hash(spec_val)
+                except TypeError:
+                    continue
+
+                if len(spec) == 1:
+                    self.values.setdefault(name, set()).add(spec_val)
+                else:
+                    self.exact.setdefault(name, {}).setdefault(spec_val, []).append(
+                        spec
+                    )
+                return
+
+        for name, kind, spec_val in fields:
+            if isinstance(spec_val, frozenset) and spec_val:
+                table = self.members.setdefault(name, {})
+
+                for member in spec_val:
+                    table.setdefault(member, []).append(spec)
+                return
+
+        for name, kind, spec_val in fields:
+            if kind == "pattern":
+                if len(spec) == 1:
+                    self.patterns.setdefault(name, _Patterns()).add(spec_val)
+                else:
+                    patterns, specs = self.pattern_specs.setdefault(
+                        name, (_Patterns(), [])
+                    )
+                    patterns.add(spec_val)
+                    specs.append(spec)
+                return
+
+        self.scan.append(spec)
+
+    @property
+    def only_values(self) -> bool:
+        """Whether every specification is a single field with a plain value."""
+        return not (
+            self.exact
+            or self.members
+            or self.patterns
+            or self.pattern_specs
+            or self.scan
+        )
+
+    def matches(self, item: Any) -> bool:
+        """Return whether any of the specifications matches the item."""
+        for name, values in self.values.items():
+            item_val = getattr(item, name, _MISSING)
+
+            if item_val is _MISSING:
+                continue
+
+            try:
+                if item_val in values:
+                    return True
+            except TypeError:
+                if any(value == item_val for value in values):
+                    return True
+
+        for name, table in self.exact.items():
+            item_val = getattr(item, name, _MISSING)
+
+            if item_val is _MISSING:
+                continue
+
+            try:
+                candidates = table.get(item_val, ())
+            except TypeError:
+                candidates = [
+                    spec
+                    for value, specs in table.items()
+                    for spec in specs
+                    if value == item_val
+                ]
+
+            if any(_spec_matches(spec, item) for spec in candidates):
+                return True
+
+        for name, table in self.members.items():
+            item_val = getattr(item, name, _MISSING)
+
+            if item_val is _MISSING:
+                continue
+
+            for member in item_val if _is_collection(item_val) else (item_val,):
+                try:
+                    candidates = table.get(member, ())
+                except TypeError:
+                    continue  # can't be a member of (a subset of) a frozenset
+
+                if any(_spec_matches(spec, item) for spec in candidates):
+                    return True
+
+        for name, patterns in self.patterns.items():
+            item_val = getattr(item, name, _MISSING)
+
+            if item_val is not _MISSING and patterns.matches(item_val):
+                return True
+
+        for name, (patterns, specs) in self.pattern_specs.items():
+            item_val = getattr(item, name, _MISSING)
+
+            if (
+                item_val is not _MISSING
+                and patterns.matches(item_val)
+                and any(_spec_matches(spec, item) for spec in specs)
+            ):
+                return True
+
+        return any(_spec_matches(spec, item) for spec in self.scan)
@@ -1,15 +1,136 @@
+import copy
+import itertools
+import threading
 from contextlib import ExitStack
-from typing import Any, Collection, Dict, Iterable, Optional, Tuple, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from uuid import uuid4
 
 from grappler._types import Package, Plugin, UnknownPluginError
 
+from ._query import QueryProvider, _no_queries
 from .bases._basic import BasicGrappler
 
 T_ItConfig = TypeVar("T_ItConfig")
 
 
-class StaticGrappler(BasicGrappler[Dict[Plugin, Any]]):
+class _Snapshot(NamedTuple):
+    plugins: Dict[Plugin, Any]
+    topics: Dict[str, List[Plugin]]
+    generation: int
+
+
+class _Registry:
+    # The plugins of a static grappler, indexed by topic; shared between a
+    # grappler and its restricted copies. Every find uses a snapshot of the
+    # registry, which is the registry itself: only when a plugin is added
+    # or removed while a snapshot is in use is the registry copied (once),
+    # so that neither finding plugins nor adding them copies anything while
+    # no find is in progress. Every copy starts a new generation, so that
+    # snapshots of older generations aren't counted once released.
+    def __init__(self) -> None:
+        self.plugins: Dict[Plugin, Any] = {}
+        self.topics: Dict[str, List[Plugin]] = {}
+        self._generation = 0
+        self._readers = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> _Snapshot:
+        with self._lock:
+            self._readers += 1
+            return _Snapshot(self.plugins, self.topics, self._generation)
+
+    def release(self, snapshot: _Snapshot) -> None:
+        with self._lock:
+            if snapshot.generation == self._generation:
+                self._readers -= 1
+
+    def add(self, items: Iterable[Tuple[Plugin, Any]]) -> None:
+        with self._lock:
+            self._copy_on_write()
+
+            for plugin, obj in items:
+                if plugin not in self.plugins:
+                    for topic in dict.fromkeys(plugin.topics):
+                        self.topics.setdefault(topic, []).append(plugin)
+
+                self.plugins[plugin] = obj
+
+    def remove(self, plugin: Plugin) -> None:
+        with self._lock:
+            if plugin not in self.plugins:
+                raise KeyError(plugin)
+
+            self._copy_on_write()
+            del self.plugins[plugin]
+
+            for topic in dict.fromkeys(plugin.topics):
+                self.topics[topic].remove(plugin)
+
+                if not self.topics[topic]:
+                    del self.topics[topic]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.plugins = {}
+            self.topics = {}
+            self._new_generation()
+
+    def _copy_on_write(self) -> None:
+        if self._readers:
+            self.plugins = {**self.plugins}
+            self.topics = {topic: [*plugins] for topic, plugins in self.topics.items()}
+            self._new_generation()
+
+    def _new_generation(self) -> None:
+        self._generation += 1
+        self._readers = 0
+
+
+class _Cache(MutableMapping[Plugin, Any]):
+    # The plugins of a static grappler and their objects, as a mutable
+    # mapping; changes are made through the registry, so that they are
+    # indexed (and don't affect the finds in progress).
+    def __init__(self, registry: _Registry) -> None:
+        self._registry = registry
+
+    def __getitem__(self, plugin: Plugin) -> Any:
+        return self._registry.plugins[plugin]
+
+    def __setitem__(self, plugin: Plugin, obj: Any) -> None:
+        self._registry.add([(plugin, obj)])
+
+    def __delitem__(self, plugin: Plugin) -> None:
+        self._registry.remove(plugin)
+
+    def __iter__(self) -> Iterator[Plugin]:
+        return iter(self._registry.plugins)
+
+    def __len__(self) -> int:
+        return len(self._registry.plugins)
+
+    def clear(self) -> None:
+        self._registry.clear()
+
+    def __repr__(self) -> str:
+        return repr(self._registry.plugins)
+
+
+class StaticGrappler(BasicGrappler[_Snapshot]):
     """
     A grappler for loading "plugins" supplied by the host
     application.
@@ -17,14 +138,18 @@ class StaticGrappler(BasicGrappler[Dict[Plugin, Any]]):
     This is provided as a useful tool to help modularize application
     code, so that application components can be loaded in the same
     way as plugins. To use this, supply an object as well as
-    topics that each object implements to either `__init__`
-    or `add_plugin`, and the grappler will generate the appropriate
-    [`Plugin`][grappler.Plugin] tuples.
+    topics that each object implements to either `__init__`,
+    `add_plugin` or `add_plugins`, and the grappler will generate the
+    appropriate [`Plugin`][grappler.Plugin] tuples.
     The `plugin.package` is the same for every plugin yielded
     by an instance of this grappler. If a `package` argument is provided to the
     constructor, then this is used. Otherwise, a default internal
     package is used (`StaticGrappler.internal_package`).
 
+    Plugins are indexed by topic, so finding the plugins of a topic only
+    costs as much as the number of plugins on it. Plugins which are added
+    while a search for plugins is in progress aren't seen by that search.
+
 
     Usage:
 
@@ -34,8 +159,12 @@ class StaticGrappler(BasicGrappler[Dict[Plugin, Any]]):
         ...
     )
     grappler.add_plugin(["topics", "list"], obj2)
+    grappler.add_plugins([(["topic"], obj3), (["topic"], obj4)])
     ```
 
+    Generated plugin ids are unique, but differ every time the program
+    runs, unless a `key` is given when the plugin is added.
+
     """
 
     internal_package = Package(
@@ -50,24 +179,123 @@ class StaticGrappler(BasicGrappler[Dict[Plugin, Any]]):
     ) -> None:
         self.package = package or self.internal_package
 
-        self.cache = {
-            Plugin(self.id, str(uuid4()), self.package, tuple(topics), name=None): obj
-            for topics, obj in objs
-        }
+        # plugin ids are generated from a random prefix (only read once) and
+        # a counter, which is much cheaper than a uuid per plugin
+        self._id_prefix = str(uuid4())
+        self._id_counter = itertools.count()
+        self._registry = _Registry()
+        self._registry.add((self._make_plugin(topics), obj) for topics, obj in objs)
+        self._queries: QueryProvider = _no_queries
+
+    def restricted(self, queries: QueryProvider, /) -> "StaticGrappler":
+        """Return a copy of the grappler which only finds plugins matching
+        every [query][grappler.grapplers.Query] returned by `queries`.
+
+        `queries` is called every time that plugins are found. The copy
+        shares its plugins with this grappler, so plugins added to either
+        are found by both.
+        """
+        grappler = copy.copy(self)
+        grappler._queries = queries
+        return grappler
 
     def add_plugin(
-        self, item: Union[Collection[str], Plugin], /, plugin_obj: Any
+        self,
+        item: Union[Collection[str], Plugin],
+        /,
+        plugin_obj: Any,
+        *,
+        capabilities: Collection[str] = (),
+        key: Optional[str] = None,
     ) -> None:
-        """Add an static plugin to the grappler."""
-        plugin = (
-            item
-            if isinstance(item, Plugin)
-            else Plugin(self.id, str(uuid4()), self.package, tuple(item), name=None)
+        """Add an static plugin to the grappler.
+
+        `capabilities` is used for the plugin's
+        [`capabilities`][grappler.Plugin.capabilities], unless a
+        [`Plugin`][grappler.Plugin] is given.
+
+        When a `key` is given, the plugin's
+        [`plugin_id`][grappler.Plugin.plugin_id] is derived from it
+        (`"<package id>:<key>"`) instead of being generated, so that it
+        is the same every time the program runs (e.g. for use with
+        [`BlacklistingGrappler`][grappler.grapplers.BlacklistingGrappler]).
+        Keys must be unique among the plugins of a package.
+        """
+        self._registry.add(
+            [(self._make_plugin(item, capabilities=capabilities, key=key), plugin_obj)]
+        )
+
+    def add_plugins(
+        self,
+        items: Iterable[Tuple[Union[Collection[str], Plugin], Any]],
+        /,
+        *,
+        capabilities: Collection[str] = (),
+        key: Optional[Callable[[Any], str]] = None,
+    ) -> None:
+        """Add several static plugins to the grappler at once.
+
+        This is equivalent to calling
+        [`add_plugin()`][grappler.grapplers.StaticGrappler.add_plugin] for
+        every `(topics_or_plugin, plugin_obj)` pair of `items`, but is much
+        faster for many plugins, since the grappler's index is only updated
+        once. If `key` is given, it is called with every plugin object to
+        get the key of its plugin.
+        """
+        self._registry.add(
+            [
+                (
+                    self._make_plugin(
+                        item,
+                        capabilities=capabilities,
+                        key=None if key is None else key(plugin_obj),
+                    ),
+                    plugin_obj,
+                )
+                for item, plugin_obj in items
+            ]
+        )
+
+    def _make_plugin(
+        self,
+        item: Union[Collection[str], Plugin],
+        *,
+        capabilities: Collection[str] = (),
+        key: Optional[str] = None,
+    ) -> Plugin:
+        if isinstance(item, Plugin):
+            return item
+
+        return Plugin(
+            self.id,
+            (
+                f"{self._id_prefix}-{next(self._id_counter)}"
+                if key is None
+                else f"{self.package.id}:{key}"
+            ),
+            self.package,
+            tuple(item),
+            name=None,
+            capabilities=tuple(capabilities),
         )
-        self.cache[plugin] = plugin_obj
 
     def clear(self) -> None:
-        self.cache.clear()
+        self._registry.clear()
+
+    @property
+    def cache(self) -> MutableMapping[Plugin, Any]:
+        """The plugins of the grappler, and their objects.
+
+        Plugins can be added to (or removed from) the grappler by changing
+        the mapping.
+        """
+        return _Cache(self._registry)
+
+    @cache.setter
+    def cache(self, plugins: Mapping[Plugin, Any]) -> None:
+        items = list(plugins.items())
+        self._registry.clear()
+        self._registry.add(items)
 
     @property
     def id(self) -> str:
@@ -75,15 +303,27 @@ class StaticGrappler(BasicGrappler[Dict[Plugin, Any]]):
 
     def create_iteration_context(
         self, topic: Optional[str], _: ExitStack
-    ) -> Tuple[Iterable[Plugin], Dict[Plugin, Any]]:
-        cache = {**self.cache}
-        return (
-            (plugin for plugin in cache if topic is None or topic in plugin.topics),
-            cache,
+    ) -> Tuple[Iterable[Plugin], _Snapshot]:
+        snapshot = self._registry.snapshot()
+        plugins: Iterable[Plugin] = (
+            snapshot.plugins if topic is None else snapshot.topics.get(topic, ())
         )
+        queries = list(self._queries())
+
+        if queries:
+            plugins = (
+                plugin
+                for plugin in plugins
+                if all(query.matches(plugin) for query in queries)
+            )
 
-    def load_from_context(self, plugin: Plugin, context: Dict[Plugin, Any]) -> Any:
+        return (plugins, snapshot)
+
+    def load_from_context(self, plugin: Plugin, context: _Snapshot) -> Any:
         try:
-            return context[plugin]
+            return context.plugins[plugin]
         except LookupError:
             raise UnknownPluginError(plugin, self)
+
+    def cleanup_iteration_context(self, context: _Snapshot) -> None:
+        self._registry.release(context)
@@ -0,0 +1,110 @@
+import importlib
+import importlib.util
+import sys
+import threading
+from logging import getLogger
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from grappler import Grappler, Plugin
+
+LOG = getLogger(__name__)
+
+
+class _PluginTarget(NamedTuple):
+    # Where a plugin's object can be imported from, so that it can be loaded
+    # without the grappler that found it: e.g. by a manifest, or in another
+    # process. When a path to a .py file is given, the module is imported
+    # from that file (under the given module name) rather than from
+    # sys.path; any other path (e.g. a wheel) is added to sys.path first,
+    # so that the module is imported from it (zip archives with zipimport).
+    module: str
+    attr: Optional[str]
+    path: Optional[str] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "_PluginTarget":
+        # an entry point style reference, "module:attr.sub [extras]",
+        # optionally followed by "@path"
+        reference, _, path = value.partition("@")
+        module, _, attr = reference.partition("[")[0].strip().partition(":")
+        return cls(module.strip(), attr.strip() or None, path or None)
+
+    def __str__(self) -> str:
+        reference = self.module if self.attr is None else f"{self.module}:{self.attr}"
+        return reference if self.path is None else f"{reference}@{self.path}"
+
+    def load(self) -> Any:
+        obj = self._import()
+
+        for name in self.attr.split(".") if self.attr else ():
+            obj = getattr(obj, name)
+
+        return obj
+
+    def _import(self) -> Any:
+        if self.path is None:
+            return importlib.import_module(self.module)
+        elif not self.path.endswith(".py"):
+            _add_import_path(self.path)
+            return importlib.import_module(self.module)
+        elif self.module in sys.modules:
+            return sys.modules[self.module]
+
+        spec = importlib.util.spec_from_file_location(self.module, self.path)
+
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Can't import {self.module} from {self.path}")
+
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[self.module] = module
+
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[self.module]
+            raise
+
+        return module
+
+
+_import_path_lock = threading.Lock()
+
+
+def _add_import_path(path: str) -> None:
+    # appended, so that installed packages take precedence over archives
+    with _import_path_lock:
+        if path not in sys.path:
+            sys.path.append(path)
+            importlib.invalidate_caches()
+
+
+# Functions returning the target of the plugins of a grappler (by its id),
+# when the target is known from the plugin's fields alone. Sources register
+# themselves here when their module is imported.
+_TARGETS: Dict[str, Callable[[Plugin], Optional[_PluginTarget]]] = {}
+
+
+def _target_of(plugin: Plugin) -> Optional[_PluginTarget]:
+    get_target = _TARGETS.get(plugin.grappler_id)
+    return None if get_target is None else get_target(plugin)
+
+
+def _find_targets(
+    grappler: Grappler, topics: Optional[Iterable[str]]
+) -> Dict[Plugin, _PluginTarget]:
+    # Find the plugins of a grappler (of each topic, or all at once) with
+    # their targets, for writing them to a file. Plugins whose target isn't
+    # known are skipped, with a warning.
+    targets: Dict[Plugin, _PluginTarget] = {}
+
+    for topic in [None] if topics is None else topics:
+        with grappler.find(topic) as found:
+            for plugin in found:
+                target = _target_of(plugin)
+
+                if target is None:
+                    LOG.warning(f"Can't write plugin (unknown target): {plugin}")
+                else:
+                    targets.setdefault(plugin, target)
+
+    return targets
@@ -0,0 +1,208 @@
+import mmap
+import os
+import re
+import threading
+import zipfile
+from contextlib import ExitStack
+from logging import getLogger
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+import importlib_metadata as metadata
+
+from grappler import Package, Plugin
+
+from ._target import _TARGETS, _PluginTarget
+from .bases import PluginPairGrapplerBase
+
+LOG = getLogger(__name__)
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+class _WheelEntryPoint(NamedTuple):
+    group: str
+    name: str
+    value: str
+    extras: Tuple[str, ...]
+
+
+class _CachedWheel(NamedTuple):
+    mtime_ns: int
+    size: int
+    package: Optional[Package]
+    entry_points: Tuple[_WheelEntryPoint, ...]
+
+
+class _MappedFile(mmap.mmap):
+    # zipfile needs seekable(), which memory maps only have from Python 3.13
+    def seekable(self) -> bool:
+        return True
+
+
+def _normalize(name: str) -> str:
+    # as distribution names are normalized by importlib_metadata, so that
+    # packages have the same id whether they're installed or not
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+def _read_wheel(path: str) -> Tuple[Package, Tuple[_WheelEntryPoint, ...]]:
+    # only the central directory, METADATA and entry_points.txt are read
+    # from the archive, through a memory map rather than buffered reads
+    with open(path, "rb") as f:
+        with _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with zipfile.ZipFile(cast(IO[bytes], data)) as archive:
+                return _read_distribution(archive)
+
+
+def _read_distribution(
+    archive: zipfile.ZipFile,
+) -> Tuple[Package, Tuple[_WheelEntryPoint, ...]]:
+    dist_info = next(
+        (
+            name.partition("/")[0]
+            for name in archive.namelist()
+            if name.partition("/")[0].endswith(".dist-info")
+        ),
+        None,
+    )
+
+    if dist_info is None:
+        raise ValueError("wheel has no .dist-info directory")
+
+    # zipfile.Path implements the path protocol which distributions need
+    path: Any = zipfile.Path(archive, f"{dist_info}/")
+    dist = metadata.PathDistribution(path)
+    name, version = dist.metadata.get("Name"), dist.metadata.get("Version")
+
+    if not name or not version:
+        raise ValueError("wheel has no name or version")
+
+    package = Package(name, version, _normalize(name), None)
+    entry_points = tuple(
+        _WheelEntryPoint(
+            str(entry_point.group),
+            str(entry_point.name),
+            str(entry_point.value),
+            tuple(entry_point.extras),
+        )
+        for entry_point in dist.entry_points
+    )
+
+    return package, entry_points
+
+
+class WheelGrappler(PluginPairGrapplerBase[_PluginTarget]):
+    """
+    A grappler for loading plugins from a directory of wheel files, without
+    installing them.
+
+    The entry points of every `.whl` file in the directory are found as
+    plugins, just as an
+    [`EntryPointGrappler`][grappler.grapplers.EntryPointGrappler] would
+    find them once the wheel was installed (and packages get the same ids).
+    Only the metadata and entry points of each wheel are read from it (by
+    memory mapping the archive), and they are remembered with the wheel's
+    modification time and size, so that only wheels which have changed are
+    read again when the directory is searched again.
+
+    When one of its plugins is loaded, a wheel is added to the end of
+    `sys.path`, so its modules are imported from the archive (with
+    `zipimport`). This only works for wheels which can be imported from a
+    zip file, e.g. those without extension modules or data files which are
+    read from the file system. Dependencies of the wheels are not resolved.
+
+    Plugin ids are the entry points' object references, followed by `@`
+    and the path of their wheel.
+
+    Usage:
+
+    ```python
+    grappler = WheelGrappler("/opt/app/plugin-wheels")
+    ```
+
+    Args:
+        directory: The directory to search for wheel files.
+    """
+
+    id = "grappler.grapplers.wheel"
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = os.path.abspath(directory)
+        self._wheels: Dict[str, _CachedWheel] = {}
+        self._lock = threading.Lock()
+
+    def iter_plugins(
+        self, topic: Optional[str], _: ExitStack, /
+    ) -> Iterable[Tuple[Plugin, _PluginTarget]]:
+        for path, wheel in self._scan():
+            if wheel.package is None:
+                continue
+
+            for entry_point in wheel.entry_points:
+                if topic is not None and entry_point.group != topic:
+                    continue
+
+                target = _PluginTarget.parse(f"{entry_point.value}@{path}")
+                plugin = Plugin(
+                    grappler_id=self.id,
+                    plugin_id=str(target),
+                    package=wheel.package,
+                    topics=(entry_point.group,),
+                    name=entry_point.name,
+                    capabilities=entry_point.extras,
+                )
+                yield plugin, target
+
+    def load_with_pair(self, _: Plugin, target: _PluginTarget, /) -> Any:
+        return target.load()
+
+    def _scan(self) -> List[Tuple[str, _CachedWheel]]:
+        with self._lock:
+            wheels: Dict[str, _CachedWheel] = {}
+
+            with os.scandir(self.directory) as entries:
+                for entry in sorted(entries, key=lambda entry: entry.name):
+                    if not entry.name.endswith(".whl") or not entry.is_file():
+                        continue
+
+                    stat = entry.stat()
+                    cached = self._wheels.get(entry.path)
+
+                    if cached is None or (cached.mtime_ns, cached.size) != (
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                    ):
+                        cached = _CachedWheel(
+                            stat.st_mtime_ns, stat.st_size, *self._read(entry.path)
+                        )
+
+                    wheels[entry.path] = cached
+
+            self._wheels = wheels
+            return list(wheels.items())
+
+    @staticmethod
+    def _read(
+        path: str,
+    ) -> Tuple[Optional[Package], Tuple[_WheelEntryPoint, ...]]:
+        try:
+            return _read_wheel(path)
+        except (zipfile.BadZipFile, ValueError, OSError) as e:
+            # remembered as having no plugins, until the file changes
+            LOG.warning(f"Ignoring invalid wheel {path}: {e}")
+            return None, ()
+
+
+# wheel plugin ids are their targets
+_TARGETS[WheelGrappler.id] = lambda plugin: _PluginTarget.parse(plugin.plugin_id)
@@ -1,31 +1,56 @@
 from abc import ABC, abstractmethod
 from contextlib import ExitStack, contextmanager
-from dataclasses import astuple, dataclass
+from dataclasses import dataclass, field, fields
 from functools import partial
 from typing import Any, Dict, Generic, Iterable, Iterator, Optional, Tuple, TypeVar
 
 from grappler._types import Plugin, UnknownPluginError
 
 T_ItConfig = TypeVar("T_ItConfig")
+_PLUGIN_FIELD_NAMES = tuple(f.name for f in fields(Plugin))
 
 
 @dataclass(frozen=True, eq=False)
 class BasicPlugin(Plugin):
-    config_id: int
-    wraps: Plugin
+    # defaults are required because Plugin.capabilities has one; they are
+    # always given by from_plugin()
+    config_id: int = -1
+    wraps: Plugin = None  # type: ignore[assignment]
+    _plugin: Plugin = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Plugins are hashed and compared by their Plugin fields, which are
+        # the same for every plugin in a chain of wrapped plugins; so the
+        # plain Plugin is shared along the chain rather than rebuilt.
+        wraps = self.wraps
+
+        if isinstance(wraps, BasicPlugin):
+            plugin = wraps._plugin
+        elif type(wraps) is Plugin:
+            plugin = wraps
+        else:
+            plugin = Plugin(*(getattr(self, name) for name in _PLUGIN_FIELD_NAMES))
+
+        object.__setattr__(self, "_plugin", plugin)
 
     def __eq__(self, other: object) -> bool:
-        return self.as_plugin().__eq__(other)
+        if isinstance(other, BasicPlugin):
+            other = other._plugin
+        return self._plugin.__eq__(other)
 
     def __hash__(self) -> int:
-        return self.as_plugin().__hash__()
+        return self._plugin.__hash__()
 
     def as_plugin(self) -> Plugin:
-        return Plugin(*astuple(self)[:-2])
+        return self._plugin
 
     @classmethod
     def from_plugin(cls, config_id: int, plugin: Plugin, /) -> "BasicPlugin":
-        return BasicPlugin(*astuple(plugin)[:5], config_id, plugin)  # type: ignore
+        return BasicPlugin(
+            *(getattr(plugin, name) for name in _PLUGIN_FIELD_NAMES),
+            config_id,  # type: ignore
+            plugin,
+        )
 
     @staticmethod
     def devolve(plugin: Plugin) -> Plugin:
@@ -1,10 +1,16 @@
+import time
 from contextlib import ExitStack
-from typing import Any, Callable, Set, Type, Union
+from typing import Any, Callable, List, Optional, Sequence, Set, Type, Union
 
 import pytest
 
 from grappler import Grappler, Plugin
-from grappler.grapplers import BouncerGrappler, CompositeGrappler, StaticGrappler
+from grappler.grapplers import (
+    BouncerGrappler,
+    CompositeGrappler,
+    Query,
+    StaticGrappler,
+)
 
 from .conftest import PluginLoaderFunction
 
@@ -81,13 +87,204 @@ def make_checker(func: Callable[[int], bool]) -> Callable[[Plugin], bool]:
 def add_checker(
     grappler: Grappler, func: Callable[[int], bool], mode: BouncerGrappler.Mode
 ) -> None:
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(make_checker(func), mode=mode)
+
+
+def get_bouncers(grappler: Grappler) -> List[BouncerGrappler]:
     assert isinstance(grappler, (CompositeGrappler, BouncerGrappler))
 
     if isinstance(grappler, BouncerGrappler):
-        bouncers = [grappler]
+        return [grappler]
+    else:
+        return [g for g in grappler._wrappers if isinstance(g, BouncerGrappler)]
+
+
+def test_cached_decisions(
+    grappler: Grappler, load_plugins: PluginLoaderFunction
+) -> None:
+    checked: List[Plugin] = []
+
+    def check(plugin: Plugin) -> bool:
+        checked.append(plugin)
+        return True
+
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(check, mode=BouncerGrappler.Mode.FIND)
+        bouncer.cache_decisions()
+
+    assert len(load_plugins(grappler, topic="numbers")) == 1000
+    assert len(checked) == 1000
+
+    assert len(load_plugins(grappler, topic="numbers")) == 1000
+    assert len(checked) == 1000
+
+    # adding a checker discards the remembered decisions
+    add_checker(grappler, lambda i: i % 2 == 0, mode=BouncerGrappler.Mode.FIND)
+    assert set(load_plugins(grappler, topic="numbers").values()) == set(
+        range(1000)[::2]
+    )
+    assert len(checked) == 2000
+
+
+def test_decisions_not_cached_by_default(
+    grappler: Grappler, load_plugins: PluginLoaderFunction
+) -> None:
+    checked: List[Plugin] = []
 
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(lambda plugin: checked.append(plugin) is None)
+
+    load_plugins(grappler, topic="numbers")
+    load_plugins(grappler, topic="numbers")
+    assert len(checked) == 2000
+
+
+@pytest.mark.parametrize("fixed", [False, True])
+def test_adaptive_check_order(
+    grappler: Grappler, load_plugins: PluginLoaderFunction, fixed: bool
+) -> None:
+    def expensive_check(plugin: Plugin) -> bool:
+        time.sleep(0.0001)
+        return True
+
+    cheap_check = make_checker(lambda i: i % 10 == 0)
+
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(expensive_check, mode=BouncerGrappler.Mode.FIND, fixed=fixed)
+        bouncer.checker(cheap_check, mode=BouncerGrappler.Mode.FIND)
+        bouncer.adapt_check_order()
+
+    assert set(load_plugins(grappler, topic="numbers").values()) == set(
+        range(1000)[::10]
+    )
+
+    (bouncer,) = get_bouncers(grappler)
+    expensive, cheap = bouncer.check_stats()
+    assert (expensive.check, expensive.mode, expensive.fixed) == (
+        expensive_check,
+        "find",
+        fixed,
+    )
+    assert (cheap.calls, cheap.rejections) == (1000, 900)
+
+    if fixed:
+        assert expensive.calls == 1000
     else:
-        bouncers = [g for g in grappler._wrappers if isinstance(g, BouncerGrappler)]
+        # the cheap check is moved first once it has been measured
+        assert expensive.calls < 300
 
-    for bouncer in bouncers:
-        bouncer.checker(make_checker(func), mode=mode)
+
+def test_batch_checker(grappler: Grappler, load_plugins: PluginLoaderFunction) -> None:
+    batches: List[int] = []
+    is_even = make_checker(lambda i: i % 2 == 0)
+
+    def check_batch(plugins: Sequence[Plugin]) -> List[bool]:
+        batches.append(len(plugins))
+        return [make_checker(lambda i: i % 3 == 0)(plugin) for plugin in plugins]
+
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(is_even, mode=BouncerGrappler.Mode.FIND)
+        bouncer.batch_checker(check_batch, mode=BouncerGrappler.Mode.FIND)
+        bouncer.set_batch_size(100)
+
+    assert set(load_plugins(grappler, topic="numbers").values()) == set(
+        range(1000)[::6]
+    )
+    # only the plugins which passed the other checks are in each batch
+    assert batches == [50] * 10
+
+
+def test_batch_checker_with_cached_decisions(
+    grappler: Grappler, load_plugins: PluginLoaderFunction
+) -> None:
+    checked: List[Plugin] = []
+    batched: List[Plugin] = []
+
+    def check(plugin: Plugin) -> bool:
+        checked.append(plugin)
+        return make_checker(lambda i: i % 2 == 0)(plugin)
+
+    def check_batch(plugins: Sequence[Plugin]) -> List[bool]:
+        batched.extend(plugins)
+        return [True] * len(plugins)
+
+    for bouncer in get_bouncers(grappler):
+        bouncer.checker(check, mode=BouncerGrappler.Mode.FIND)
+        bouncer.batch_checker(check_batch, mode=BouncerGrappler.Mode.FIND)
+        bouncer.cache_decisions()
+
+    for _ in range(3):
+        assert set(load_plugins(grappler, topic="numbers").values()) == set(
+            range(1000)[::2]
+        )
+
+    # rejections by the other checks are remembered too
+    assert (len(checked), len(batched)) == (1000, 500)
+
+
+def test_batch_checker_for_loading(source_grappler: StaticGrappler) -> None:
+    batches: List[Sequence[Plugin]] = []
+
+    def check_batch(plugins: Sequence[Plugin]) -> List[bool]:
+        batches.append(plugins)
+        return [make_checker(lambda i: i != 5)(plugin) for plugin in plugins]
+
+    bouncer = BouncerGrappler(source_grappler)
+    bouncer.batch_checker(check_batch, mode=BouncerGrappler.Mode.LOAD)
+
+    with bouncer.find("numbers") as plugins:
+        found = list(plugins)
+        assert bouncer.load_many(found[:5]) == [0, 1, 2, 3, 4]
+        assert [len(batch) for batch in batches] == [5]
+
+        with pytest.raises(BouncerGrappler.ForbiddenPluginError):
+            bouncer.load_many(found[:10])
+
+        assert bouncer.load(found[6]) == 6
+        assert [len(batch) for batch in batches] == [5, 10, 1]
+
+
+def test_batch_checker_must_check_every_plugin(
+    grappler: Grappler, load_plugins: PluginLoaderFunction
+) -> None:
+    for bouncer in get_bouncers(grappler):
+        bouncer.batch_checker(lambda plugins: [True], mode=BouncerGrappler.Mode.FIND)
+
+    with pytest.raises(ValueError):
+        load_plugins(grappler, topic="numbers")
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (Query.equals("topics", "val-3"), {3}),
+        (Query.is_in("topics", ["val-3", "val-5"]), {3, 5}),
+        (Query.not_in("topics", [f"val-{i}" for i in range(1, 1000)]), {0}),
+        (Query.equals("package.id", StaticGrappler.internal_package.id), None),
+        (Query.not_in("package.id", [StaticGrappler.internal_package.id]), set()),
+    ],
+)
+def test_query(
+    grappler: Grappler,
+    load_plugins: PluginLoaderFunction,
+    query: Query,
+    expected: Optional[Set[int]],
+) -> None:
+    for bouncer in get_bouncers(grappler):
+        bouncer.query(query)
+        assert bouncer.queries() == (query,)
+
+    assert set(load_plugins(grappler, topic="numbers").values()) == (
+        set(range(1000)) if expected is None else expected
+    )
+
+
+def test_query_fields() -> None:
+    with pytest.raises(ValueError):
+        Query.equals("package", "a-package")
+
+    assert Query.equals("name", "a-name").matches_value("a-name")
+    assert not Query.not_in("name", ["a-name"]).matches_value("a-name")
+    assert Query.is_in("capabilities", ["a", "b"]).matches_value(("c", "b"))
+    assert not Query.is_in("capabilities", ["a", "b"]).matches_value(())
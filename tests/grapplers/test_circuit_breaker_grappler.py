@@ -0,0 +1,132 @@
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from grappler import FailurePolicy, Grappler, Plugin, SuspendedPluginError
+from grappler.grapplers import (
+    BouncerGrappler,
+    CircuitBreakerGrappler,
+    CompositeGrappler,
+    StaticGrappler,
+)
+
+from .conftest import PluginIteratorFunction
+
+
+class Broken:
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class BrokenLoadingGrappler(StaticGrappler):
+    def load(self, plugin: Plugin) -> Any:
+        value = super().load(plugin)
+        if isinstance(value, Broken):
+            raise ImportError(f"cannot load {value.value}")
+        return value
+
+
+@pytest.fixture
+def source() -> BrokenLoadingGrappler:
+    return BrokenLoadingGrappler((["topic"], 1), (["topic"], Broken(2)), (["topic"], 3))
+
+
+@pytest.fixture(params=["bare", "in-composite"])
+def grappler(request: Any, source: BrokenLoadingGrappler) -> Grappler:
+    breaker = CircuitBreakerGrappler(policy=FailurePolicy(backoff=60))
+
+    if request.param == "bare":
+        return breaker.rewrap(source)
+    else:
+        return CompositeGrappler(source).wrap(breaker)
+
+
+def load_all(grappler: Grappler, iter_plugins: PluginIteratorFunction) -> List[Any]:
+    values = []
+
+    for plugin in iter_plugins(grappler, "topic"):
+        try:
+            values.append(grappler.load(plugin))
+        except ImportError:
+            pass
+
+    return values
+
+
+def test_failing_plugins_are_skipped_after_failure(
+    grappler: Grappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    assert len(list(iter_plugins(grappler, "topic"))) == 3
+    assert load_all(grappler, iter_plugins) == [1, 3]
+    assert len(list(iter_plugins(grappler, "topic"))) == 2
+
+
+def test_suspended_plugins_cannot_be_loaded(source: BrokenLoadingGrappler) -> None:
+    grappler = CircuitBreakerGrappler(source)
+
+    with grappler.find("topic") as plugins:
+        broken = list(plugins)[1]
+
+        with pytest.raises(ImportError):
+            grappler.load(broken)
+
+        with pytest.raises(SuspendedPluginError):
+            grappler.load(broken)
+
+
+def test_backoff_expires(source: BrokenLoadingGrappler) -> None:
+    policy = FailurePolicy(backoff=0.05)
+    grappler = CircuitBreakerGrappler(source, policy)
+    plugin = next(p for p in source.cache if isinstance(source.cache[p], Broken))
+
+    policy.record_failure(plugin, ImportError())
+    assert policy.is_suspended(plugin)
+    time.sleep(0.1)
+    assert not policy.is_suspended(plugin)
+
+    policy.record_failure(plugin, ImportError())
+    record = policy.get_record(plugin)
+    assert record is not None and record["failures"] == 2
+    assert len(list(grappler.find("topic").__enter__())) == 2
+
+
+def test_failure_records_are_persisted(tmp_path: Path) -> None:
+    path = tmp_path / "failures.json"
+    plugin = Plugin(
+        "grappler.tests", "a-plugin", StaticGrappler.internal_package, (), None
+    )
+
+    FailurePolicy(path=path).record_failure(plugin, ImportError("broken"))
+    assert FailurePolicy(path=path).is_suspended(plugin)
+
+    upgraded = Plugin(
+        plugin.grappler_id,
+        plugin.plugin_id,
+        plugin.package._replace(version="1.0.0"),
+        (),
+        None,
+    )
+    assert not FailurePolicy(path=path).is_suspended(upgraded)
+
+    FailurePolicy(path=path).record_success(plugin)
+    assert not FailurePolicy(path=path).is_suspended(plugin)
+
+
+def test_suspensions_bypass_cached_decisions(
+    source: BrokenLoadingGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    policy = FailurePolicy(backoff=60)
+    grappler = (
+        CompositeGrappler(source)
+        .wrap(CircuitBreakerGrappler(policy=policy))
+        .wrap(BouncerGrappler())
+    )
+    grappler.configure(BouncerGrappler.cache_decisions)
+
+    plugin = next(iter(iter_plugins(grappler, "topic")))
+    policy.record_failure(plugin, ImportError())
+
+    assert plugin not in list(iter_plugins(grappler, "topic"))
+    assert len(list(iter_plugins(grappler, "topic"))) == 2
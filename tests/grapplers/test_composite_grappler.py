@@ -1,10 +1,22 @@
 import itertools
+import threading
+import time
 from contextlib import ExitStack
-from typing import Any, Iterable, Optional, Tuple
+from typing import Any, Iterable, List, Optional, Tuple
 from unittest import mock
 
-from grappler import Grappler, Plugin
-from grappler.grapplers import CompositeGrappler, StaticGrappler
+import pytest
+
+from grappler import Grappler, Package, Plugin
+from grappler.grapplers import (
+    BlacklistingGrappler,
+    BouncerGrappler,
+    CompositeGrappler,
+    LayerReport,
+    Query,
+    StaticGrappler,
+)
+from grappler.grapplers._composite import _version_key
 from grappler.grapplers.bases import BasicGrappler
 
 from .conftest import PluginLoaderFunction
@@ -111,3 +123,286 @@ def test_composite_grappler_configure_group(
     )
 
     assert set(load_plugins(grappler).values()) == set(range(50)[::3][::2])
+
+
+def test_composite_grappler_reuses_wrapper_chain(
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    wrapper = EveryNthPluginGrappler(2)
+    grappler = (
+        CompositeGrappler()
+        .source(StaticGrappler(*[(["numeric", "small"], i) for i in range(50)]))
+        .wrap(wrapper)
+    )
+
+    with mock.patch.object(wrapper, "rewrap", wraps=wrapper.rewrap) as rewrap:
+        for _ in range(3):
+            assert set(load_plugins(grappler).values()) == set(range(50)[::2])
+        assert rewrap.call_count == 1
+
+        grappler.configure(EveryNthPluginGrappler.change_n, 5)
+        for _ in range(3):
+            assert set(load_plugins(grappler).values()) == set(range(50)[::5])
+        assert rewrap.call_count == 2
+
+        grappler.source(StaticGrappler(*[(["numeric", "big"], 50)]))
+        assert set(load_plugins(grappler).values()) == set(range(51)[::5])
+        assert rewrap.call_count == 3
+
+
+def test_composite_grappler_sees_later_list_changes(
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    source = StaticGrappler(*[(["numeric"], i) for i in range(5)])
+    blacklist = BlacklistingGrappler()
+    grappler = CompositeGrappler(source).wrap(blacklist)
+
+    assert set(load_plugins(grappler).values()) == set(range(5))
+
+    with grappler.find() as plugins:
+        blacklist.blacklist(next(plugins))
+
+    assert set(load_plugins(grappler).values()) == set(range(1, 5))
+
+
+@pytest.mark.parametrize("deduplicate", [False, True])
+def test_composite_grappler_pushes_queries_to_sources(
+    load_plugins: PluginLoaderFunction, deduplicate: bool
+) -> None:
+    packages = [Package(f"package-{i}", "1.0", f"package-{i}", None) for i in range(2)]
+    source = StaticGrappler()
+
+    for i in range(6):
+        source.add_plugin(
+            Plugin(source.id, f"plugin-{i}", packages[i % 2], ("n",), None), i
+        )
+
+    seen: List[Plugin] = []
+    inner, outer = BouncerGrappler(), BouncerGrappler()
+    inner.checker(lambda plugin: seen.append(plugin) is None)
+    outer.query(Query.not_in("plugin_id", ["plugin-2"]))
+    blacklist = BlacklistingGrappler(items=[packages[1]])
+    grappler = CompositeGrappler(source).wrap(inner).wrap(outer).wrap(blacklist)
+
+    if deduplicate:
+        grappler.deduplicate()
+
+    assert set(load_plugins(grappler).values()) == {0, 4}
+    assert len(seen) == (6 if deduplicate else 2)
+
+    # queries are read from the wrappers on every find
+    seen.clear()
+    blacklist.blacklist(Plugin(source.id, "plugin-4", packages[0], ("n",), None))
+    assert set(load_plugins(grappler).values()) == {0}
+    assert len(seen) == (6 if deduplicate else 1)
+
+
+class SlowGrappler(StaticGrappler):
+    def create_iteration_context(
+        self, topic: Optional[str], stack: ExitStack
+    ) -> Tuple[Iterable[Plugin], Any]:
+        time.sleep(0.05)
+        return super().create_iteration_context(topic, stack)
+
+
+def test_composite_grappler_reports_layers(
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    grappler = (
+        CompositeGrappler()
+        .source(SlowGrappler(*[(["numeric"], i) for i in range(3)]))
+        .source(StaticGrappler(*[(["numeric"], i) for i in range(3, 8)]))
+        .wrap(EveryNthPluginGrappler(2))
+        .instrument()
+    )
+
+    assert set(load_plugins(grappler).values()) == {0, 2, 4, 6}
+
+    slow, fast, sources, wrapper = grappler.report()
+    assert (slow.kind, fast.kind, sources.kind, wrapper.kind) == (
+        "source",
+        "source",
+        "sources",
+        "wrapper",
+    )
+    assert wrapper.grappler_id == "grappler.tests.every-2-grappler"
+    assert [(r.finds, r.plugins_in, r.plugins_out) for r in (slow, fast)] == [
+        (1, 3, 3),
+        (1, 5, 5),
+    ]
+    assert (sources.plugins_in, sources.plugins_out) == (8, 8)
+    assert (wrapper.plugins_in, wrapper.plugins_out) == (8, 4)
+    assert [r.loads for r in (slow, fast, sources, wrapper)] == [2, 2, 4, 4]
+
+    # time is attributed to the layer it was spent in
+    assert slow.find_time >= 0.05
+    assert sources.find_time < 0.05 and wrapper.find_time < 0.05
+
+    grappler.reset_report()
+    assert all(
+        (r.finds, r.plugins_out, r.loads, r.find_time, r.load_time)
+        == (0, 0, 0, 0.0, 0.0)
+        for r in grappler.report()
+    )
+
+
+def test_composite_grappler_loads_when_instrumented() -> None:
+    grappler = (
+        CompositeGrappler(StaticGrappler(*[(["numeric"], i) for i in range(5)]))
+        .wrap(BouncerGrappler())
+        .instrument()
+    )
+
+    with grappler.find() as plugins:
+        assert [grappler.load(plugin) for plugin in plugins] == list(range(5))
+
+    assert [r.loads for r in grappler.report()] == [5, 5, 5]
+
+
+def test_composite_grappler_not_instrumented_by_default() -> None:
+    grappler = CompositeGrappler(StaticGrappler((["numeric"], 1)))
+
+    with grappler.find() as plugins:
+        list(plugins)
+
+    assert grappler.report() == [
+        LayerReport(
+            grappler_id=grappler._sources[0].id,
+            kind="source",
+            finds=0,
+            plugins_in=0,
+            plugins_out=0,
+            find_time=0.0,
+            loads=0,
+            load_time=0.0,
+        ),
+        LayerReport(
+            grappler_id="grappler.grapplers._internal.MetaSourceGrappler",
+            kind="sources",
+            finds=0,
+            plugins_in=0,
+            plugins_out=0,
+            find_time=0.0,
+            loads=0,
+            load_time=0.0,
+        ),
+    ]
+
+
+class BarrierGrappler(StaticGrappler):
+    def __init__(self, barrier: threading.Barrier, *values: int) -> None:
+        super().__init__(*[(["numeric"], value) for value in values])
+        self.barrier = barrier
+        self.open_contexts = 0
+
+    def create_iteration_context(
+        self, topic: Optional[str], stack: ExitStack
+    ) -> Tuple[Iterable[Plugin], Any]:
+        self.barrier.wait()
+        self.open_contexts += 1
+        return super().create_iteration_context(topic, stack)
+
+    def cleanup_iteration_context(self, context: Any) -> None:
+        self.open_contexts -= 1
+
+
+def test_composite_grappler_finds_sources_concurrently(
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    # every source waits for all the others to be searched at the same time
+    barrier = threading.Barrier(3, timeout=5)
+    sources = [
+        BarrierGrappler(barrier, 1, 2),
+        BarrierGrappler(barrier),
+        BarrierGrappler(barrier, 3),
+    ]
+    grappler = CompositeGrappler(*sources).concurrent_sources()
+
+    assert list(load_plugins(grappler).values()) == [1, 2, 3]
+    assert [source.open_contexts for source in sources] == [0, 0, 0]
+
+
+def test_composite_grappler_closes_concurrent_sources_early() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    sources = [BarrierGrappler(barrier, 1, 2), BarrierGrappler(barrier, 3)]
+    grappler = CompositeGrappler(*sources).concurrent_sources(max_workers=2)
+
+    with grappler.find() as plugins:
+        assert grappler.load(next(plugins)) == 1
+
+    assert [source.open_contexts for source in sources] == [0, 0]
+
+
+def make_versioned_source(version: str, *plugin_ids: str) -> StaticGrappler:
+    package = Package("versioned", version, "grappler.tests.versioned", None)
+    grappler = StaticGrappler(package=package)
+
+    for plugin_id in plugin_ids:
+        plugin = Plugin(grappler.id, plugin_id, package, ("versioned",), None)
+        grappler.add_plugin(plugin, f"{plugin_id}=={version}")
+
+    return grappler
+
+
+@pytest.mark.parametrize(
+    "strategy, expected",
+    [
+        (None, ["a==1.0", "b==1.0", "a==1.10", "c==1.10", "b==1.2"]),
+        (CompositeGrappler.Deduplication.FIRST, ["a==1.0", "b==1.0", "c==1.10"]),
+        (
+            CompositeGrappler.Deduplication.HIGHEST_VERSION,
+            ["a==1.10", "b==1.2", "c==1.10"],
+        ),
+    ],
+    ids=["none", "first", "highest-version"],
+)
+def test_composite_grappler_deduplicates_sources(
+    strategy: Optional[CompositeGrappler.Deduplication],
+    expected: List[str],
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    bouncer = BouncerGrappler()
+    checked: List[str] = []
+    bouncer.checker(lambda plugin: checked.append(plugin.plugin_id) or True)
+
+    grappler = (
+        CompositeGrappler(
+            make_versioned_source("1.0", "a", "b"),
+            make_versioned_source("1.10", "a", "c"),
+            make_versioned_source("1.2", "b"),
+        )
+        .wrap(bouncer)
+        .deduplicate(strategy)
+    )
+
+    assert list(load_plugins(grappler).values()) == expected
+    assert len(checked) == len(expected)
+
+
+@pytest.mark.parametrize(
+    "lower, higher",
+    [
+        ("1.0", "1.0.1"),
+        ("1.2", "1.10"),
+        ("1.0rc1", "1.0"),
+        ("1.0.dev1", "1.0a1"),
+        ("1.0a2", "1.0b1"),
+        ("1.0", "1.0.post1"),
+        ("1.0.post1", "1.0.1"),
+        ("1.0", "1.0+local"),
+        ("1.0.0", "1.0+local"),
+        ("1.0+local", "1.0.post1"),
+        ("1.0+abc", "1.0+1"),
+        ("1.0rc1", "1.0.0"),
+        ("2.0", "1!1.0"),
+    ],
+)
+def test_version_ordering(lower: str, higher: str) -> None:
+    assert _version_key(lower) < _version_key(higher)
+
+
+@pytest.mark.parametrize(
+    "version, same", [("1.0", "1.0.0"), ("1", "1.0.0"), ("v1.0", "1"), ("0", "0.0")]
+)
+def test_equal_versions(version: str, same: str) -> None:
+    assert _version_key(version) == _version_key(same)
@@ -0,0 +1,180 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from grappler.grapplers import (
+    DirectoryGrappler,
+    ManifestGrappler,
+    _directory,
+    write_manifest,
+)
+
+from .conftest import (
+    PluginExtractorFunction,
+    PluginIteratorFunction,
+    PluginLoaderFunction,
+)
+
+FORMATTERS = """
+__plugins__ = [
+    {"object": "html", "topics": ["formatters"]},
+    {
+        "object": "Markdown.render",
+        "topics": ["formatters", "renderers"],
+        "name": "markdown",
+        "capabilities": ["text"],
+    },
+]
+
+html = "<html>"
+
+class Markdown:
+    render = "# markdown"
+"""
+
+NOT_RUN = """
+__plugins__ = {"object": "value", "topics": ["formatters"]}
+
+raise RuntimeError("module was run")
+"""
+
+
+@pytest.fixture
+def directory(tmp_path: Path) -> Path:
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    (directory / "formatters.py").write_text(FORMATTERS)
+    (directory / "_private.py").write_text(NOT_RUN)
+    (directory / "notes.txt").write_text(NOT_RUN)
+    return directory
+
+
+def test_finds_declared_plugins(
+    directory: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    (directory / "broken.py").write_text(NOT_RUN)
+    plugins = get_plugins(DirectoryGrappler(directory))
+
+    path = str(directory / "formatters.py")
+    assert set(plugins) == {
+        f"{directory / 'broken.py'}:value",
+        f"{path}:html",
+        f"{path}:Markdown.render",
+    }
+
+    markdown = plugins[f"{path}:Markdown.render"]
+    assert markdown.grappler_id == DirectoryGrappler.id
+    assert markdown.name == "markdown"
+    assert markdown.topics == ("formatters", "renderers")
+    assert markdown.capabilities == ("text",)
+    assert markdown.package.name == "plugins"
+    assert plugins[f"{path}:html"].name == "html"
+
+
+def test_finds_plugins_by_topic(
+    directory: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    grappler = DirectoryGrappler(directory)
+
+    assert [plugin.name for plugin in get_plugins(grappler, "renderers").values()] == [
+        "markdown"
+    ]
+    assert len(get_plugins(grappler, "formatters")) == 2
+    assert not get_plugins(grappler, "other")
+
+
+def test_loads_plugins(directory: Path, load_plugins: PluginLoaderFunction) -> None:
+    loaded = load_plugins(DirectoryGrappler(directory), "formatters")
+
+    assert sorted(loaded.values()) == ["# markdown", "<html>"]
+
+
+def test_load_error_is_raised(
+    directory: Path, iter_plugins: PluginIteratorFunction
+) -> None:
+    (directory / "formatters.py").write_text(NOT_RUN)
+    grappler = DirectoryGrappler(directory)
+
+    with pytest.raises(RuntimeError, match="module was run"):
+        for plugin in iter_plugins(grappler):
+            grappler.load(plugin)
+
+
+def test_invalid_declarations_are_ignored(
+    directory: Path,
+    get_plugins: PluginExtractorFunction,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    (directory / "syntax.py").write_text("__plugins__ = [")
+    (directory / "dynamic.py").write_text("__plugins__ = [make_plugin()]")
+    (directory / "topics.py").write_text('__plugins__ = {"object": "x"}')
+    (directory / "none.py").write_text("x = 1")
+
+    plugins = get_plugins(DirectoryGrappler(directory))
+
+    assert len(plugins) == 2
+    assert caplog.text.count("Ignoring plugins declared by") == 3
+
+
+def test_unchanged_files_are_not_parsed_again(
+    directory: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    grappler = DirectoryGrappler(directory)
+    parse = mock.Mock(wraps=_directory._parse_declarations)
+
+    with mock.patch.object(_directory, "_parse_declarations", parse):
+        get_plugins(grappler)
+        get_plugins(grappler)
+        assert parse.call_count == 1
+
+        path = directory / "formatters.py"
+        path.write_text(FORMATTERS.replace('"html"', '"htm"'))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        plugins = get_plugins(grappler)
+        assert parse.call_count == 2
+        assert f"{path}:htm" in plugins
+
+
+def test_cache_file_is_reused(
+    directory: Path, tmp_path: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    cache_file = tmp_path / "cache.json"
+    expected = get_plugins(DirectoryGrappler(directory, cache_file=cache_file))
+    assert cache_file.exists()
+
+    parse = mock.Mock(wraps=_directory._parse_declarations)
+
+    with mock.patch.object(_directory, "_parse_declarations", parse):
+        grappler = DirectoryGrappler(directory, cache_file=cache_file)
+        assert get_plugins(grappler) == expected
+
+    parse.assert_not_called()
+
+
+def test_invalid_cache_file_is_ignored(
+    directory: Path, tmp_path: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text("[not json")
+
+    grappler = DirectoryGrappler(directory, cache_file=cache_file)
+    assert len(get_plugins(grappler)) == 2
+
+
+def test_plugins_can_be_written_to_manifest(
+    directory: Path,
+    tmp_path: Path,
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    grappler = DirectoryGrappler(directory)
+
+    assert write_manifest(tmp_path / "plugins.json", grappler) == 2
+    # the package isn't an installed distribution, so it can't be stale
+    manifest = ManifestGrappler(tmp_path / "plugins.json", check=True)
+
+    assert manifest.stale_packages() == []
+    assert load_plugins(manifest) == load_plugins(grappler)
@@ -1,9 +1,11 @@
 from multiprocessing import Pool
-from typing import List, Optional
+from typing import Any, List, Optional, Set
+from unittest import mock
 
+import importlib_metadata as metadata
 import pytest
 
-from grappler.grapplers import EntryPointGrappler
+from grappler.grapplers import EntryPointGrappler, Query
 from tests.grapplers.conftest import PluginExtractorFunction, PluginIteratorFunction
 
 
@@ -53,3 +55,52 @@ def load_plugin_ids(_: Optional[int] = None) -> List[str]:
     grappler = EntryPointGrappler()
     with grappler.find() as it:
         return [plugin.plugin_id for plugin in it]
+
+
+def test_entry_point_extras_are_capabilities(
+    get_plugins: PluginExtractorFunction,
+) -> None:
+    grappler = EntryPointGrappler()
+    entry_points = [
+        metadata.EntryPoint("plain", "os.path:join", "grappler.tests"),
+        metadata.EntryPoint(
+            "capable", "os.path:split [cap_1, cap_2]", "grappler.tests"
+        ),
+    ]
+
+    with mock.patch.object(grappler, "_entry_points", return_value=entry_points):
+        plugins = get_plugins(grappler, "grappler.tests")
+
+    assert {plugin.name: plugin.capabilities for plugin in plugins.values()} == {
+        "plain": (),
+        "capable": ("cap_1", "cap_2"),
+    }
+
+
+def test_restricted_copy_skips_excluded_distributions(
+    get_plugins: PluginExtractorFunction,
+) -> None:
+    grappler = EntryPointGrappler()
+    restricted = grappler.restricted(
+        lambda: [
+            Query.equals("package.id", "pytest"),
+            Query.equals("topics", "console_scripts"),
+        ]
+    )
+    read_from: Set[str] = set()
+    read_text = metadata.PathDistribution.read_text
+
+    def record_read_text(dist: metadata.PathDistribution, filename: str) -> Any:
+        read_from.add(dist._normalized_name)
+        return read_text(dist, filename)
+
+    with mock.patch.object(metadata.PathDistribution, "read_text", record_read_text):
+        plugins = get_plugins(restricted)
+
+    assert read_from == {"pytest"}
+    assert plugins == {
+        plugin_id: plugin
+        for plugin_id, plugin in get_plugins(grappler, "console_scripts").items()
+        if plugin.package.id == "pytest"
+    }
+    assert plugins
@@ -0,0 +1,111 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from grappler import Package, Plugin
+from grappler.grapplers import (
+    BlacklistingGrappler,
+    CompositeGrappler,
+    IdTable,
+    InvalidIdTableError,
+    StaticGrappler,
+    WhitelistingGrappler,
+    write_id_table,
+)
+from grappler.grapplers._id_table import main
+
+from .conftest import PluginExtractorFunction
+
+
+@pytest.fixture
+def table_path(tmp_path: Path) -> Path:
+    path = tmp_path / "ids.idt"
+    write_id_table(
+        path,
+        plugin_ids=[f"plugin-{i}" for i in range(0, 10000, 2)],
+        package_ids=["package-é", "package-b"],
+    )
+    return path
+
+
+def test_id_table_contains_written_ids(table_path: Path) -> None:
+    with IdTable(table_path) as table:
+        assert (table.plugin_count, table.package_count) == (5000, 2)
+        assert all(table.has_plugin_id(f"plugin-{i}") for i in range(0, 10000, 2))
+        assert not any(table.has_plugin_id(f"plugin-{i}") for i in range(1, 10000, 2))
+        assert table.has_package_id("package-é")
+        assert not table.has_package_id("plugin-0")
+        assert not table.has_plugin_id("package-b")
+
+
+def test_empty_id_table(tmp_path: Path) -> None:
+    write_id_table(tmp_path / "empty.idt")
+
+    with IdTable(tmp_path / "empty.idt") as table:
+        assert (table.plugin_count, table.package_count) == (0, 0)
+        assert not table.has_plugin_id("")
+
+
+@pytest.mark.parametrize("content", [b"", b"not an id table, but long enough" * 2])
+def test_invalid_id_table(tmp_path: Path, content: bytes) -> None:
+    (tmp_path / "invalid.idt").write_bytes(content)
+
+    with pytest.raises(InvalidIdTableError):
+        IdTable(tmp_path / "invalid.idt")
+
+
+def test_id_table_tool(tmp_path: Path) -> None:
+    (tmp_path / "plugins.txt").write_text("a\n\nb\n", encoding="utf-8")
+    (tmp_path / "packages.txt").write_text("c\n", encoding="utf-8")
+
+    assert (
+        main(
+            [
+                os.fspath(tmp_path / "ids.idt"),
+                "--plugins",
+                os.fspath(tmp_path / "plugins.txt"),
+                "--packages",
+                os.fspath(tmp_path / "packages.txt"),
+            ]
+        )
+        == 0
+    )
+
+    with IdTable(tmp_path / "ids.idt") as table:
+        assert (table.plugin_count, table.package_count) == (2, 1)
+        assert table.has_plugin_id("b") and table.has_package_id("c")
+
+
+@pytest.mark.parametrize("composite", [True, False])
+def test_list_grapplers_use_id_tables(
+    tmp_path: Path, get_plugins: PluginExtractorFunction, composite: bool
+) -> None:
+    package = Package("a-package", "1.0", "a-package-id", None)
+    source = StaticGrappler()
+    plugins = [
+        Plugin(source.id, plugin_id, package, ("numbers",), plugin_id)
+        for plugin_id in ["listed", "unlisted"]
+    ]
+
+    for value, plugin in enumerate(plugins):
+        source.add_plugin(plugin, value)
+
+    write_id_table(tmp_path / "ids.idt", plugin_ids=["listed"])
+    table = IdTable(tmp_path / "ids.idt")
+
+    blacklist, whitelist = BlacklistingGrappler(), WhitelistingGrappler()
+    blacklist.blacklist(table)
+    whitelist.whitelist(table)
+
+    if composite:
+        grapplers = [CompositeGrappler(source).wrap(g) for g in (blacklist, whitelist)]
+    else:
+        grapplers = [blacklist.rewrap(source), whitelist.rewrap(source)]
+
+    assert list(get_plugins(grapplers[0])) == ["unlisted"]
+    assert list(get_plugins(grapplers[1])) == ["listed"]
+
+    write_id_table(tmp_path / "packages.idt", package_ids=[package.id])
+    blacklist.blacklist(IdTable(tmp_path / "packages.idt"))
+    assert not get_plugins(grapplers[0])
@@ -1,4 +1,7 @@
-from typing import Any, Literal, Optional, Union
+import re
+import threading
+from typing import Any, List, Literal, Optional, Union
+from unittest import mock
 from uuid import uuid4
 
 import pytest
@@ -7,8 +10,10 @@ from grappler import Package, Plugin
 from grappler.grapplers import (
     BlacklistingGrappler,
     CompositeGrappler,
+    Query,
     StaticGrappler,
     WhitelistingGrappler,
+    glob_pattern,
 )
 from grappler.grapplers._list import _ListGrapplerMixin
 
@@ -108,6 +113,15 @@ def test_blacklist_package_by_id(
         ({"platform": ["linux", None]}, "package", True),
         ({"name": "a-test-package", "version": "0.1.0"}, "package", True),
         ({"name": "a-test-package", "version": ["0.1.1", "1.0.0"]}, "package", False),
+        ({"name": re.compile(r"a-\w+-plugin")}, "plugin", True),
+        ({"name": re.compile(r"foo")}, "plugin", False),
+        ({"name": glob_pattern("a-*")}, "plugin", True),
+        ({"topics": glob_pattern("topic.b?z")}, "plugin", True),
+        ({"topics": glob_pattern("topic.[!b]*")}, "plugin", True),
+        ({"topics": glob_pattern("topic.[!bf]*")}, "plugin", False),
+        ({"name": glob_pattern("a-*"), "topics": ["unmatched"]}, "plugin", False),
+        ({"id": glob_pattern("grappler.*"), "name": "a-test-package"}, "package", True),
+        ({"platform": glob_pattern("*")}, "package", False),
     ],
 )
 def test_blacklist_item_structurally(
@@ -247,6 +261,217 @@ def test_whitelist_item_structurally(
         assert len(found_plugins) == 0
 
 
+def test_list_matches_among_many_specs() -> None:
+    package = Package("a-test-package", "0.1.0", "a-test-package-id", "linux")
+    plugins = [
+        Plugin("grappler.tests", f"plugin-{i}", package, (f"topic-{i % 7}",), f"p{i}")
+        for i in range(100)
+    ]
+    grappler = BlacklistingGrappler()
+
+    for i in range(1000):
+        grappler.blacklist({"plugin_id": f"other-{i}"}, type="plugin")
+        grappler.blacklist({"name": f"p{i}", "topics": ["topic-x"]}, type="plugin")
+        grappler.blacklist({"id": f"other-{i}"}, type="package")
+
+    assert not any(grappler._is_listed(plugin) for plugin in plugins)
+
+    grappler.blacklist({"plugin_id": "plugin-1"}, type="plugin")
+    grappler.blacklist({"name": "p2", "topics": ["topic-2"]}, type="plugin")
+    grappler.blacklist({"name": "p4", "topics": ["topic-5"]}, type="plugin")
+    grappler.blacklist({"topics": ["topic-3", "topic-4"]}, type="plugin")
+    grappler.blacklist({"topics": ["topic-6"]}, type="plugin")
+    grappler.blacklist(
+        {"name": ["p5", "p7"], "grappler_id": "grappler.tests"}, type="plugin"
+    )
+
+    assert {p.name for p in plugins if grappler._is_listed(p)} == {
+        "p1",
+        "p2",
+        "p5",
+        "p7",
+        *(p.name for p in plugins if p.topics == ("topic-6",)),
+    }
+
+    grappler.blacklist({"platform": ["win32", "linux"]}, type="package")
+    assert all(grappler._is_listed(plugin) for plugin in plugins)
+
+
+def test_list_follows_item_changes() -> None:
+    package = Package("a-test-package", "0.1.0", "a-test-package-id", "linux")
+    first, second = (
+        Plugin("grappler.tests", f"plugin-{i}", package, (), f"p{i}") for i in range(2)
+    )
+    grappler = BlacklistingGrappler()
+
+    grappler.blacklist({"plugin_id": "plugin-0"}, type="plugin")
+    assert grappler._is_listed(first) and not grappler._is_listed(second)
+
+    # changes which keep the length of the list
+    grappler.plugin_items[0] = {"plugin_id": "plugin-1"}
+    assert not grappler._is_listed(first) and grappler._is_listed(second)
+
+    grappler.plugin_items.pop()
+    grappler.plugin_items.append({"name": "p0"})
+    assert grappler._is_listed(first) and not grappler._is_listed(second)
+
+    grappler.plugin_items = [{"name": "p1"}]
+    assert not grappler._is_listed(first) and grappler._is_listed(second)
+
+    grappler.plugin_items.clear()
+    grappler.package_items = [{"id": "a-test-package-id"}]
+    assert grappler._is_listed(first) and grappler._is_listed(second)
+
+
+def test_dynamic_items_are_listed_once_per_find(
+    blacklisting_grappler: Union[CompositeGrappler, BlacklistingGrappler],
+    get_plugins: PluginExtractorFunction,
+) -> None:
+    calls: List[None] = []
+
+    def get_blacklisted() -> List[Plugin]:
+        calls.append(None)
+        return []
+
+    add_item_to_list(blacklisting_grappler, get_blacklisted)
+
+    assert len(get_plugins(blacklisting_grappler)) > 1
+    assert len(calls) == 1
+
+    get_plugins(blacklisting_grappler)
+    assert len(calls) == 2
+
+
+def test_dynamic_items_are_cached_for_ttl(
+    source_grappler: StaticGrappler, get_plugins: PluginExtractorFunction
+) -> None:
+    plugin = next(iter(get_plugins(source_grappler).values()))
+    blacklisted: List[Plugin] = []
+    grappler = BlacklistingGrappler(source_grappler)
+    grappler.blacklist(lambda: list(blacklisted))
+    grappler.cache_dynamic_items(60)
+
+    with mock.patch("grappler.grapplers._list.time.monotonic", return_value=0):
+        assert plugin.plugin_id in get_plugins(grappler)
+
+        blacklisted.append(plugin)
+        assert plugin.plugin_id in get_plugins(grappler)
+
+    with mock.patch("grappler.grapplers._list.time.monotonic", return_value=60):
+        assert plugin.plugin_id not in get_plugins(grappler)
+
+
+def test_dynamic_items_are_refreshed_in_background(
+    source_grappler: StaticGrappler, get_plugins: PluginExtractorFunction
+) -> None:
+    plugin = next(iter(get_plugins(source_grappler).values()))
+    refreshing = threading.Event()
+    blacklisted: List[Plugin] = []
+
+    def get_blacklisted() -> List[Plugin]:
+        if blacklisted:
+            refreshing.wait(timeout=5)
+        return list(blacklisted)
+
+    grappler = BlacklistingGrappler(source_grappler)
+    grappler.blacklist(get_blacklisted)
+    grappler.cache_dynamic_items(0, background=True)
+    assert plugin.plugin_id in get_plugins(grappler)
+
+    # the slow refresh doesn't block finding plugins with the expired items
+    blacklisted.append(plugin)
+    assert plugin.plugin_id in get_plugins(grappler)
+
+    refreshing.set()
+
+    for thread in threading.enumerate():
+        if thread.name == "grappler-dynamic-items":
+            thread.join(timeout=5)
+
+    assert plugin.plugin_id not in get_plugins(grappler)
+
+
+def test_list_combines_patterns() -> None:
+    package = Package("a-test-package", "0.1.0", "a-test-package-id", None)
+    grappler = BlacklistingGrappler()
+
+    for i in range(100):
+        grappler.blacklist({"plugin_id": glob_pattern(f"ns{i}.*")}, type="plugin")
+
+    grappler.blacklist({"plugin_id": re.compile(r"(x)\1")}, type="plugin")
+    grappler.blacklist({"plugin_id": re.compile("CASE", re.I)}, type="plugin")
+
+    def is_listed(plugin_id: str) -> bool:
+        return grappler._is_listed(Plugin("", plugin_id, package, (), ""))
+
+    assert is_listed("ns42.plugin") and is_listed("ns0.") and is_listed("ns99.x")
+    assert not is_listed("ns100.plugin") and not is_listed("xns1.plugin")
+    assert is_listed("xx") and not is_listed("xy")
+    assert is_listed("case") and not is_listed("cases")
+
+    plugin_patterns = grappler._compiled.get(
+        grappler._plugin_items, grappler._package_items
+    )[0].patterns["plugin_id"]
+    assert len(plugin_patterns._combined or ()) == 2  # the backreference is separate
+
+
+@pytest.mark.parametrize("others", [0, 2])
+def test_list_patterns_with_global_flags(others: int) -> None:
+    package = Package("a-test-package", "0.1.0", "a-test-package-id", None)
+    grappler = BlacklistingGrappler()
+
+    grappler.blacklist({"name": re.compile("(?i)acme.*")}, type="plugin")
+
+    for i in range(others):
+        grappler.blacklist({"name": re.compile(f"other{i}")}, type="plugin")
+
+    def is_listed(name: str) -> bool:
+        return grappler._is_listed(Plugin("", "a-plugin", package, (), name))
+
+    assert is_listed("ACME-plugin") and is_listed("acme")
+    assert not is_listed("a-plugin") and not is_listed("OTHER0")
+
+
+@pytest.mark.parametrize(
+    "glob,matches,non_matches",
+    [
+        ("a.*", ["a.", "a.b.c", "a.\n"], ["a", "ba.b"]),
+        ("a?c", ["abc", "a.c"], ["ac", "abbc"]),
+        ("[ab]*", ["a", "bcd"], ["c"]),
+        ("[!ab]", ["c"], ["a", "cc"]),
+        ("[]", ["[]"], ["]"]),
+        ("a|b&c", ["a|b&c"], ["a"]),
+        ("[a|b]", ["|"], ["[a|b]"]),
+    ],
+)
+def test_glob_pattern(glob: str, matches: List[str], non_matches: List[str]) -> None:
+    pattern = glob_pattern(glob)
+    assert all(pattern.fullmatch(value) for value in matches)
+    assert not any(pattern.fullmatch(value) for value in non_matches)
+
+
+def test_cached_decisions_follow_list_changes(
+    blacklisting_grappler: Union[CompositeGrappler, BlacklistingGrappler],
+    get_plugins: PluginExtractorFunction,
+) -> None:
+    first, second = list(get_plugins(blacklisting_grappler).values())[:2]
+    blacklisted: List[Plugin] = []
+
+    if isinstance(blacklisting_grappler, CompositeGrappler):
+        blacklisting_grappler.configure(BlacklistingGrappler.cache_decisions)
+    else:
+        blacklisting_grappler.cache_decisions()
+
+    add_item_to_list(blacklisting_grappler, lambda: list(blacklisted))
+    assert first.plugin_id in get_plugins(blacklisting_grappler)
+
+    add_item_to_list(blacklisting_grappler, first)
+    assert first.plugin_id not in get_plugins(blacklisting_grappler)
+
+    blacklisted.append(second)
+    assert second.plugin_id not in get_plugins(blacklisting_grappler)
+
+
 @pytest.mark.parametrize("spec_type", ["plugin", "package"])
 def test_empty_spec_raises_error(
     blacklisting_grappler: Union[CompositeGrappler, BlacklistingGrappler],
@@ -285,3 +510,22 @@ def add_item_to_list(
         grappler.blacklist(item, type=type)  # type: ignore
     else:
         grappler.whitelist(item, type=type)  # type: ignore
+
+
+def test_listed_ids_as_queries() -> None:
+    package = Package("a-package", "1.0", "a-package-id", None)
+    plugin = Plugin("a-grappler", "a-plugin-id", package, ("topic",), None)
+
+    blacklist = BlacklistingGrappler(items=[package, plugin])
+    blacklist.blacklist({"name": "a-name"}, type="plugin")
+    assert set(blacklist.queries()) == {
+        Query.not_in("plugin_id", ["a-plugin-id"]),
+        Query.not_in("package.id", ["a-package-id"]),
+    }
+
+    whitelist = WhitelistingGrappler(items=[package])
+    assert whitelist.queries() == (Query.is_in("package.id", ["a-package-id"]),)
+
+    # plugins from either list can't be included by a single query
+    whitelist.whitelist(plugin)
+    assert whitelist.queries() == ()
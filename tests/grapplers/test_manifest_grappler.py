@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from grappler import Package, Plugin
+from grappler.grapplers import (
+    BlacklistingGrappler,
+    CompositeGrappler,
+    EntryPointGrappler,
+    InvalidManifestError,
+    ManifestGrappler,
+    StaleManifestError,
+    StaticGrappler,
+    write_manifest,
+)
+
+from .conftest import (
+    PluginExtractorFunction,
+    PluginIteratorFunction,
+    PluginLoaderFunction,
+)
+
+
+@pytest.fixture
+def grappler() -> CompositeGrappler:
+    pytest_package = Package("pytest", "", "pytest", None)
+    return CompositeGrappler(
+        EntryPointGrappler(), StaticGrappler((["pytest11"], 1))
+    ).wrap(BlacklistingGrappler(items=[pytest_package]))
+
+
+def test_manifest_serves_found_plugins(
+    tmp_path: Path,
+    grappler: CompositeGrappler,
+    iter_plugins: PluginIteratorFunction,
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    count = write_manifest(tmp_path / "plugins.json", grappler)
+    manifest = ManifestGrappler(tmp_path / "plugins.json", check=True)
+
+    # static plugins can't be written to a manifest
+    expected = {
+        plugin
+        for plugin in iter_plugins(grappler)
+        if plugin.grappler_id == EntryPointGrappler.id
+    }
+    assert count == len(expected)
+    assert set(iter_plugins(manifest)) == expected
+    assert not any(plugin.package.id == "pytest" for plugin in expected)
+
+    loaded = load_plugins(manifest, "pytest11")
+    assert loaded and loaded == load_plugins(EntryPointGrappler(), "pytest11")
+
+
+def test_manifest_for_topics(
+    tmp_path: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    write_manifest(tmp_path / "plugins.json", EntryPointGrappler(), topics=["pytest11"])
+    manifest = ManifestGrappler(tmp_path / "plugins.json")
+
+    assert get_plugins(manifest) == get_plugins(EntryPointGrappler(), "pytest11")
+    assert not get_plugins(manifest, "console_scripts")
+
+
+def test_stale_manifest(tmp_path: Path) -> None:
+    write_manifest(tmp_path / "plugins.json", EntryPointGrappler(), topics=["pytest11"])
+    content = json.loads((tmp_path / "plugins.json").read_text())
+    package = content["packages"][0]
+    package[1] = "0.0.0-stale"
+    (tmp_path / "plugins.json").write_text(json.dumps(content))
+
+    manifest = ManifestGrappler(tmp_path / "plugins.json")
+    assert manifest.stale_packages() == [Package(*package)]
+
+    with pytest.raises(StaleManifestError) as e:
+        ManifestGrappler(tmp_path / "plugins.json", check=True)
+
+    assert e.value.packages == [Package(*package)]
+
+
+@pytest.mark.parametrize("content", ["", "[]", '{"format": "grappler-manifest"}'])
+def test_invalid_manifest(tmp_path: Path, content: str) -> None:
+    (tmp_path / "plugins.json").write_text(content)
+
+    with pytest.raises(InvalidManifestError):
+        ManifestGrappler(tmp_path / "plugins.json")
+
+
+def test_unknown_target_plugins_are_skipped(tmp_path: Path) -> None:
+    source = StaticGrappler()
+    source.add_plugin(Plugin("unknown", "an-id", source.package, ("t",), None), 1)
+
+    assert write_manifest(tmp_path / "plugins.json", source) == 0
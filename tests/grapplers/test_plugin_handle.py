@@ -0,0 +1,69 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from grappler.grapplers import (
+    CompositeGrappler,
+    EntryPointGrappler,
+    ManifestGrappler,
+    PluginHandle,
+    StaticGrappler,
+    write_manifest,
+)
+
+from .conftest import PluginIteratorFunction, PluginLoaderFunction
+
+
+def _load_name(handle: PluginHandle) -> Any:
+    return handle.load().__name__
+
+
+def test_handles_load_plugins(
+    iter_plugins: PluginIteratorFunction, load_plugins: PluginLoaderFunction
+) -> None:
+    grappler = CompositeGrappler(EntryPointGrappler())
+    loaded = load_plugins(grappler, "pytest11")
+    handles = [PluginHandle.of(plugin) for plugin in iter_plugins(grappler, "pytest11")]
+
+    assert handles
+    assert [handle.plugin_id for handle in handles] == [
+        plugin.plugin_id for plugin in loaded
+    ]
+    assert all(handle.grappler_id == EntryPointGrappler.id for handle in handles)
+    assert [pickle.loads(pickle.dumps(handle)).load() for handle in handles] == list(
+        loaded.values()
+    )
+
+
+def test_handles_of_manifest_plugins(
+    tmp_path: Path, iter_plugins: PluginIteratorFunction
+) -> None:
+    write_manifest(tmp_path / "plugins.json", EntryPointGrappler(), topics=["pytest11"])
+    manifest = ManifestGrappler(tmp_path / "plugins.json")
+
+    assert {PluginHandle.of(plugin) for plugin in iter_plugins(manifest)} == {
+        PluginHandle.of(plugin)
+        for plugin in iter_plugins(EntryPointGrappler(), "pytest11")
+    }
+
+
+def test_handle_of_unknown_target(iter_plugins: PluginIteratorFunction) -> None:
+    (plugin,) = iter_plugins(StaticGrappler((["topic"], 1)))
+
+    with pytest.raises(ValueError, match="unknown target"):
+        PluginHandle.of(plugin)
+
+
+def test_handles_are_loaded_in_workers(load_plugins: PluginLoaderFunction) -> None:
+    loaded = load_plugins(EntryPointGrappler(), "pytest11")
+    handles = [PluginHandle.of(plugin) for plugin in loaded]
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        names = list(executor.map(_load_name, handles))
+
+    assert names == [obj.__name__ for obj in loaded.values()]
@@ -0,0 +1,115 @@
+import multiprocessing
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from grappler import Package, Plugin
+from grappler.grapplers import (
+    BlacklistingGrappler,
+    CompositeGrappler,
+    EntryPointGrappler,
+    InvalidRegistryError,
+    RegistryGrappler,
+    StaticGrappler,
+    write_registry,
+)
+
+from .conftest import (
+    PluginExtractorFunction,
+    PluginIteratorFunction,
+    PluginLoaderFunction,
+)
+
+
+@pytest.fixture
+def grappler() -> CompositeGrappler:
+    pytest_package = Package("pytest", "", "pytest", None)
+    return CompositeGrappler(
+        EntryPointGrappler(), StaticGrappler((["pytest11"], 1))
+    ).wrap(BlacklistingGrappler(items=[pytest_package]))
+
+
+def test_registry_serves_found_plugins(
+    tmp_path: Path,
+    grappler: CompositeGrappler,
+    iter_plugins: PluginIteratorFunction,
+    load_plugins: PluginLoaderFunction,
+) -> None:
+    count = write_registry(tmp_path / "plugins.reg", grappler)
+
+    # static plugins can't be written to a registry
+    expected = [
+        plugin
+        for plugin in iter_plugins(grappler)
+        if plugin.grappler_id == EntryPointGrappler.id
+    ]
+
+    with RegistryGrappler(tmp_path / "plugins.reg") as registry:
+        assert count == len(expected)
+        assert list(iter_plugins(registry)) == expected
+
+        loaded = load_plugins(registry, "pytest11")
+        assert loaded and loaded == load_plugins(EntryPointGrappler(), "pytest11")
+
+
+def test_registry_finds_plugins_by_topic(
+    tmp_path: Path,
+    iter_plugins: PluginIteratorFunction,
+    get_plugins: PluginExtractorFunction,
+) -> None:
+    package = Package("package", "1.0", "package-id", "linux")
+    plugins = [
+        Plugin(EntryPointGrappler.id, "a:b", package, ("x", "y", "x"), "ab", ("c",)),
+        Plugin(EntryPointGrappler.id, "a:c", package, ("y",), None, ()),
+        Plugin(EntryPointGrappler.id, "a:d", package, (), "ad", ()),
+    ]
+
+    source = StaticGrappler()
+    source.add_plugins((plugin, None) for plugin in plugins)
+
+    write_registry(tmp_path / "plugins.reg", source)
+    registry = RegistryGrappler(tmp_path / "plugins.reg")
+
+    assert list(iter_plugins(registry)) == plugins
+    assert list(iter_plugins(registry, "x")) == plugins[:1]
+    assert list(iter_plugins(registry, "y")) == plugins[:2]
+    assert list(iter_plugins(registry, "ab")) == []
+    assert list(iter_plugins(registry, "z")) == []
+
+    # packages are only decoded once per find
+    found = get_plugins(registry)
+    assert found["a:b"].package is found["a:c"].package
+
+
+def test_empty_registry(tmp_path: Path, iter_plugins: PluginIteratorFunction) -> None:
+    assert write_registry(tmp_path / "plugins.reg", StaticGrappler()) == 0
+    registry = RegistryGrappler(tmp_path / "plugins.reg")
+
+    assert list(iter_plugins(registry)) == []
+    assert list(iter_plugins(registry, "topic")) == []
+
+
+@pytest.mark.parametrize("content", [b"", b"GRPLREG1", b"GRPLIDT1" + bytes(80)])
+def test_invalid_registry(tmp_path: Path, content: bytes) -> None:
+    (tmp_path / "plugins.reg").write_bytes(content)
+
+    with pytest.raises(InvalidRegistryError):
+        RegistryGrappler(tmp_path / "plugins.reg")
+
+
+def _find_plugin_ids(path: str) -> List[str]:
+    with RegistryGrappler(path).find("pytest11") as plugins:
+        return [plugin.plugin_id for plugin in plugins]
+
+
+def test_registry_is_shared_between_processes(
+    tmp_path: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    write_registry(tmp_path / "plugins.reg", EntryPointGrappler())
+    expected = list(get_plugins(EntryPointGrappler(), "pytest11"))
+
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        results = pool.map(_find_plugin_ids, [str(tmp_path / "plugins.reg")] * 2)
+
+    assert results == [expected, expected]
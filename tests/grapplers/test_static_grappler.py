@@ -3,7 +3,7 @@ from typing import Optional, Sequence
 import pytest
 
 from grappler import Package
-from grappler.grapplers import StaticGrappler
+from grappler.grapplers import Query, StaticGrappler
 
 from .conftest import PluginExtractorFunction, PluginIteratorFunction
 
@@ -77,3 +77,134 @@ def test_iterated_plugins_can_be_loaded(
         "bar",
         "baz",
     ]
+
+
+def test_plugin_capabilities(
+    grappler: StaticGrappler, get_plugins: PluginExtractorFunction
+) -> None:
+    grappler.add_plugin(["topic.3"], "qux", capabilities=["cap.1", "cap.2"])
+
+    assert [plugin.capabilities for plugin in get_plugins(grappler).values()] == [
+        (),
+        (),
+        (),
+        ("cap.1", "cap.2"),
+    ]
+
+
+def test_restricted_copy(
+    grappler: StaticGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    queries = [Query.equals("topics", "topic.2")]
+    restricted = grappler.restricted(lambda: queries)
+
+    assert [restricted.load(plugin) for plugin in iter_plugins(restricted)] == [
+        "bar",
+        "baz",
+    ]
+
+    # plugins are shared with the copy, and queries are read on every find
+    grappler.add_plugin(["topic.2"], "qux")
+    queries.append(Query.not_in("topics", ["topic.1"]))
+    assert [restricted.load(plugin) for plugin in iter_plugins(restricted)] == [
+        "baz",
+        "qux",
+    ]
+
+
+def test_find_uses_snapshot(
+    grappler: StaticGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    with grappler.find("topic.2") as plugins:
+        first = next(plugins)
+
+        # plugins added during a find aren't seen by it...
+        grappler.add_plugin(["topic.2"], "qux")
+        assert [grappler.load(p) for p in [first, *plugins]] == ["bar", "baz"]
+
+    # ...but are by the next
+    assert [grappler.load(p) for p in iter_plugins(grappler, "topic.2")] == [
+        "bar",
+        "baz",
+        "qux",
+    ]
+
+    # the plugins aren't copied while they are unchanged
+    snapshot = grappler._registry.snapshot()
+    assert grappler._registry.snapshot().plugins is snapshot.plugins
+
+    grappler.clear()
+    assert not list(iter_plugins(grappler, "topic.2"))
+    assert snapshot.topics["topic.2"]
+
+
+def test_snapshot_released_after_find(
+    grappler: StaticGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    registry = grappler._registry
+    plugins = registry.plugins
+
+    with grappler.find("topic.1") as outer:
+        with grappler.find("topic.1") as inner:
+            list(inner)
+
+        # closing one find doesn't affect another
+        assert [grappler.load(p) for p in outer] == ["foo", "bar"]
+        grappler.add_plugin(["topic.1"], "qux")
+        assert registry.plugins is not plugins
+
+    # once no find is in progress, plugins are added without copying
+    plugins = registry.plugins
+    list(iter_plugins(grappler))
+    grappler.add_plugin(["topic.1"], "quux")
+    assert registry.plugins is plugins
+
+
+def test_cache_is_mutable(
+    grappler: StaticGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    cache = grappler.cache
+    (plugin,) = iter_plugins(StaticGrappler((["topic.3"], None)))
+
+    grappler.cache[plugin] = "qux"
+    assert [grappler.load(p) for p in iter_plugins(grappler, "topic.3")] == ["qux"]
+    assert cache[plugin] == "qux"
+    assert len(cache) == 4
+
+    del grappler.cache[plugin]
+    assert not list(iter_plugins(grappler, "topic.3"))
+    assert plugin not in cache
+
+    grappler.cache = {plugin: "quux"}
+    assert list(cache.values()) == ["quux"]
+    assert not list(iter_plugins(grappler, "topic.1"))
+
+    grappler.cache.clear()
+    assert not cache
+    assert not list(iter_plugins(grappler))
+
+
+def test_add_plugins(
+    grappler: StaticGrappler, iter_plugins: PluginIteratorFunction
+) -> None:
+    grappler.add_plugins([(["topic.3"], i) for i in range(100)], capabilities=["c"])
+
+    assert [grappler.load(p) for p in iter_plugins(grappler, "topic.3")] == list(
+        range(100)
+    )
+    assert {p.capabilities for p in iter_plugins(grappler, "topic.3")} == {("c",)}
+    assert len({p.plugin_id for p in iter_plugins(grappler)}) == 103
+
+
+def test_plugin_ids_from_keys(get_plugins: PluginExtractorFunction) -> None:
+    def make_grappler() -> StaticGrappler:
+        grappler = StaticGrappler()
+        grappler.add_plugin(["topic"], "foo", key="foo")
+        grappler.add_plugins([(["topic"], "bar"), (["topic"], "baz")], key=str.upper)
+        return grappler
+
+    plugin_ids = list(get_plugins(make_grappler()))
+    package_id = StaticGrappler.internal_package.id
+
+    assert plugin_ids == [f"{package_id}:{key}" for key in ["foo", "BAR", "BAZ"]]
+    assert list(get_plugins(make_grappler())) == plugin_ids
@@ -0,0 +1,169 @@
+import os
+import sys
+import zipfile
+from pathlib import Path
+from typing import Dict
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from grappler.grapplers import (
+    EntryPointGrappler,
+    ManifestGrappler,
+    WheelGrappler,
+    _wheel,
+    write_manifest,
+)
+
+from .conftest import PluginExtractorFunction, PluginLoaderFunction
+
+
+def write_wheel(path: Path, files: Dict[str, str]) -> None:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+
+
+@pytest.fixture
+def module(monkeypatch: pytest.MonkeyPatch) -> str:
+    # every test imports its own module, which isn't left on sys.path
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    return f"wheel_plugins_{uuid4().hex}"
+
+
+@pytest.fixture
+def directory(tmp_path: Path, module: str) -> Path:
+    directory = tmp_path / "wheels"
+    directory.mkdir()
+    write_wheel(
+        directory / "Wheel.Plugins-1.2-py3-none-any.whl",
+        {
+            f"{module}/__init__.py": "from .formatters import html\n",
+            f"{module}/formatters.py": 'html = "<html>"\nmarkdown = "# markdown"\n',
+            "Wheel.Plugins-1.2.dist-info/METADATA": (
+                "Name: Wheel.Plugins\nVersion: 1.2\n"
+            ),
+            "Wheel.Plugins-1.2.dist-info/entry_points.txt": (
+                "[formatters]\n"
+                f"html = {module}:html\n"
+                f"markdown = {module}.formatters:markdown [text]\n"
+                "[renderers]\n"
+                f"html = {module}:html\n"
+            ),
+        },
+    )
+    return directory
+
+
+def test_finds_wheel_entry_points(
+    directory: Path, module: str, get_plugins: PluginExtractorFunction
+) -> None:
+    path = directory / "Wheel.Plugins-1.2-py3-none-any.whl"
+    plugins = get_plugins(WheelGrappler(directory), "formatters")
+
+    assert set(plugins) == {
+        f"{module}:html@{path}",
+        f"{module}.formatters:markdown@{path}",
+    }
+
+    markdown = plugins[f"{module}.formatters:markdown@{path}"]
+    assert markdown.grappler_id == WheelGrappler.id
+    assert markdown.name == "markdown"
+    assert markdown.topics == ("formatters",)
+    assert markdown.capabilities == ("text",)
+    assert markdown.package.name == "Wheel.Plugins"
+    assert markdown.package.version == "1.2"
+    assert markdown.package.id == "wheel_plugins"
+
+    assert len(get_plugins(WheelGrappler(directory), "renderers")) == 1
+    assert module not in sys.modules
+
+
+def test_loads_plugins_from_wheel(
+    directory: Path, module: str, load_plugins: PluginLoaderFunction
+) -> None:
+    loaded = load_plugins(WheelGrappler(directory), "formatters")
+
+    assert sorted(loaded.values()) == ["# markdown", "<html>"]
+    assert sys.modules[module].__file__.startswith(str(directory))
+
+
+def test_invalid_wheels_are_ignored(
+    directory: Path,
+    get_plugins: PluginExtractorFunction,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    (directory / "broken-1.0-py3-none-any.whl").write_bytes(b"not a zip file")
+    (directory / "empty-1.0-py3-none-any.whl").write_bytes(b"")
+    write_wheel(directory / "no_dist_info-1.0-py3-none-any.whl", {"a.py": ""})
+    write_wheel(
+        directory / "no_metadata-1.0-py3-none-any.whl",
+        {"no_metadata-1.0.dist-info/entry_points.txt": "[formatters]\nx = y:z\n"},
+    )
+    write_wheel(
+        directory / "no_plugins-1.0-py3-none-any.whl",
+        {"no_plugins-1.0.dist-info/METADATA": "Name: no-plugins\nVersion: 1.0\n"},
+    )
+
+    assert len(get_plugins(WheelGrappler(directory), "formatters")) == 2
+    assert caplog.text.count("Ignoring invalid wheel") == 4
+
+
+def test_unchanged_wheels_are_not_read_again(
+    directory: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    grappler = WheelGrappler(directory)
+    read = mock.Mock(wraps=_wheel._read_wheel)
+
+    with mock.patch.object(_wheel, "_read_wheel", read):
+        get_plugins(grappler)
+        get_plugins(grappler)
+        assert read.call_count == 1
+
+        path = directory / "Wheel.Plugins-1.2-py3-none-any.whl"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        get_plugins(grappler)
+        assert read.call_count == 2
+
+        path.unlink()
+        assert not get_plugins(grappler)
+
+
+def test_packages_match_installed_packages(
+    tmp_path: Path, get_plugins: PluginExtractorFunction
+) -> None:
+    installed = {
+        plugin.package
+        for plugin in get_plugins(EntryPointGrappler(), "pytest11").values()
+    }
+    package = next(iter(installed))
+    write_wheel(
+        tmp_path / "package-1.0-py3-none-any.whl",
+        {
+            "package-1.0.dist-info/METADATA": (
+                f"Name: {package.name}\nVersion: {package.version}\n"
+            ),
+            "package-1.0.dist-info/entry_points.txt": (
+                "[pytest11]\nplugin = module:attr\n"
+            ),
+        },
+    )
+
+    (plugin,) = get_plugins(WheelGrappler(tmp_path)).values()
+    assert plugin.package == package
+
+
+def test_plugins_can_be_written_to_manifest(
+    directory: Path, tmp_path: Path, load_plugins: PluginLoaderFunction
+) -> None:
+    grappler = WheelGrappler(directory)
+
+    assert write_manifest(tmp_path / "plugins.json", grappler) == 3
+    # the package isn't an installed distribution, so it can't be stale
+    manifest = ManifestGrappler(tmp_path / "plugins.json", check=True)
+
+    assert manifest.stale_packages() == []
+    assert load_plugins(manifest) == load_plugins(grappler)
@@ -1,10 +1,35 @@
+import gc
+import os
+import pickle
+import threading
 from dataclasses import dataclass
-from typing import Any, Protocol, Sequence, Type, runtime_checkable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Protocol,
+    Sequence,
+    Type,
+    TypeVar,
+    runtime_checkable,
+)
+from unittest import mock
 
 import pytest
 
-from grappler import Hook
-from grappler.grapplers import StaticGrappler
+from grappler import (
+    FailurePolicy,
+    Hook,
+    Plugin,
+    PluginTimeoutError,
+    SuspendedPluginError,
+    preload,
+)
+from grappler.grapplers import BouncerGrappler, StaticGrappler
+from grappler.grapplers._bouncer import ForbiddenPluginError
+
+T = TypeVar("T")
 
 
 @pytest.fixture
@@ -107,3 +132,222 @@ def test_type_hinted_loading_ignores_non_supported_instances(
 
     hook = Hook[hook_type](hook_topic, grappler=static_grappler)  # type: ignore
     assert list(hook) == list(expected_values)
+
+
+def test_prefetched_hook_does_not_find_again(static_grappler: StaticGrappler) -> None:
+    hook = Hook[Any]("strings", grappler=static_grappler)
+
+    with mock.patch.object(static_grappler, "find", wraps=static_grappler.find) as find:
+        hook.prefetch(wait=True)
+        assert list(hook) == ["foo", "bar", "baz", "10"]
+        assert list(hook) == ["foo", "bar", "baz", "10"]
+        assert find.call_count == 1
+
+        hook.discard_prefetched()
+        assert list(hook) == ["foo", "bar", "baz", "10"]
+        assert find.call_count == 2
+
+
+def test_prefetched_hook_waits_for_in_flight_load() -> None:
+    release = threading.Event()
+
+    def slow_value() -> str:
+        release.wait(5)
+        return "slow"
+
+    grappler = StaticGrappler((["topic"], "fast"), (["topic"], "slow"))
+    loaded: Dict[str, int] = {}
+    original_load = grappler.load
+
+    def load(plugin: Any) -> Any:
+        value = original_load(plugin)
+        loaded[value] = loaded.get(value, 0) + 1
+        return slow_value() if value == "slow" else value
+
+    with mock.patch.object(grappler, "load", side_effect=load):
+        hook = Hook[str]("topic", grappler=grappler)
+        hook.prefetch()
+        values = iter(hook)
+
+        assert next(values) == "fast"
+        release.set()
+        assert list(values) == ["slow"]
+        assert list(hook) == ["fast", "slow"]
+
+    assert loaded == {"fast": 1, "slow": 1}
+
+
+def test_prefetch_errors_are_raised_by_iteration(
+    static_grappler: StaticGrappler,
+) -> None:
+    hook = Hook[Any]("strings", grappler=static_grappler)
+
+    with mock.patch.object(static_grappler, "load", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            hook.prefetch(wait=True)
+
+    with pytest.raises(RuntimeError):
+        list(hook)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork()")
+def test_preloaded_hooks_are_reused_by_forked_workers(
+    static_grappler: StaticGrappler,
+) -> None:
+    hooks = [
+        Hook[Any]("strings", grappler=static_grappler),
+        Hook[int]("numbers", grappler=static_grappler),
+    ]
+
+    with mock.patch.object(
+        static_grappler, "find", wraps=static_grappler.find
+    ) as find, mock.patch.object(
+        static_grappler, "load", wraps=static_grappler.load
+    ) as load:
+        try:
+            preload(*hooks)
+        finally:
+            if hasattr(gc, "unfreeze"):
+                gc.unfreeze()
+
+        assert find.call_count == 2
+        assert load.call_count == 15
+
+        worker_results = [
+            run_in_forked_worker(
+                lambda: (
+                    [list(hook) for hook in hooks],
+                    find.call_count,
+                    load.call_count,
+                )
+            )
+            for _ in range(3)
+        ]
+
+    for values, find_count, load_count in worker_results:
+        assert values == [["foo", "bar", "baz", "10"], list(range(10))]
+        assert find_count == 2
+        assert load_count == 15
+
+
+def run_in_forked_worker(func: Callable[[], T]) -> T:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:  # pragma: no cover (child process)
+        try:
+            os.close(read_fd)
+            with os.fdopen(write_fd, "wb") as output:
+                pickle.dump(func(), output)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as result:
+        data = result.read()
+    os.waitpid(pid, 0)
+    return pickle.loads(data)  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "hook_kwargs, reason",
+    [
+        ({"load_timeout": 0.05}, "took too long"),
+        ({"deadline": 0.05}, "deadline passed"),
+        ({"load_timeout": 1, "deadline": 0.05}, "deadline passed"),
+    ],
+    ids=["load_timeout", "deadline", "both"],
+)
+def test_slow_plugins_are_skipped(
+    hook_kwargs: Dict[str, float], reason: str, static_grappler: StaticGrappler
+) -> None:
+    release = threading.Event()
+    original_load = static_grappler.load
+
+    def load(plugin: Plugin) -> Any:
+        value = original_load(plugin)
+        if value == "bar":
+            release.wait(5)
+        return value
+
+    try:
+        with mock.patch.object(static_grappler, "load", side_effect=load):
+            hook = Hook[Any]("strings", grappler=static_grappler, **hook_kwargs)
+            values = list(hook)
+    finally:
+        release.set()
+
+    skipped = hook.skipped_plugins
+    assert "foo" in values and "bar" not in values
+    assert "bar" in [static_grappler.cache[plugin] for plugin in skipped]
+    assert values == ["foo", "baz", "10"][: len(values)]
+    assert len(values) + len(skipped) == 4
+    assert all(isinstance(e, PluginTimeoutError) for e in skipped.values())
+    assert reason in str(next(iter(skipped.values())))
+
+
+def test_failure_policy_skips_failing_plugins(static_grappler: StaticGrappler) -> None:
+    original_load = static_grappler.load
+    attempts: List[Any] = []
+
+    def load(plugin: Plugin) -> Any:
+        value = original_load(plugin)
+        attempts.append(value)
+        if value == "bar":
+            raise ImportError("broken extension")
+        return value
+
+    hook = Hook[Any](
+        "strings", grappler=static_grappler, failure_policy=FailurePolicy()
+    )
+
+    with mock.patch.object(static_grappler, "load", side_effect=load):
+        assert list(hook) == ["foo", "baz", "10"]
+        assert list(hook) == ["foo", "baz", "10"]
+
+    assert attempts.count("bar") == 1
+    assert [type(e) for e in hook.skipped_plugins.values()] == [SuspendedPluginError]
+
+
+def test_failure_policy_ignores_forbidden_plugins(
+    static_grappler: StaticGrappler,
+) -> None:
+    allowed: List[Any] = ["foo", "baz", "10"]
+    bouncer = BouncerGrappler(static_grappler)
+    bouncer.checker(
+        lambda plugin: static_grappler.load(plugin) in allowed,
+        mode=BouncerGrappler.Mode.LOAD,
+    )
+    hook = Hook[Any]("strings", grappler=bouncer, failure_policy=FailurePolicy())
+
+    with pytest.raises(ForbiddenPluginError):
+        list(hook)
+
+    allowed.append("bar")
+    assert list(hook) == ["foo", "bar", "baz", "10"]
+    assert not hook.skipped_plugins
+
+
+def test_capabilities_filter_plugins_before_loading(
+    static_grappler: StaticGrappler,
+) -> None:
+    static_grappler.add_plugin(["boxes"], IntBox(1), capabilities=["box", "int"])
+    static_grappler.add_plugin(["boxes"], StrBox("foo"), capabilities=["box", "str"])
+    static_grappler.add_plugin(["boxes"], "not a box")
+
+    with mock.patch.object(static_grappler, "load", wraps=static_grappler.load) as load:
+        assert list(Hook[Any]("boxes", grappler=static_grappler)) == [
+            IntBox(1),
+            StrBox("foo"),
+            "not a box",
+        ]
+        load.reset_mock()
+
+        hook = Hook[Any]("boxes", grappler=static_grappler, capabilities=["box"])
+        assert list(hook) == [IntBox(1), StrBox("foo")]
+        assert load.call_count == 2
+        load.reset_mock()
+
+        hook = Hook[Any]("boxes", grappler=static_grappler, capabilities=["box", "str"])
+        assert list(hook) == [StrBox("foo")]
+        assert load.call_count == 1